@@ -0,0 +1,81 @@
+#!/bin/bash
+# bench_convergence.sh
+# Description:
+# Measures how fast gastask reaches a target power. For the configuration
+# as given and for each local search option, gastask is run and the first
+# generation whose power_min in report.txt is at most <power_target> is
+# found. gastask is then run again up to that generation to measure the
+# wall-clock time to reach the target.
+#
+# Usage:
+# ./bench_convergence.sh <power_target> <config> [<localsearch option> ...]
+#   e.g. ./bench_convergence.sh 17.7 gastask.conf "10 1 20" "100 10 100"
+#
+# gastask is taken from the current directory unless GASTASK is set.
+# Work files are written under ./tmp/bench_convergence.
+
+function usage() {
+    cat <<EOF
+Usage: bench_convergence.sh <power_target> <config> [<localsearch option> ...]
+EOF
+}
+
+if [ $# -lt 2 ] || [ "$1" = "-h" ]; then
+    usage
+    exit 1
+fi
+
+GASTASK=$(realpath ${GASTASK:-./gastask})
+
+power_target=$1
+config=$(realpath $2)
+shift 2
+
+WORKDIR=./tmp/bench_convergence
+mkdir -p $WORKDIR
+cd $WORKDIR
+
+# copy of config with max_generations replaced by $2 and "localsearch $3" added to *genetic
+create_config() {
+    awk -v max_gen="$2" -v ls="$3" '
+        /^\*genetic/ { genetic = 1; print; next }
+        genetic && !/^#/ && NF > 0 {
+            if (max_gen != "")
+                $1 = max_gen
+            print
+            if (ls != "")
+                print "localsearch " ls
+            genetic = 0
+            next
+        }
+        { print }' $config > $1
+}
+
+# first reported generation reaching the target power, empty if none
+get_gen_reached() {
+    awk -v target=$power_target '!/^#/ && $2 <= target { print $1; exit }' report.txt
+}
+
+run_gastask() {
+    local start end
+
+    start=$(date +%s%N)
+    $GASTASK -s 1 $1 > /dev/null || exit 1
+    end=$(date +%s%N)
+    echo $(( (end - start) / 1000000 ))
+}
+
+printf "%-16s %12s %12s %12s\n" localsearch generations ms_to_target power_min
+for ls in "" "$@"; do
+    create_config bench.conf "" "$ls"
+    run_gastask bench.conf > /dev/null
+    gen=$(get_gen_reached)
+    power_min=$(awk '!/^#/ { p = $2 } END { print p }' report.txt)
+    if [ -z "$gen" ]; then
+        printf "%-16s %12s %12s %12s\n" "${ls:-none}" - - $power_min
+        continue
+    fi
+    create_config bench_target.conf $gen "$ls"
+    ms=$(run_gastask bench_target.conf)
+    printf "%-16s %12u %12u %12s\n" "${ls:-none}" $gen $ms $power_min
+done
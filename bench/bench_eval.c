@@ -0,0 +1,186 @@
+/*
+ * bench_eval.c
+ * Micro-benchmark of task cost evaluation in the gastask module.
+ *
+ * Provides:
+ *   - Scalar mode: one eval_tasks() call with its own parameter setup per task,
+ *     which is how tasks were evaluated by the former per-task model functions
+ *   - Fused mode: one eval_tasks() call over all tasks per resource assignment (vectorized loop)
+ *   - Table mode: gene evaluations as done by GA, summing precomputed task costs of random genes
+ *
+ * Every mode prints the number of evaluations per second.
+ */
+
+#include "gastask.h"
+
+BOOL	verbose;
+unsigned	TEE;
+
+static unsigned	n_repeats = 1000;
+
+static void
+usage(void)
+{
+	fprintf(stdout,
+"Usage: bench_eval <options> <config path>\n"
+" <options>\n"
+"      -h: this message\n"
+"      -n <repeats>: number of passes over all resource assignments (default: 1000)\n"
+	);
+}
+
+void
+errmsg(const char *fmt, ...)
+{
+	va_list	ap;
+	char	*errmsg;
+
+	va_start(ap, fmt);
+	vasprintf(&errmsg, fmt, ap);
+	va_end(ap);
+
+	fprintf(stderr, "ERROR: %s\n", errmsg);
+
+	free(errmsg);
+}
+
+static double
+get_time(void)
+{
+	struct timespec	ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+/* sink of results, so that evaluations are not optimized away */
+static double	checksum;
+
+static void
+run_eval(BOOL fused, const char *name)
+{
+	taskcostvec_t	costs;
+	unsigned	r, i, mem, cpufreq, ratio, cloud, tee;
+	unsigned long long	n_evals = 0;
+	double	ts;
+
+	alloc_taskcostvec(&costs, n_tasks);
+	ts = get_time();
+	for (r = 0; r < n_repeats; r++) {
+		for (tee = 0; tee < 2; tee++)
+		for (mem = 0; mem < n_mems; mem++)
+		for (cpufreq = 0; cpufreq < n_cpufreqs; cpufreq++)
+		for (ratio = 0; ratio < n_offloadingratios; ratio++)
+		for (cloud = 0; cloud < n_clouds; cloud++) {
+			costparams_t	params;
+
+			if (fused) {
+				setup_costparams(&params, mem, cloud, cpufreq, ratio, tee);
+				eval_tasks(&params, 0, n_tasks, &costs);
+			}
+			else {
+				for (i = 0; i < n_tasks; i++) {
+					setup_costparams(&params, mem, cloud, cpufreq, ratio, tee);
+					eval_tasks(&params, i, i + 1, &costs);
+				}
+			}
+			checksum += costs.util[n_tasks - 1];
+			n_evals += n_tasks;
+		}
+	}
+	ts = get_time() - ts;
+	free_taskcostvec(&costs);
+
+	printf("%-8s %12.0lf task evaluations/sec\n", name, n_evals / ts);
+}
+
+static void
+run_table(void)
+{
+	unsigned char	*attrs;
+	unsigned	n_genes = 100, r, g, i;
+	unsigned long long	n_evals = 0;
+	double	ts;
+
+	attrs = (unsigned char *)malloc(n_genes * n_tasks * N_ATTRS);
+	if (attrs == NULL)
+		FATAL(2, "cannot allocate genes");
+	for (i = 0; i < n_genes * n_tasks; i++) {
+		attrs[i * N_ATTRS + ATTR_MEM] = get_rand(n_mems);
+		attrs[i * N_ATTRS + ATTR_CLOUD] = get_rand(n_clouds);
+		attrs[i * N_ATTRS + ATTR_CPUFREQ] = get_rand(n_cpufreqs);
+		attrs[i * N_ATTRS + ATTR_OFFLOADINGRATIO] = get_rand(n_offloadingratios);
+	}
+
+	ts = get_time();
+	for (r = 0; r < n_repeats; r++) {
+		for (g = 0; g < n_genes; g++) {
+			const unsigned char	*attr = attrs + g * n_tasks * N_ATTRS;
+			taskcost_t	sum = { 0, };
+
+			for (i = 0; i < n_tasks; i++, attr += N_ATTRS) {
+				const taskcost_t	*cost = get_taskcost(i, attr[ATTR_MEM], attr[ATTR_CLOUD], attr[ATTR_CPUFREQ], attr[ATTR_OFFLOADINGRATIO], r & 1);
+
+				sum.util += cost->util;
+				sum.power_cpu += cost->power_cpu;
+				sum.power_mem += cost->power_mem;
+				sum.power_net_com += cost->power_net_com;
+				sum.n_violations += cost->n_violations;
+			}
+			checksum += sum.util + sum.power_cpu + sum.power_mem + sum.power_net_com + sum.n_violations;
+			n_evals++;
+		}
+	}
+	ts = get_time() - ts;
+	free(attrs);
+
+	printf("%-8s %12.0lf gene evaluations/sec (%u tasks)\n", "table", n_evals / ts, n_tasks);
+}
+
+static void
+parse_args(int argc, char *argv[])
+{
+	int	c;
+
+	while ((c = getopt(argc, argv, "n:h")) != -1) {
+		switch (c) {
+		case 'n':
+			if (sscanf(optarg, "%u", &n_repeats) != 1 || n_repeats == 0) {
+				usage();
+				exit(1);
+			}
+			break;
+		case 'h':
+			usage();
+			exit(0);
+		default:
+			errmsg("invalid option");
+			usage();
+			exit(1);
+		}
+	}
+
+	if (argc - optind < 1) {
+		usage();
+		exit(1);
+	}
+
+	load_conf(argv[optind]);
+}
+
+int
+main(int argc, char *argv[])
+{
+	parse_args(argc, argv);
+
+	init_rand(0);
+	compile_taskcosts();
+
+	run_eval(FALSE, "scalar");
+	run_eval(TRUE, "fused");
+	run_table();
+
+	if (verbose)
+		printf("checksum: %lf\n", checksum);
+	return 0;
+}
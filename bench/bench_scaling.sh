@@ -0,0 +1,124 @@
+#!/bin/bash
+# bench_scaling.sh
+# Description:
+# Measures how the GA of gastask scales with the number of tasks.
+# For each task count, a task set is generated by gasgen and gastask is
+# run twice: with a single generation to measure initialization, and
+# with <generations> generations. The difference gives the time per generation.
+#
+# Usage:
+# ./bench_scaling.sh [<generations> [<n_tasks> ...]]
+#
+# gasgen and gastask are taken from the current directory unless
+# GASGEN and GASTASK are set. Work files are written under ./tmp/bench_scaling.
+
+function usage() {
+    cat <<EOF
+Usage: bench_scaling.sh [<generations> [<n_tasks> ...]]
+EOF
+}
+
+if [ "$1" = "-h" ]; then
+    usage
+    exit 0
+fi
+
+GASGEN=$(realpath ${GASGEN:-./gasgen})
+GASTASK=$(realpath ${GASTASK:-./gastask})
+
+generations=${1:-1000}
+shift
+n_tasks_list=${@:-100 1000 5000 10000 20000}
+
+WORKDIR=./tmp/bench_scaling
+mkdir -p $WORKDIR
+cd $WORKDIR
+
+create_config() {
+    local config_file=$1
+    local max_gen=$2
+    local n_tasks=$3
+
+    cat > $config_file << EOF
+# max_generations n_populations cutoff penalty
+*genetic
+$max_gen 100 1.5 1.5
+
+# wcet_min wcet_max mem_total util_cpu util_target n_tasks task_size_min task_size_max input_size_min input_size_max output_size_min output_size_max
+*gentask
+100 1000 2000 0.3 0.6 $n_tasks 4000 6000 2000 4000 2000 4000
+
+# uplink_min uplink_max downlink_min downlink_max n_networks
+*gennetwork
+100 100 120 120 $n_tasks
+
+# intercept_out_min intercept_out_max intercept_in_min intercept_in_max n_net_commanders
+*gennetcommander
+1 5 5 7 $n_tasks
+
+# wcet_scale power_active power_idle
+*cpufreq
+1    100    1
+0.5  25   0.25
+0.25 6.25 0.0625
+0.125 1.5625 0.015625
+
+# type max_capacity wcet_scale power_active power_idle
+*mem
+dram  1000 1    0.01   0.01
+nvram 1000 0.8  0.01   0.0001
+
+# type computation_power power_active power_idle max_capacity offloading_limit
+*cloud
+mec  4   400   100   100000   1.0
+
+# offloading_ratio
+*offloadingratio
+0
+1
+
+# TEE
+*TEE
+1
+
+# uplink_data_rate downlink_data_rate
+*network
+EOF
+    $GASGEN -s 1 $config_file > /dev/null
+    cat ./network_generated.txt >> $config_file
+
+    cat >> $config_file << EOF
+
+# intercept_out intercept_in
+*netcommander
+EOF
+    cat ./network_commander_generated.txt >> $config_file
+
+    cat >> $config_file << EOF
+
+# wcet period memreq mem_active_ratio task_size input_size output_size offloading_bool
+*task
+EOF
+    cat ./task_generated.txt >> $config_file
+}
+
+# elapsed milliseconds of gastask on a configuration
+run_gastask() {
+    local start end
+
+    start=$(date +%s%N)
+    $GASTASK -s 1 $1 > /dev/null || exit 1
+    end=$(date +%s%N)
+    echo $(( (end - start) / 1000000 ))
+}
+
+printf "%10s %12s %12s %14s\n" n_tasks init_ms total_ms ms_per_gen
+for n_tasks in $n_tasks_list; do
+    create_config gastask_$n_tasks.conf $generations $n_tasks
+    sed "3s/^$generations /1 /" gastask_$n_tasks.conf > gastask_${n_tasks}_init.conf
+
+    init_ms=$(run_gastask gastask_${n_tasks}_init.conf)
+    total_ms=$(run_gastask gastask_$n_tasks.conf)
+    printf "%10u %12u %12u %14.4f\n" $n_tasks $init_ms $total_ms \
+        $(awk "BEGIN { print ($total_ms - $init_ms) / ($generations - 1) }")
+done
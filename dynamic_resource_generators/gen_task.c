@@ -18,7 +18,7 @@ static void gen_offloading_bool(unsigned *offloading_bool)
 	
 	for (int i = 0; i < min_local; i++)
 	{
-		locallist[i] = abs(rand()) % n_tasks_target;
+		locallist[i] = get_rand(n_tasks_target);
 		for (int j = 0; j < i; j++)
 		{
 			if (locallist[j] == locallist[i])
@@ -131,13 +131,17 @@ gen_task(void)
 	if (fp == NULL) {
 		FATAL(2, "cannot open task_generated.txt");
 	}
-	offloading_bool = (unsigned *)calloc(100, sizeof(unsigned));
+	offloading_bool = (unsigned *)calloc(n_tasks_target, sizeof(unsigned));
+	if (offloading_bool == NULL) {
+		FATAL(2, "cannot allocate offloading flags");
+	}
 	gen_offloading_bool(offloading_bool);
 	
 	for (i = 0; i < n_tasks_target; i++) {
 		do_gen_task(fp, i, offloading_bool);
 	}
 	fclose(fp);
+	free(offloading_bool);
 
 	printf("full power utilization: %lf\n", util_sum_cpu + get_util_overhead_bymem(memreq_total));
 }
@@ -6,6 +6,16 @@
  *   - Population and gene initialization, crossover, and selection logic
  *   - Fitness evaluation based on utilization, power, and constraints (including TEE support)
  *   - Main entry point: run_GA(), which executes the GA loop and manages reporting
+ *   - Island operations: init_island(), evolve_island() and immigrate_gene() used by island.c
+ *   - Checkpoints: setup_island() and restore_gene_costs() used by checkpoint.c to resume a run
+ *   - Batched crossover: n_offsprings children per generation, bred in parallel by island workers
+ *   - Early termination: stagnation of the best score or a wall-clock budget stops run_GA() before max_gen
+ *   - Fitness cache: genes already evaluated by an island skip the memory check and, if rejected, the evaluation
+ *   - Local search: single-attribute moves on the elite genes, accepted only if they improve the score
+ *   - Constructive initialization: initial genes are built task by task within memory capacities and a utilization budget
+ *   - Crossover prescreen: children are rejected by bounds on memory, utilization and score before evaluation
+ *   - Population statistics: running sums of utilization and power of each island, read by report.c
+ *   - Profiling: phases and hot-path events are timed and counted with the PROF_* macros (see profile.c)
  *   - Utility functions for gene sorting, mutation, and constraint checking
  */
 
@@ -13,26 +23,46 @@
 
 #define MAX_TRY	10000
 
+/* relative tolerance of bounds, which must not reject a child accepted by the exact checks */
+#define BOUND_EPS	1e-9
+
 unsigned	n_pops = 100;
 unsigned	max_gen = 100000;
 
 double		cutoff, penalty;
 
-extern unsigned	n_networks; 
-extern network_t  networks[MAX_NETWORKS];
 
 extern unsigned	n_clouds; 
 extern cloud_t  clouds[MAX_CLOUDS]; 
 
-extern task_t tasks[MAX_TASKS];
 extern unsigned n_tasks;
 
 
-LIST_HEAD(genes_by_util);
-LIST_HEAD(genes_by_power);
-LIST_HEAD(genes_by_score);
+unsigned	n_offsprings = 1;
+unsigned	n_workers = 1;
+
+island_t	*islands;
+unsigned	n_islands = 1;
+
+unsigned	stagnation_gens;	/* 0: never stop on stagnation */
+double		min_improvement;
+double		time_budget;		/* seconds, 0: unlimited */
+unsigned	cache_size = 4096;	/* entries of the fitness cache per island, 0: no cache */
+
+BOOL		init_random;		/* initial genes with random attributes instead of constructed ones */
+static double	*min_utils;		/* lowest utilization of each task over all attribute values */
+
+/* running sums over tasks of the lowest utilization and power and the most violations of a task */
+static double	*min_utils_sum, *min_powers_sum;
+static unsigned	*max_violations_sum;
+
+unsigned	localsearch_interval;	/* 0: no local search */
+unsigned	localsearch_elites = 1, localsearch_moves = 100;
 
-gene_t	*genes;
+static double	score_best;
+static unsigned	gen_improved;
+static struct timespec	ts_start;
+static double	elapsed_resumed;	/* seconds run before the checkpoint resumed from */
 
 #if 0
 static void
@@ -53,7 +83,7 @@ show_gene(gene_t *gene)
 #endif
 
 static void
-setup_taskattrs(taskattrs_t *taskattrs)
+setup_taskattrs(gene_t *gene, attr_t attr, taskattrs_t *taskattrs)
 {
 	int	i;
 
@@ -61,7 +91,7 @@ setup_taskattrs(taskattrs_t *taskattrs)
 	taskattrs->max_type = 0;
 
 	for (i = 0; i < n_tasks; i++) {
-		unsigned	attrtype = taskattrs->attrs[i];
+		unsigned	attrtype = get_attr(gene, attr, i);
 		taskattrs->n_tasks_per_type[attrtype]++;
 		if (taskattrs->n_tasks_per_type[taskattrs->max_type] < taskattrs->n_tasks_per_type[attrtype]) {
 			taskattrs->max_type = attrtype;
@@ -70,83 +100,78 @@ setup_taskattrs(taskattrs_t *taskattrs)
 }
 
 static void
-assign_taskattrs(taskattrs_t *taskattrs, unsigned max_value)
+assign_taskattrs(island_t *island, gene_t *gene, attr_t attr, unsigned max_value)
 {
 	int	i;
 
 	for (i = 0; i < n_tasks; i++) {
-		unsigned	attrtype = get_rand(max_value);
-		taskattrs->attrs[i] = attrtype;
+		unsigned	attrtype = rng_rand(&island->rng, max_value);
+		set_attr(gene, attr, i, attrtype);
 	}
-	setup_taskattrs(taskattrs);
 }
 
 static void
-sort_gene_util(gene_t *gene)
+sort_gene(island_t *island, gene_t *gene)
 {
-	struct list_head	*lp;
+	phase_t	phase_left = PROF_ENTER(PHASE_SORTING);
 
-	list_del_init(&gene->list_util);
-
-	list_for_each (lp, &genes_by_util) {
-		gene_t	*gene_list = list_entry(lp, gene_t, list_util);
-		if (gene->util < gene_list->util) {
-			list_add_tail(&gene->list_util, &gene_list->list_util);
-			return;
-		}
-	}
-	list_add_tail(&gene->list_util, &genes_by_util);
+	generank_add(&island->genes_by_util, gene);
+	generank_add(&island->genes_by_power, gene);
+	generank_add(&island->genes_by_score, gene);
+	PROF_LEAVE(phase_left);
 }
 
+/* Neumaier summation, so that sums updated over millions of generations do not drift */
 static void
-sort_gene_power(gene_t *gene)
+add_compensated(double *sum, double *comp, double value)
 {
-	struct list_head	*lp;
+	double	sum_new = *sum + value;
 
-	list_del_init(&gene->list_power);
-
-	list_for_each (lp, &genes_by_power) {
-		gene_t	*gene_list = list_entry(lp, gene_t, list_power);
-		if (gene->power < gene_list->power) {
-			list_add_tail(&gene->list_power, &gene_list->list_power);
-			return;
-		}
-	}
-	list_add_tail(&gene->list_power, &genes_by_power);
+	if (fabs(*sum) >= fabs(value))
+		*comp += (*sum - sum_new) + value;
+	else
+		*comp += (value - sum_new) + *sum;
+	*sum = sum_new;
 }
 
+/*
+ * Add a gene to (sign 1) or remove it from (sign -1) the population statistics
+ * of an island. A gene is removed before its fields change and added back
+ * afterwards, so its contribution is always taken out with the values it was added with.
+ */
 static void
-sort_gene_score(gene_t *gene)
+count_gene(island_t *island, const gene_t *gene, int sign)
 {
-	struct list_head	*lp;
+	popstats_t	*popstats = &island->popstats;
 
-	list_del_init(&gene->list_score);
-
-	list_for_each (lp, &genes_by_score) {
-		gene_t	*gene_list = list_entry(lp, gene_t, list_score);
-		if (gene->score < gene_list->score) {
-			list_add_tail(&gene->list_score, &gene_list->list_score);
-			return;
-		}
+	add_compensated(&popstats->util_sum, &popstats->util_comp, sign * gene->util);
+	if (gene->util <= 1.0) {
+		add_compensated(&popstats->power_sum, &popstats->power_comp, sign * gene->power);
+		popstats->n_valid += sign;
 	}
-	list_add_tail(&gene->list_score, &genes_by_score);
 }
 
-static void
-sort_gene(gene_t *gene)
+void
+add_crossover_stats(crossover_stats_t *sum, const crossover_stats_t *stats)
 {
-	sort_gene_util(gene);
-	sort_gene_power(gene);
-	sort_gene_score(gene);
+	sum->n_tries += stats->n_tries;
+	sum->n_rejected_mem += stats->n_rejected_mem;
+	sum->n_rejected_cutoff += stats->n_rejected_cutoff;
+	sum->n_rejected_worse += stats->n_rejected_worse;
+	sum->n_prescreened += stats->n_prescreened;
 }
 
 static BOOL
 check_memusage(gene_t *gene)
 {
    double   mem_used[MAX_MEMS] = { 0, };
+   unsigned char   mem_types[n_tasks], ratios[n_tasks];
    int   i;
+
+   unpack_attrs(gene, ATTR_MEM, 0, n_tasks, mem_types);
+   unpack_attrs(gene, ATTR_OFFLOADINGRATIO, 0, n_tasks, ratios);
    for (i = 0; i < n_tasks; i++) {
-      mem_used[gene->taskattrs_mem.attrs[i]] += get_task_memreq(i) * (double) (1.0 - offloadingratios[gene->taskattrs_offloadingratio.attrs[i]]); 
+      mem_used[mem_types[i]] += tasks.memreq[i] * (double) (1.0 - offloadingratios[ratios[i]]); 
    }
    for (i = 0; i < n_mems; i++) {
       if (mem_used[i] > (double) mems[i].max_capacity)
@@ -158,27 +183,82 @@ check_memusage(gene_t *gene)
    return TRUE;
 }
 
+/* rebuild the running sums of the memory usage of a gene from task start */
+static void
+sum_memusage(gene_t *gene, unsigned start)
+{
+	double	*memsum = GENE_MEMSUM(gene);
+	unsigned	n = n_tasks > start ? n_tasks - start : 1;
+	unsigned char	mem_types[n], ratios[n];
+	unsigned	i;
+
+	if (start == 0)
+		memset(memsum, 0, n_mems * sizeof(double));
+	unpack_attrs(gene, ATTR_MEM, start, n_tasks, mem_types);
+	unpack_attrs(gene, ATTR_OFFLOADINGRATIO, start, n_tasks, ratios);
+	for (i = start; i < n_tasks; i++) {
+		double	*row = memsum + i * n_mems;
+
+		memcpy(row + n_mems, row, n_mems * sizeof(double));
+		row[n_mems + mem_types[i - start]] += tasks.memreq[i] * (double) (1.0 - offloadingratios[ratios[i - start]]);
+	}
+}
+
+/*
+ * Check the memory usage of a newborn whose memory types and offloading ratios
+ * before crosspt_lo are inherited from gene1 and from crosspt_hi on from gene2.
+ * The usage is estimated from the running sums of the parents, and only a usage
+ * too close to a capacity to be decided is checked by check_memusage().
+ */
+static BOOL
+check_memusage_delta(gene_t *newborn, gene_t *gene1, gene_t *gene2, unsigned crosspt_lo, unsigned crosspt_hi)
+{
+	const double	*memsum1 = GENE_MEMSUM(gene1) + crosspt_lo * n_mems;
+	const double	*memsum2_hi = GENE_MEMSUM(gene2) + crosspt_hi * n_mems, *memsum2_end = GENE_MEMSUM(gene2) + n_tasks * n_mems;
+	double	mem_used[MAX_MEMS];
+	unsigned	n = crosspt_hi > crosspt_lo ? crosspt_hi - crosspt_lo : 1;
+	unsigned char	mem_types[n], ratios[n];
+	BOOL	uncertain = FALSE;
+	unsigned	i;
+
+	for (i = 0; i < n_mems; i++)
+		mem_used[i] = memsum1[i] + (memsum2_end[i] - memsum2_hi[i]);
+	unpack_attrs(newborn, ATTR_MEM, crosspt_lo, crosspt_hi, mem_types);
+	unpack_attrs(newborn, ATTR_OFFLOADINGRATIO, crosspt_lo, crosspt_hi, ratios);
+	for (i = crosspt_lo; i < crosspt_hi; i++)
+		mem_used[mem_types[i - crosspt_lo]] += tasks.memreq[i] * (double) (1.0 - offloadingratios[ratios[i - crosspt_lo]]);
+
+	for (i = 0; i < n_mems; i++) {
+		double	tolerance = BOUND_EPS * (1.0 + mems[i].max_capacity);
+
+		if (mem_used[i] > mems[i].max_capacity + tolerance)
+			return FALSE;
+		if (mem_used[i] > mems[i].max_capacity - tolerance)
+			uncertain = TRUE;
+	}
+	return uncertain ? check_memusage(newborn) : TRUE;
+}
+
 static void
-balance_mem_types(gene_t *gene)
+balance_mem_types(island_t *island, gene_t *gene, taskattrs_t *taskattrs)
 {
-	taskattrs_t	*taskattrs = &gene->taskattrs_mem;
 	unsigned	n_tasks_type;
 
 	n_tasks_type = taskattrs->n_tasks_per_type[taskattrs->max_type];
 	if (n_tasks_type > 0) {
-		unsigned	idx_changed = get_rand(n_tasks_type);
+		unsigned	idx_changed = rng_rand(&island->rng, n_tasks_type);
 		unsigned	type_new;
 		unsigned	i;
 		
 		for (i = 0; i < n_tasks; i++) {
-			if (taskattrs->attrs[i] == taskattrs->max_type) {
+			if (get_attr(gene, ATTR_MEM, i) == taskattrs->max_type) {
 				if (idx_changed == 0)
 					break;
 				idx_changed--;
 			}
 		}
-		type_new = get_rand_except(n_mems, taskattrs->max_type);
-		taskattrs->attrs[i] = type_new;
+		type_new = rng_rand_except(&island->rng, n_mems, taskattrs->max_type);
+		set_attr(gene, ATTR_MEM, i, type_new);
 		taskattrs->n_tasks_per_type[taskattrs->max_type]--;
 		taskattrs->n_tasks_per_type[type_new]++;
 		if (taskattrs->n_tasks_per_type[taskattrs->max_type] < taskattrs->n_tasks_per_type[type_new]) {
@@ -189,20 +269,15 @@ balance_mem_types(gene_t *gene)
 }
 
 static BOOL
-lower_utilization_by_attr(taskattrs_t *taskattrs)
+lower_utilization_by_attr(island_t *island, gene_t *gene, attr_t attr)
 {
 	unsigned	idx_org, idx;
 	
-	idx_org = idx = get_rand(n_tasks);
+	idx_org = idx = rng_rand(&island->rng, n_tasks);
 	do {
-		unsigned	type = taskattrs->attrs[idx];
+		unsigned	type = get_attr(gene, attr, idx);
 		if (type > 0) {
-			taskattrs->attrs[idx]--;
-			
-			taskattrs->n_tasks_per_type[type]--;
-			taskattrs->n_tasks_per_type[type - 1]++;
-			if (taskattrs->n_tasks_per_type[type - 1] > taskattrs->n_tasks_per_type[taskattrs->max_type])
-				taskattrs->max_type = type - 1;
+			set_attr(gene, attr, idx, type - 1);
 			return TRUE;
 		}
 		idx++;
@@ -213,57 +288,81 @@ lower_utilization_by_attr(taskattrs_t *taskattrs)
 }
 
 static void
-lower_utilization(gene_t *gene)
+lower_utilization(island_t *island, gene_t *gene)
 {
-	if (get_rand(n_cpufreqs + n_offloadingratios) < n_cpufreqs) {  
-		if (!lower_utilization_by_attr(&gene->taskattrs_cpufreq))
-			lower_utilization_by_attr(&gene->taskattrs_offloadingratio); 
+	if (rng_rand(&island->rng, n_cpufreqs + n_offloadingratios) < n_cpufreqs) {  
+		if (!lower_utilization_by_attr(island, gene, ATTR_CPUFREQ))
+			lower_utilization_by_attr(island, gene, ATTR_OFFLOADINGRATIO); 
 	}
 	else {
-		if (!lower_utilization_by_attr(&gene->taskattrs_offloadingratio)) 
-			lower_utilization_by_attr(&gene->taskattrs_cpufreq);
+		if (!lower_utilization_by_attr(island, gene, ATTR_OFFLOADINGRATIO)) 
+			lower_utilization_by_attr(island, gene, ATTR_CPUFREQ);
 	}
 }
 
-BOOL
-check_utilpower(gene_t *gene)
+static void
+add_taskcost(taskcost_t *sum, const taskcost_t *cost)
 {
-	double	util_new = 0, power_new, power_new_sum_cpu = 0, power_new_sum_mem = 0, power_new_idle = 0, power_new_sum_net_com = 0;
-
-	int	i, violate_period = 0, num_offloading = 0; 
-	// int violate_offloading = 0; 
+	sum->util += cost->util;
+	sum->power_cpu += cost->power_cpu;
+	sum->power_mem += cost->power_mem;
+	sum->power_net_com += cost->power_net_com;
+	sum->n_violations += cost->n_violations;
+}
 
-	for (i = 0; i < n_tasks; i++) {
-		double	task_util, task_power_cpu, task_power_mem, task_power_net_com, task_deadline;
-		
-		get_task_utilpower(i, gene->taskattrs_mem.attrs[i], gene->taskattrs_cloud.attrs[i], gene->taskattrs_cpufreq.attrs[i], gene->taskattrs_offloadingratio.attrs[i],
-				   &task_util, &task_power_cpu, &task_power_mem, &task_power_net_com, &task_deadline); //gyuri
-		util_new += task_util;
-		power_new_sum_cpu += task_power_cpu;
-		power_new_sum_mem += task_power_mem;
-		power_new_sum_net_com += task_power_net_com;
-		if(task_deadline > 1.0) 
-			violate_period ++;
-		if((unsigned)gene->taskattrs_offloadingratio.attrs[i] != 0)
-			num_offloading++;
+/*
+ * Add the costs of tasks from start to end - 1 to sum in task order.
+ * If costs is not NULL, the cost of task i is also stored into costs[i].
+ */
+static void
+eval_taskcosts(const gene_t *gene, unsigned start, unsigned end, BOOL tee, taskcost_t *costs, taskcost_t *sum)
+{
+	unsigned	n = end > start ? end - start : 1;
+	unsigned char	mem_types[n], cloud_types[n], cpufreq_types[n], ratios[n];
+	unsigned	i;
+
+	unpack_attrs(gene, ATTR_MEM, start, end, mem_types);
+	unpack_attrs(gene, ATTR_CLOUD, start, end, cloud_types);
+	unpack_attrs(gene, ATTR_CPUFREQ, start, end, cpufreq_types);
+	unpack_attrs(gene, ATTR_OFFLOADINGRATIO, start, end, ratios);
+	PROF_COUNT(PROF_TASK_EVALS, end - start);
+	for (i = start; i < end; i++) {
+		const taskcost_t	*cost = get_taskcost(i, mem_types[i - start], cloud_types[i - start], cpufreq_types[i - start], ratios[i - start], tee);
+
+		if (costs != NULL)
+			costs[i] = *cost;
+		add_taskcost(sum, cost);
 	}
-	/*
-	for(i = 0; i < n_clouds; i++) 
-		{
-			if((double)num_offloading > clouds[i].offloading_limit * n_tasks)
-			{
-				violate_offloading = 1;
-				break;
-			}
+}
+
+/* rebuild the running sums of the per-task costs of a gene from task start */
+static void
+sum_taskcosts(gene_t *gene, unsigned start)
+{
+	taskcost_t	*costs = GENE_COSTS(gene), *costs_sum = GENE_COSTS_SUM(gene);
+	int	i;
+
+	for (i = start; i < n_tasks; i++) {
+		costs_sum[i + 1] = costs_sum[i];
+		add_taskcost(costs_sum + i + 1, costs + i);
 	}
-	*/
-	power_new = power_new_sum_cpu + power_new_sum_mem + power_new_sum_net_com; //ADDMEM
-	gene->cpu_power = power_new_sum_cpu;
-	gene->mem_power = power_new_sum_mem;
-	gene->power_netcom = power_new_sum_net_com;
-	// power_new = power_new_sum_cpu + power_new_sum_net_com; 
-	gene->period_violation = violate_period;
-	if (util_new < 1.0 && violate_period == 0) { 
+}
+
+/*
+ * Derive util, power and score of a gene from the sum of its per-task costs.
+ * FALSE is returned if the utilization exceeds the cutoff.
+ */
+static BOOL
+apply_utilpower(gene_t *gene, const taskcost_t *sum)
+{
+	double	util_new = sum->util, power_new, power_new_idle;
+
+	power_new = sum->power_cpu + sum->power_mem + sum->power_net_com; //ADDMEM
+	gene->cpu_power = sum->power_cpu;
+	gene->mem_power = sum->power_mem;
+	gene->power_netcom = sum->power_net_com;
+	gene->period_violation = sum->n_violations;
+	if (util_new < 1.0 && sum->n_violations == 0) { 
 		power_new_idle = cpufreqs[n_cpufreqs - 1].power_idle * (1 - util_new); 
 		power_new += power_new_idle;
 		gene->cpu_power += power_new_idle;
@@ -272,265 +371,1030 @@ check_utilpower(gene_t *gene)
 	if (util_new <= cutoff) {
 		gene->power = power_new;
 		gene->score = power_new;
-		if (util_new >= 1.0 || violate_period > 0) 
+		if (util_new >= 1.0 || sum->n_violations > 0) 
 			gene->score += power_new * (util_new - 1.0) * penalty;
 		return TRUE;
 	}
 	return FALSE;
 }
 
+static BOOL
+check_utilpower_model(gene_t *gene, BOOL tee)
+{
+	taskcost_t	sum = { 0, };
+
+	PROF_COUNT(PROF_EVALS, 1);
+	eval_taskcosts(gene, 0, n_tasks, tee, GENE_COSTS(gene), &sum);
+	memset(GENE_COSTS_SUM(gene), 0, sizeof(taskcost_t));
+	sum_taskcosts(gene, 0);
+
+	return apply_utilpower(gene, &sum);
+}
+
+BOOL
+check_utilpower(gene_t *gene)
+{
+	return check_utilpower_model(gene, FALSE);
+}
 
 // TEE
 BOOL
 check_utilpower_TEE(gene_t *gene)
 {
-	double	util_new = 0, power_new, power_new_sum_cpu = 0, power_new_sum_mem = 0, power_new_idle = 0, power_new_sum_net_com = 0;
+	return check_utilpower_model(gene, TRUE);
+}
+
+/*
+ * Re-evaluate a gene under the TEE model without replacing its per-task costs,
+ * which must stay consistent with the model used by crossover.
+ */
+static void
+recheck_utilpower_TEE(gene_t *gene)
+{
+	taskcost_t	sum = { 0, };
+
+	PROF_COUNT(PROF_EVALS, 1);
+	eval_taskcosts(gene, 0, n_tasks, TRUE, NULL, &sum);
+	apply_utilpower(gene, &sum);
+}
+
+/*
+ * Evaluate a newborn whose tasks before crosspt_lo are inherited from gene1 and
+ * tasks from crosspt_hi on are inherited from gene2. Only the tasks in between are
+ * re-evaluated. The prefix is taken from the running sums of gene1 and the suffix
+ * is accumulated in task order, so the totals equal those of a full evaluation.
+ */
+static BOOL
+check_utilpower_delta(gene_t *newborn, gene_t *gene1, gene_t *gene2, unsigned crosspt_lo, unsigned crosspt_hi)
+{
+	taskcost_t	sum = GENE_COSTS_SUM(gene1)[crosspt_lo];
+	taskcost_t	*costs2 = GENE_COSTS(gene2);
+	int	i;
+
+	PROF_COUNT(PROF_EVALS, 1);
+	eval_taskcosts(newborn, crosspt_lo, crosspt_hi, TEE, GENE_COSTS(newborn), &sum);
+	for (i = crosspt_hi; i < n_tasks; i++)
+		add_taskcost(&sum, costs2 + i);
+
+	return apply_utilpower(newborn, &sum);
+}
+
+static void
+inherit_taskcosts(gene_t *newborn, gene_t *gene1, gene_t *gene2, unsigned crosspt_lo, unsigned crosspt_hi)
+{
+	memcpy(GENE_COSTS(newborn), GENE_COSTS(gene1), crosspt_lo * sizeof(taskcost_t));
+	memcpy(GENE_COSTS(newborn) + crosspt_hi, GENE_COSTS(gene2) + crosspt_hi, (n_tasks - crosspt_hi) * sizeof(taskcost_t));
+	memcpy(GENE_COSTS_SUM(newborn), GENE_COSTS_SUM(gene1), (crosspt_lo + 1) * sizeof(taskcost_t));
+	sum_taskcosts(newborn, crosspt_lo);
+}
+
+static void
+inherit_memusage(gene_t *newborn, gene_t *gene1, unsigned crosspt_lo)
+{
+	memcpy(GENE_MEMSUM(newborn), GENE_MEMSUM(gene1), (crosspt_lo + 1) * n_mems * sizeof(double));
+	sum_memusage(newborn, crosspt_lo);
+}
+
+static void
+get_fitness(const gene_t *gene, fitstatus_t status, fitness_t *fitness)
+{
+	fitness->status = status;
+	fitness->util = gene->util;
+	fitness->power = gene->power;
+	fitness->score = gene->score;
+	fitness->mem_power = gene->mem_power;
+	fitness->cpu_power = gene->cpu_power;
+	fitness->power_netcom = gene->power_netcom;
+	fitness->period_violation = gene->period_violation;
+}
+
+/* set the fields of a gene as its evaluation with the given result would have done */
+static void
+apply_fitness(gene_t *gene, const fitness_t *fitness)
+{
+	if (fitness->status == FIT_MEM)
+		return;
+	gene->util = fitness->util;
+	gene->mem_power = fitness->mem_power;
+	gene->cpu_power = fitness->cpu_power;
+	gene->power_netcom = fitness->power_netcom;
+	gene->period_violation = fitness->period_violation;
+	if (fitness->status == FIT_OK) {
+		gene->power = fitness->power;
+		gene->score = fitness->score;
+	}
+}
+
+static void
+cache_gene(cache_t *cache, const gene_t *gene, fitstatus_t status)
+{
+	fitness_t	fitness;
+
+	if (cache == NULL)
+		return;
+	get_fitness(gene, status, &fitness);
+	cache_insert(cache, gene, &fitness);
+}
+
+/*
+ * Look up a gene in the fitness cache. FIT_OK is returned for a miss,
+ * since the gene should then be checked as usual.
+ */
+static fitstatus_t
+lookup_gene(cache_t *cache, gene_t *gene, BOOL *hit)
+{
+	fitness_t	fitness;
+
+	*hit = FALSE;
+	if (cache == NULL || !cache_lookup(cache, gene, &fitness))
+		return FIT_OK;
+	*hit = TRUE;
+	apply_fitness(gene, &fitness);
+	return fitness.status;
+}
 
-	int	i, violate_period = 0, num_offloading = 0; 
-	// int violate_offloading = 0; 
+static double
+get_task_util(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio)
+{
+	return get_taskcost(no_task, mem_type, cloud_type, cpufreq_type, offloadingratio, TEE)->util;
+}
 
+/*
+ * Set up the lowest utilization and power and the most violations of each task
+ * over the attribute values it may get, and their running sums over tasks.
+ */
+static void
+setup_task_bounds(void)
+{
+	unsigned	i, mem, cloud, cpufreq, ratio;
+
+	min_utils = (double *)malloc(n_tasks * sizeof(double));
+	min_utils_sum = (double *)malloc((n_tasks + 1) * sizeof(double));
+	min_powers_sum = (double *)malloc((n_tasks + 1) * sizeof(double));
+	max_violations_sum = (unsigned *)malloc((n_tasks + 1) * sizeof(unsigned));
+	if (min_utils == NULL || min_utils_sum == NULL || min_powers_sum == NULL || max_violations_sum == NULL)
+		FATAL(2, "cannot allocate task bounds");
+
+	min_utils_sum[0] = min_powers_sum[0] = 0;
+	max_violations_sum[0] = 0;
 	for (i = 0; i < n_tasks; i++) {
-		double	task_util, task_power_cpu, task_power_mem, task_power_net_com, task_deadline;
-		
-		get_task_utilpower_TEE(i, gene->taskattrs_mem.attrs[i], gene->taskattrs_cloud.attrs[i], gene->taskattrs_cpufreq.attrs[i], gene->taskattrs_offloadingratio.attrs[i],
-				   &task_util, &task_power_cpu, &task_power_mem, &task_power_net_com, &task_deadline); 
-		util_new += task_util;
-		power_new_sum_cpu += task_power_cpu;
-		power_new_sum_mem += task_power_mem;
-		power_new_sum_net_com += task_power_net_com;
-		if(task_deadline > 1.0) 
-			violate_period ++;
-		if((unsigned)gene->taskattrs_offloadingratio.attrs[i] != 0)
-			num_offloading++;
+		unsigned	n_ratios = tasks.offloading_bool[i] ? n_offloadingratios : 1;
+		double	min_power = -1;
+		unsigned	max_violations = 0;
+
+		min_utils[i] = get_task_util(i, 0, 0, 0, 0);
+		for (mem = 0; mem < n_mems; mem++)
+			for (cloud = 0; cloud < n_clouds; cloud++)
+				for (cpufreq = 0; cpufreq < n_cpufreqs; cpufreq++)
+					for (ratio = 0; ratio < n_ratios; ratio++) {
+						const taskcost_t	*cost = get_taskcost(i, mem, cloud, cpufreq, ratio, TEE);
+						double	power = cost->power_cpu + cost->power_mem + cost->power_net_com;
+
+						if (cost->util < min_utils[i])
+							min_utils[i] = cost->util;
+						if (min_power < 0 || power < min_power)
+							min_power = power;
+						if (cost->n_violations > max_violations)
+							max_violations = cost->n_violations;
+					}
+		min_utils_sum[i + 1] = min_utils_sum[i] + min_utils[i];
+		min_powers_sum[i + 1] = min_powers_sum[i] + min_power;
+		max_violations_sum[i + 1] = max_violations_sum[i] + max_violations;
 	}
-	
-	power_new = power_new_sum_cpu + power_new_sum_mem + power_new_sum_net_com; //ADDMEM
-	gene->cpu_power = power_new_sum_cpu;
-	gene->mem_power = power_new_sum_mem;
-	gene->power_netcom = power_new_sum_net_com;
-	// power_new = power_new_sum_cpu + power_new_sum_net_com; 
-	gene->period_violation = violate_period;
-	if (util_new < 1.0 && violate_period == 0) { 
-		power_new_idle = cpufreqs[n_cpufreqs - 1].power_idle * (1 - util_new); 
-		power_new += power_new_idle;
-		gene->cpu_power += power_new_idle;
+}
+
+/* memory type with free capacity for a task, tried from a random type, or n_mems if none */
+static unsigned
+select_mem_type(island_t *island, unsigned no_task, unsigned char ratio, const double *mem_free)
+{
+	double	memreq = tasks.memreq[no_task] * (1.0 - offloadingratios[ratio]);
+	unsigned	start = rng_rand(&island->rng, n_mems);
+	unsigned	i;
+
+	for (i = 0; i < n_mems; i++) {
+		unsigned	mem_type = (start + i) % n_mems;
+
+		if (memreq <= mem_free[mem_type])
+			return mem_type;
 	}
-	gene->util = util_new;
-	if (util_new <= cutoff) {
-		gene->power = power_new;
-		gene->score = power_new;
-		if (util_new >= 1.0 || violate_period > 0) 
-			gene->score += power_new * (util_new - 1.0) * penalty;
-		return TRUE;
+	return n_mems;
+}
+
+/*
+ * Build a gene task by task in random order. A task starts from a random
+ * offloading ratio and a random cpu frequency. The cpu frequency is raised,
+ * and then the offloading ratio if the task may be offloaded, until the task
+ * fits into a memory type with free capacity and the utilization leaves room
+ * for the lowest utilizations of the remaining tasks within the budget. If no
+ * choice fits, the one with the lowest utilization is taken and the gene is
+ * repaired by init_gene().
+ */
+static void
+construct_gene(island_t *island, gene_t *gene)
+{
+	double	mem_free[MAX_MEMS];
+	double	budget = cutoff < 1.0 ? cutoff : 1.0;
+	double	util_sum = 0, util_reserved = 0;
+	unsigned	*order;
+	unsigned	i;
+
+	order = (unsigned *)malloc(n_tasks * sizeof(unsigned));
+	if (order == NULL)
+		FATAL(2, "cannot allocate task order");
+	for (i = 0; i < n_tasks; i++) {
+		unsigned	j = rng_rand(&island->rng, i + 1);
+
+		order[i] = order[j];
+		order[j] = i;
+		util_reserved += min_utils[i];
 	}
-	return FALSE;
+	for (i = 0; i < n_mems; i++)
+		mem_free[i] = mems[i].max_capacity;
+
+	for (i = 0; i < n_tasks; i++) {
+		unsigned	no_task = order[i];
+		unsigned char	ratio_first = 0, ratio_last = 0, cpufreq_first, cloud;
+		unsigned char	ratio, cpufreq, ratio_best = 0, cpufreq_best = 0;
+		unsigned	mem_type, mem_type_best = n_mems;
+		double	util_best = 0;
+
+		if (tasks.offloading_bool[no_task]) {
+			ratio_first = rng_rand(&island->rng, n_offloadingratios);
+			ratio_last = n_offloadingratios - 1;
+		}
+		cpufreq_first = rng_rand(&island->rng, n_cpufreqs);
+		cloud = rng_rand(&island->rng, n_clouds);
+		util_reserved -= min_utils[no_task];
+
+		for (ratio = ratio_first; ratio <= ratio_last; ratio++) {
+			mem_type = select_mem_type(island, no_task, ratio, mem_free);
+			if (mem_type == n_mems)
+				continue;
+			for (cpufreq = cpufreq_first + 1; cpufreq-- > 0;) {
+				double	util = get_task_util(no_task, mem_type, cloud, cpufreq, ratio);
+				BOOL	fits = util_sum + util + util_reserved <= budget;
+
+				if (fits || mem_type_best == n_mems || util < util_best) {
+					mem_type_best = mem_type;
+					ratio_best = ratio;
+					cpufreq_best = cpufreq;
+					util_best = util;
+					if (fits)
+						goto found;
+				}
+			}
+		}
+		if (mem_type_best == n_mems) {
+			/* no memory type has enough capacity, which is left for repair */
+			unsigned	j;
+
+			for (mem_type_best = 0, j = 1; j < n_mems; j++)
+				if (mem_free[j] > mem_free[mem_type_best])
+					mem_type_best = j;
+			ratio_best = ratio_last;
+			cpufreq_best = 0;
+			util_best = get_task_util(no_task, mem_type_best, cloud, cpufreq_best, ratio_best);
+		}
+	found:
+		mem_free[mem_type_best] -= tasks.memreq[no_task] * (1.0 - offloadingratios[ratio_best]);
+		util_sum += util_best;
+
+		set_attr(gene, ATTR_MEM, no_task, mem_type_best);
+		set_attr(gene, ATTR_CLOUD, no_task, cloud);
+		set_attr(gene, ATTR_CPUFREQ, no_task, cpufreq_best);
+		set_attr(gene, ATTR_OFFLOADINGRATIO, no_task, ratio_best);
+	}
+
+	free(order);
 }
 
+/* random attributes, with offloading only for tasks which may be offloaded */
 static void
-init_gene(gene_t *gene)
+assign_random_gene(island_t *island, gene_t *gene)
 {
 	int	i;
 
-	assign_taskattrs(&gene->taskattrs_mem, n_mems);
-	assign_taskattrs(&gene->taskattrs_cpufreq, n_cpufreqs);
-	assign_taskattrs(&gene->taskattrs_cloud, n_clouds); 
-	assign_taskattrs(&gene->taskattrs_offloadingratio, n_offloadingratios); 
+	assign_taskattrs(island, gene, ATTR_MEM, n_mems);
+	assign_taskattrs(island, gene, ATTR_CPUFREQ, n_cpufreqs);
+	assign_taskattrs(island, gene, ATTR_CLOUD, n_clouds); 
+	assign_taskattrs(island, gene, ATTR_OFFLOADINGRATIO, n_offloadingratios); 
 
 	for (i = 0; i < n_tasks; i++) {
 		
-        if (tasks[i].offloading_bool == 0 ) {
-            gene->taskattrs_offloadingratio.attrs[i] = 0;  // 강제 local 실행
+        if (tasks.offloading_bool[i] == 0 ) {
+            set_attr(gene, ATTR_OFFLOADINGRATIO, i, 0);  // 강제 local 실행
 		}
 		else
-            gene->taskattrs_offloadingratio.attrs[i] = get_rand(n_offloadingratios);
+            set_attr(gene, ATTR_OFFLOADINGRATIO, i, rng_rand(&island->rng, n_offloadingratios));
     }
+}
+
+static void
+init_gene(island_t *island, gene_t *gene)
+{
+	taskattrs_t	taskattrs_mem;
+	int	i;
+
+	if (init_random)
+		assign_random_gene(island, gene);
+	else
+		construct_gene(island, gene);
+	setup_taskattrs(gene, ATTR_MEM, &taskattrs_mem);
 
 	for (i = 0; i < MAX_TRY; i++) {
-		INIT_LIST_HEAD(&gene->list_util);
-		INIT_LIST_HEAD(&gene->list_power);
-		INIT_LIST_HEAD(&gene->list_score);
+		BOOL	hit;
+		fitstatus_t	status = lookup_gene(island->cache, gene, &hit);
 
-		
-		if (!check_memusage(gene)) {
-			balance_mem_types(gene);
+		if (status == FIT_MEM || (!hit && !check_memusage(gene))) {
+			if (!hit)
+				cache_gene(island->cache, gene, FIT_MEM);
+			balance_mem_types(island, gene, &taskattrs_mem);
+			continue;
+		}
+
+		if (status == FIT_UTIL) {
+			lower_utilization(island, gene);
 			continue;
 		}
 
 		// TEE
 		if(TEE){
 			if (check_utilpower_TEE(gene)) {
-				sort_gene(gene);
+				cache_gene(island->cache, gene, FIT_OK);
+				sum_memusage(gene, 0);
+				sort_gene(island, gene);
 				return;
 			}
 		}
 
 		else{
 			if (check_utilpower(gene)) {
-				sort_gene(gene);
+				cache_gene(island->cache, gene, FIT_OK);
+				sum_memusage(gene, 0);
+				sort_gene(island, gene);
 				return;
 			}
 		}
 		
-		lower_utilization(gene);
+		cache_gene(island->cache, gene, FIT_UTIL);
+		lower_utilization(island, gene);
 	}
 
 	//FATAL(3, "cannot generate initial genes: utilization too high: %lf", gene->util);
 }
 
-static void
-init_populations(void)
+/* allocate the population, offsprings, workers and fitness cache of an island */
+void
+setup_island(island_t *island, unsigned no)
+{
+	int	i;
+
+	island->no = no;
+	island->gen = 1;
+
+	if (n_offsprings > 1) {
+		gene_t	*children = alloc_genes(n_offsprings);
+
+		island->offsprings = (offspring_t *)calloc(n_offsprings, sizeof(offspring_t));
+		if (island->offsprings == NULL)
+			FATAL(2, "cannot allocate offsprings");
+		for (i = 0; i < n_offsprings; i++)
+			island->offsprings[i].child = get_gene(children, i);
+		island->workers = create_workers(n_workers);
+	}
+
+	if (cache_size > 0)
+		island->cache = create_cache(cache_size, n_offsprings > 1 && n_workers > 1);
+
+	island->genes = alloc_genes(n_pops);
+	init_generank(&island->genes_by_util, offsetof(gene_t, util), n_pops);
+	init_generank(&island->genes_by_power, offsetof(gene_t, power), n_pops);
+	init_generank(&island->genes_by_score, offsetof(gene_t, score), n_pops);
+}
+
+/*
+ * Initialize the population of an island. Island no draws from the stream of
+ * seed advanced by no long jumps, and offspring i of a batch from the island
+ * stream advanced by i + 1 jumps.
+ */
+void
+init_island(island_t *island, unsigned no, int seed)
 {
 	gene_t	*gene;
 	double	util_sum = 0;
+	phase_t	phase_left = PROF_ENTER(PHASE_INIT);
 	int	i;
 
-	gene = genes = (gene_t *)calloc(n_pops, sizeof(gene_t));
+	setup_island(island, no);
+	rng_seed(&island->rng, seed);
+	for (i = 0; i < no; i++)
+		rng_long_jump(&island->rng);
+
+	if (n_offsprings > 1) {
+		rng_t	rng = island->rng;
+
+		for (i = 0; i < n_offsprings; i++) {
+			rng_jump(&rng);
+			island->offsprings[i].rng = rng;
+		}
+	}
 
-	for (i = 0; i < n_pops; i++, gene++) {
-		init_gene(gene);
+	for (i = 0; i < n_pops; i++) {
+		gene = get_gene(island->genes, i);
+		init_gene(island, gene);
+		count_gene(island, gene, 1);
 		util_sum += gene->util;
 	}
-	printf("initial utilization: %lf\n", util_sum / n_pops);
+	island->util_init = util_sum / n_pops;
+	island->n_feasible_init = island->genes_by_score.n_genes;
+
+	if (island->genes_by_score.n_genes == 0)
+		FATAL(3, "cannot generate initial genes: no feasible gene within memory and utilization limits");
+	PROF_LEAVE(phase_left);
 }
 
-static void
-inherit_values(taskattrs_t *taskattrs_newborn, taskattrs_t *taskattrs1, taskattrs_t *taskattrs2, unsigned crosspt)
+/*
+ * Bound the utilization and score of a newborn before its evaluation. The
+ * tasks taken from the parents contribute their costs and the tasks in between
+ * at least their lowest utilization and power. A newborn certainly over the
+ * cutoff or, without period violations, with a power above the score of a
+ * parent is rejected. FIT_OK is returned if the newborn is to be evaluated.
+ */
+static fitstatus_t
+prescreen_child(gene_t *gene1, gene_t *gene2, unsigned crosspt_lo, unsigned crosspt_hi, BOOL *worse)
 {
-	memcpy(taskattrs_newborn->attrs, taskattrs1->attrs, crosspt);
-	memcpy(taskattrs_newborn->attrs + crosspt, taskattrs2->attrs + crosspt, n_tasks - crosspt);
-	setup_taskattrs(taskattrs_newborn);
+	const taskcost_t	*sum1 = GENE_COSTS_SUM(gene1) + crosspt_lo;
+	const taskcost_t	*sum2_hi = GENE_COSTS_SUM(gene2) + crosspt_hi, *sum2_end = GENE_COSTS_SUM(gene2) + n_tasks;
+	double	util_lb, power_lb, score_parents;
+
+	*worse = FALSE;
+	util_lb = sum1->util + (sum2_end->util - sum2_hi->util) + (min_utils_sum[crosspt_hi] - min_utils_sum[crosspt_lo]);
+	if (util_lb > cutoff + BOUND_EPS * (1.0 + fabs(util_lb)))
+		return FIT_UTIL;
+
+	/* score is at least the power unless violations or negative penalty and idle power may lower it */
+	if (penalty < 0 || cpufreqs[n_cpufreqs - 1].power_idle < 0)
+		return FIT_OK;
+	if (sum1->n_violations + (sum2_end->n_violations - sum2_hi->n_violations) +
+	    (max_violations_sum[crosspt_hi] - max_violations_sum[crosspt_lo]) > 0)
+		return FIT_OK;
+	power_lb = sum1->power_cpu + sum1->power_mem + sum1->power_net_com +
+		(sum2_end->power_cpu - sum2_hi->power_cpu) + (sum2_end->power_mem - sum2_hi->power_mem) +
+		(sum2_end->power_net_com - sum2_hi->power_net_com) +
+		(min_powers_sum[crosspt_hi] - min_powers_sum[crosspt_lo]);
+	score_parents = gene1->score < gene2->score ? gene1->score : gene2->score;
+	if (power_lb > score_parents + BOUND_EPS * (1.0 + fabs(power_lb))) {
+		*worse = TRUE;
+		return FIT_UTIL;
+	}
+	return FIT_OK;
 }
 
+/*
+ * A newborn found in the fitness cache is rejected without evaluation if it was
+ * infeasible or worse than a parent. Otherwise its memory usage is checked from
+ * the running sums of its parents and, with prescreen, it may be rejected by
+ * prescreen_child(). It is evaluated as usual at last, since its per-task costs
+ * are needed by later crossovers. Attempts and rejections are counted in stats.
+ */
 static BOOL
-do_crossover(gene_t *newborn, gene_t *gene1, gene_t *gene2, unsigned crosspt_ratio, unsigned crosspt_cpufreq, unsigned crosspt_mem) // ADDMEM
+do_crossover(cache_t *cache, crossover_stats_t *stats, BOOL prescreen, gene_t *newborn, gene_t *gene1, gene_t *gene2, unsigned crosspt_ratio, unsigned crosspt_cpufreq, unsigned crosspt_mem) // ADDMEM
 {
-	inherit_values(&newborn->taskattrs_mem, &gene1->taskattrs_mem, &gene2->taskattrs_mem, crosspt_mem); //ADDMEM
-	//inherit_values(&newborn->taskattrs_offloadingratio, &gene1->taskattrs_offloadingratio, &gene2->taskattrs_offloadingratio, crosspt_ratio); 
-	inherit_values(&newborn->taskattrs_cpufreq, &gene1->taskattrs_cpufreq, &gene2->taskattrs_cpufreq, crosspt_cpufreq);
-	
-// Offloading ratio는 special case로 처리
-    for (int i = 0; i < n_tasks; i++) {
-        if (tasks[i].offloading_bool == 0) {
-            newborn->taskattrs_offloadingratio.attrs[i] = 0;  // 강제 local
-        } else {
-            if (i < crosspt_ratio) {
-                newborn->taskattrs_offloadingratio.attrs[i] = gene1->taskattrs_offloadingratio.attrs[i];
-            } else {
-                newborn->taskattrs_offloadingratio.attrs[i] = gene2->taskattrs_offloadingratio.attrs[i];
-            }
-        }
-    }
-    //setup_taskattrs(&newborn->taskattrs_offloadingratio);
+	unsigned	crosspt_lo, crosspt_hi, crosspt_mem_lo, crosspt_mem_hi;
+	fitstatus_t	status;
+	BOOL	hit, worse;
 
-	if (!check_memusage(newborn))
+	inherit_attrs(newborn, gene1, gene2, ATTR_MEM, crosspt_mem); //ADDMEM
+	inherit_attrs(newborn, gene1, gene2, ATTR_CLOUD, crosspt_mem);
+	inherit_attrs(newborn, gene1, gene2, ATTR_CPUFREQ, crosspt_cpufreq);
+	/*
+	 * Offloading ratio는 special case: tasks with offloading_bool 0 are forced local (ratio 0)
+	 * in every gene, so both parents already agree on them and the plain crossover keeps them local.
+	 */
+	inherit_attrs(newborn, gene1, gene2, ATTR_OFFLOADINGRATIO, crosspt_ratio);
+
+	/* only tasks between the lowest and highest crossover points differ from both parents */
+	crosspt_mem_lo = crosspt_mem < crosspt_ratio ? crosspt_mem : crosspt_ratio;
+	crosspt_mem_hi = crosspt_mem > crosspt_ratio ? crosspt_mem : crosspt_ratio;
+	crosspt_lo = crosspt_cpufreq < crosspt_mem_lo ? crosspt_cpufreq : crosspt_mem_lo;
+	crosspt_hi = crosspt_cpufreq > crosspt_mem_hi ? crosspt_cpufreq : crosspt_mem_hi;
+
+	/* the crossover phase entered by the caller continues as evaluation */
+	PROF_ENTER(PHASE_EVALUATION);
+	stats->n_tries++;
+	status = lookup_gene(cache, newborn, &hit);
+	if (hit) {
+		if (status == FIT_MEM)
+			stats->n_rejected_mem++;
+		else if (status == FIT_UTIL)
+			stats->n_rejected_cutoff++;
+		else if (newborn->score > gene1->score || newborn->score > gene2->score)
+			stats->n_rejected_worse++;
+		else
+			goto evaluate;
 		return FALSE;
-	// TEE
-	if(TEE){
-		if (!check_utilpower_TEE(newborn))
+	}
+
+	if (!check_memusage_delta(newborn, gene1, gene2, crosspt_mem_lo, crosspt_mem_hi)) {
+		cache_gene(cache, newborn, FIT_MEM);
+		stats->n_rejected_mem++;
+		return FALSE;
+	}
+	if (prescreen && prescreen_child(gene1, gene2, crosspt_lo, crosspt_hi, &worse) != FIT_OK) {
+		if (worse)
+			stats->n_rejected_worse++;
+		else
+			stats->n_rejected_cutoff++;
+		stats->n_prescreened++;
 		return FALSE;
 	}
-	else{
-		if (!check_utilpower(newborn))
+
+evaluate:
+	if (!check_utilpower_delta(newborn, gene1, gene2, crosspt_lo, crosspt_hi)) {
+		if (!hit)
+			cache_gene(cache, newborn, FIT_UTIL);
+		stats->n_rejected_cutoff++;
 		return FALSE;
 	}
+	if (!hit)
+		cache_gene(cache, newborn, FIT_OK);
 	
-	if (newborn->score > gene1->score || newborn->score > gene2->score)
+	if (newborn->score > gene1->score || newborn->score > gene2->score) {
+		stats->n_rejected_worse++;
 		return FALSE;
-	sort_gene(newborn);
+	}
+	inherit_taskcosts(newborn, gene1, gene2, crosspt_lo, crosspt_hi);
+	inherit_memusage(newborn, gene1, crosspt_mem_lo);
 	return TRUE;
 }
 
 #define M	4
 
+/* linear-rank selection among the n_genes best genes */
 static unsigned
-select_position(void)
+select_position(rng_t *rng, unsigned n_genes)
 {
-	unsigned	max = M * (n_pops + 1) / 2;
+	unsigned	max = M * (n_genes + 1) / 2;
 	unsigned	alpha;
 	unsigned	kvalue;
 
-	alpha = get_rand(max);
-	kvalue = (sqrt(1 + 8 * alpha * n_pops / M) - 1) / 2;
-	ASSERT(n_pops > kvalue);
-	return n_pops - kvalue - 1;
+	alpha = rng_rand(rng, max);
+	kvalue = (sqrt(1 + 8ULL * alpha * n_genes / M) - 1) / 2;
+	ASSERT(n_genes > kvalue);
+	return n_genes - kvalue - 1;
 }
 
 static gene_t *
-select_gene(void)
+select_gene(island_t *island, rng_t *rng, unsigned n_genes)
 {
-	struct list_head	*lp;
-	unsigned	position;
-
-	position = select_position();
-	list_for_each (lp, &genes_by_score) {
-		gene_t	*gene = list_entry(lp, gene_t, list_score);
-		if (position == 0)
-			return gene;
-		position--;
-	}
-	return list_entry(genes_by_score.prev, gene_t, list_score);
+	PROF_COUNT(PROF_SELECTIONS, 1);
+	return generank_get(&island->genes_by_score, select_position(rng, n_genes));
 }
 
 static gene_t *
-get_newborn(void)
+get_newborn(island_t *island)
 {
-	gene_t	*gene = list_entry(genes_by_score.prev, gene_t, list_score);
+	gene_t	*gene = generank_get(&island->genes_by_score, n_pops - 1);
+	phase_t	phase_left = PROF_ENTER(PHASE_SORTING);
 
-	list_del_init(&gene->list_util);
-	list_del_init(&gene->list_power);
-	list_del_init(&gene->list_score);
+	generank_del(&island->genes_by_util, gene);
+	generank_del(&island->genes_by_power, gene);
+	generank_del(&island->genes_by_score, gene);
+	PROF_LEAVE(phase_left);
+	count_gene(island, gene, -1);
 
 	return gene;
 }
 
-static void
-crossover(void)
+/*
+ * Breed a child into newborn from parents selected among the n_genes best genes.
+ * Parents and crossover points are drawn from rng.
+ */
+static BOOL
+breed(island_t *island, gene_t *newborn, rng_t *rng, unsigned n_genes, crossover_stats_t *stats)
 {
-	gene_t	*newborn;
+	gene_t	*gene1, *gene2;
+	unsigned	crosspt_ratio, crosspt_cpufreq, crosspt_mem;  // ADDMEM
+	unsigned long long	n_prescreened = 0;
+	phase_t	phase_left;
+	BOOL	born;
 	int	i;
 
-	newborn = get_newborn();
 	for (i = 0; i < MAX_TRY; i++) {
-		gene_t	*gene1, *gene2;
-		unsigned	crosspt_ratio, crosspt_cpufreq, crosspt_mem;  // ADDMEM
-	
-		gene1 = select_gene();
+		if (i > 0)
+			PROF_COUNT(PROF_RETRIES, 1);
+		phase_left = PROF_ENTER(PHASE_SELECTION);
+		gene1 = select_gene(island, rng, n_genes);
 		do {
-			gene2 = select_gene();
+			gene2 = select_gene(island, rng, n_genes);
 		} while (gene1 == gene2);
 
-		crosspt_ratio = get_rand(n_tasks - 1) + 1; 
-		crosspt_cpufreq = get_rand(n_tasks - 1) + 1;
-		crosspt_mem = get_rand(n_tasks - 1) + 1; // ADDMEM
-		if (do_crossover(newborn, gene1, gene2, crosspt_ratio, crosspt_cpufreq, crosspt_mem))  // ADDMEM
-			break;
+		crosspt_ratio = rng_rand(rng, n_tasks - 1) + 1; 
+		crosspt_cpufreq = rng_rand(rng, n_tasks - 1) + 1;
+		crosspt_mem = rng_rand(rng, n_tasks - 1) + 1; // ADDMEM
+		n_prescreened = stats->n_prescreened;
+		PROF_ENTER(PHASE_CROSSOVER);
+		born = do_crossover(island->cache, stats, TRUE, newborn, gene1, gene2, crosspt_ratio, crosspt_cpufreq, crosspt_mem);  // ADDMEM
+		PROF_LEAVE(phase_left);
+		if (born)
+			return TRUE;
+	}
+
+	/* the failed newborn stays in the population, so it gets the fields of its last evaluation */
+	if (stats->n_prescreened > n_prescreened) {
+		crossover_stats_t	stats_last = { 0, };
+
+		do_crossover(island->cache, &stats_last, FALSE, newborn, gene1, gene2, crosspt_ratio, crosspt_cpufreq, crosspt_mem);
+	}
+	// FATAL(3, "cannot execute crossover");
+	return FALSE;
+}
+
+static void
+crossover(island_t *island)
+{
+	gene_t	*newborn;
+
+	newborn = get_newborn(island);
+	if (breed(island, newborn, &island->rng, n_pops, &island->stats))
+		sort_gene(island, newborn);
+	count_gene(island, newborn, 1);
+}
+
+/* job of island workers: breed the idx-th offspring of a batch */
+static void
+breed_offspring(void *arg, unsigned idx)
+{
+	island_t	*island = (island_t *)arg;
+	offspring_t	*offspring = island->offsprings + idx;
+
+	offspring->born = breed(island, offspring->child, &offspring->rng, island->genes_by_score.n_genes, &offspring->stats);
+}
+
+/*
+ * Steady-state crossover producing n_offsprings children per generation.
+ * The worst genes are taken out, children are bred in parallel from the
+ * remaining genes, and accepted children replace the worst genes at once.
+ * Every offspring slot has its own random stream, so results do not depend
+ * on the number of workers.
+ */
+static void
+crossover_batch(island_t *island)
+{
+	int	i;
+
+	for (i = 0; i < n_offsprings; i++) {
+		offspring_t	*offspring = island->offsprings + i;
+
+		offspring->newborn = get_newborn(island);
+	}
+
+	run_workers(island->workers, breed_offspring, island, n_offsprings);
+
+	for (i = 0; i < n_offsprings; i++) {
+		offspring_t	*offspring = island->offsprings + i;
+
+		if (offspring->born)
+			copy_gene(offspring->newborn, offspring->child);
+		sort_gene(island, offspring->newborn);
+		count_gene(island, offspring->newborn, 1);
+		add_crossover_stats(&island->stats, &offspring->stats);
+		memset(&offspring->stats, 0, sizeof(crossover_stats_t));
+	}
+}
+
+/*
+ * Change one attribute of a random task of gene to another value: its memory type,
+ * its cpu frequency, or its offloading ratio if the task may be offloaded.
+ * FALSE is returned if the drawn move is not possible for the task.
+ */
+static BOOL
+draw_move(gene_t *gene, rng_t *rng, unsigned *pno_task, attr_t *pattr, unsigned char *pvalue)
+{
+	static const attr_t	move_attrs[] = { ATTR_CPUFREQ, ATTR_MEM, ATTR_OFFLOADINGRATIO };
+	unsigned	no_task = rng_rand(rng, n_tasks);
+	attr_t	attr = move_attrs[rng_rand(rng, 3)];
+	unsigned	domain = get_attr_domain(attr);
+
+	if (domain < 2 || (attr == ATTR_OFFLOADINGRATIO && tasks.offloading_bool[no_task] == 0))
+		return FALSE;
+
+	*pno_task = no_task;
+	*pattr = attr;
+	*pvalue = (get_attr(gene, attr, no_task) + 1 + rng_rand(rng, domain - 1)) % domain;
+	return TRUE;
+}
+
+/*
+ * Try a move on a gene in place. The cost of the moved task is looked up and the
+ * totals are accumulated as in check_utilpower_delta(), so only the tasks behind
+ * the moved one are summed. An improving move updates the costs and the ranks of
+ * the gene, otherwise the gene is restored.
+ */
+static BOOL
+try_move(island_t *island, gene_t *gene, unsigned no_task, attr_t attr, unsigned char value)
+{
+	unsigned char	value_org = get_attr(gene, attr, no_task);
+	taskcost_t	sum = GENE_COSTS_SUM(gene)[no_task], cost;
+	taskcost_t	*costs = GENE_COSTS(gene);
+	gene_t	moved;
+	phase_t	phase_left;
+	int	i;
+
+	set_attr(gene, attr, no_task, value);
+	if (attr != ATTR_CPUFREQ && !check_memusage(gene)) {
+		set_attr(gene, attr, no_task, value_org);
+		return FALSE;
 	}
 
-	// if (i == MAX_TRY) {
-	// 	FATAL(3, "cannot execute crossover");
-	// }
+	PROF_COUNT(PROF_EVALS, 1);
+	PROF_COUNT(PROF_TASK_EVALS, 1);
+	cost = *get_taskcost(no_task, get_attr(gene, ATTR_MEM, no_task), get_attr(gene, ATTR_CLOUD, no_task),
+			     get_attr(gene, ATTR_CPUFREQ, no_task), get_attr(gene, ATTR_OFFLOADINGRATIO, no_task), TEE);
+	add_taskcost(&sum, &cost);
+	for (i = no_task + 1; i < n_tasks; i++)
+		add_taskcost(&sum, costs + i);
+
+	moved = *gene;
+	if (!apply_utilpower(&moved, &sum) || moved.score >= gene->score) {
+		set_attr(gene, attr, no_task, value_org);
+		return FALSE;
+	}
+
+	phase_left = PROF_ENTER(PHASE_SORTING);
+	generank_del(&island->genes_by_util, gene);
+	generank_del(&island->genes_by_power, gene);
+	generank_del(&island->genes_by_score, gene);
+	PROF_LEAVE(phase_left);
+	count_gene(island, gene, -1);
+	memcpy(gene, &moved, sizeof(gene_t));
+	costs[no_task] = cost;
+	sum_taskcosts(gene, no_task);
+	sum_memusage(gene, no_task);
+	sort_gene(island, gene);
+	count_gene(island, gene, 1);
+	return TRUE;
 }
 
+/*
+ * Rebuild the per-task costs and the running sums of costs and memory usage of a
+ * gene from its attributes. They are summed in task order as by evaluation and
+ * crossover, so they equal those of the gene before it was checkpointed.
+ */
 void
-run_GA(void)
+restore_gene_costs(gene_t *gene)
 {
-	unsigned	gen = 1;
-	init_report();
-	init_populations();
+	taskcost_t	sum = { 0, };
 
-	add_report(gen);
-	while (gen <= max_gen) {
-		crossover();
-		gen++;
+	eval_taskcosts(gene, 0, n_tasks, TEE, GENE_COSTS(gene), &sum);
+	memset(GENE_COSTS_SUM(gene), 0, sizeof(taskcost_t));
+	sum_taskcosts(gene, 0);
+	sum_memusage(gene, 0);
+}
+
+/* every localsearch_interval generations, try localsearch_moves moves on each of the best genes */
+static void
+local_search(island_t *island)
+{
+	unsigned	n_elites = localsearch_elites;
+	int	i, j;
+
+	if (n_elites > island->genes_by_score.n_genes)
+		n_elites = island->genes_by_score.n_genes;
+	{
+		/* improved genes move up in the ranks, so the elites are taken beforehand */
+		gene_t	*elites[n_elites];
+
+		for (i = 0; i < n_elites; i++)
+			elites[i] = generank_get(&island->genes_by_score, i);
+		for (i = 0; i < n_elites; i++) {
+			for (j = 0; j < localsearch_moves; j++) {
+				unsigned	no_task;
+				attr_t	attr;
+				unsigned char	value;
+
+				island->n_moves++;
+				if (draw_move(elites[i], &island->rng, &no_task, &attr, &value) &&
+				    try_move(island, elites[i], no_task, attr, value))
+					island->n_moves_improved++;
+			}
+		}
+	}
+}
+
+/* evaluate all genes of an island with the TEE model, which is done once at the last generation */
+void
+recheck_island(island_t *island)
+{
+	for (int i = 0; i < n_pops; i++) {
+		gene_t	*gene = get_gene(island->genes, i);
+
+		count_gene(island, gene, -1);
+		recheck_utilpower_TEE(gene);
+		count_gene(island, gene, 1);
+		//sort_gene(island, get_gene(island->genes, i));
+	}
+}
+
+/* run generations of an island until its generation reaches gen_stop */
+void
+evolve_island(island_t *island, unsigned gen_stop)
+{
+	while (island->gen < gen_stop) {
+		if (n_offsprings > 1)
+			crossover_batch(island);
+		else
+			crossover(island);
+		if (localsearch_interval > 0 && island->gen % localsearch_interval == 0) {
+			phase_t	phase_left = PROF_ENTER(PHASE_LOCALSEARCH);
+
+			local_search(island);
+			PROF_LEAVE(phase_left);
+		}
+		island->gen++;
 		// 마지막 세대에서만 평가할 거면:
-		if (gen == max_gen) {
-			for (int i = 0; i < n_pops; i++) {
-				check_utilpower_TEE(genes + i);
-        		//sort_gene(genes + i);
-    		}
+		if (island->gen == max_gen)
+			recheck_island(island);
+	}
+}
+
+/* replace the worst gene of an island with a copy of gene */
+void
+immigrate_gene(island_t *island, const gene_t *gene)
+{
+	gene_t	*newborn;
+
+	newborn = get_newborn(island);
+	copy_gene(newborn, gene);
+	sort_gene(island, newborn);
+	count_gene(island, newborn, 1);
+}
+
+/* next generation at which islands should be synchronized for reporting, migration or checkpoints */
+static unsigned
+get_gen_stop(unsigned gen)
+{
+	unsigned	gen_stop, gen_migration, gen_checkpoint, gen_profile;
+
+	if (n_islands == 1)
+		return gen + 1;
+
+	gen_stop = get_next_report_gen(gen);
+	if (migration_interval > 0) {
+		gen_migration = (gen / migration_interval + 1) * migration_interval;
+		if (gen_migration < gen_stop)
+			gen_stop = gen_migration;
+	}
+	if (checkpoint_interval > 0) {
+		gen_checkpoint = (gen / checkpoint_interval + 1) * checkpoint_interval;
+		if (gen_checkpoint < gen_stop)
+			gen_stop = gen_checkpoint;
+	}
+	if (profiling && profile_interval > 0) {
+		gen_profile = (gen / profile_interval + 1) * profile_interval;
+		if (gen_profile < gen_stop)
+			gen_stop = gen_profile;
+	}
+	return gen_stop;
+}
+
+static double
+get_best_score(void)
+{
+	double	score = 0;
+	int	i;
+
+	for (i = 0; i < n_islands; i++) {
+		gene_t	*gene = generank_get(&islands[i].genes_by_score, 0);
+
+		if (i == 0 || gene->score < score)
+			score = gene->score;
+	}
+	return score;
+}
+
+static double
+get_elapsed(void)
+{
+	struct timespec	ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return elapsed_resumed + (ts.tv_sec - ts_start.tv_sec) + (ts.tv_nsec - ts_start.tv_nsec) / 1e9;
+}
+
+/*
+ * Reason why GA should stop at gen, or NULL to go on.
+ * The best score is considered improved only if it decreased by min_improvement
+ * relative to the last improved score, so slow drifts end up in stagnation too.
+ */
+static const char *
+get_stop_reason(unsigned gen)
+{
+	if (stagnation_gens > 0) {
+		double	score = get_best_score();
+
+		if (score < score_best && score_best - score >= fabs(score_best) * min_improvement) {
+			score_best = score;
+			gen_improved = gen;
 		}
+		else if (gen - gen_improved >= stagnation_gens)
+			return "stagnation";
+	}
+	if (time_budget > 0 && get_elapsed() >= time_budget)
+		return "time budget";
+	return NULL;
+}
+
+static void
+checkpoint(unsigned gen)
+{
+	progress_t	progress;
+
+	progress.gen = gen;
+	progress.gen_improved = gen_improved;
+	progress.score_best = score_best;
+	progress.elapsed = get_elapsed();
+	save_checkpoint(&progress);
+}
+
+/* continue the run saved in the checkpoint from its generation, which is returned */
+static unsigned
+resume_GA(void)
+{
+	progress_t	progress;
 
+	load_checkpoint(&progress);
+	if (progress.gen >= max_gen)
+		FATAL(2, "checkpoint at generation %u is not before max_generations: %u", progress.gen, max_gen);
+	gen_improved = progress.gen_improved;
+	score_best = progress.score_best;
+	elapsed_resumed = progress.elapsed;
+	resume_islands();
+
+	return progress.gen;
+}
+
+static void
+report(unsigned gen, BOOL last)
+{
+	phase_t	phase_left = PROF_ENTER(PHASE_REPORTING);
+
+	if (last)
+		add_last_report(gen);
+	else
 		add_report(gen);
+	PROF_LEAVE(phase_left);
+}
+
+void
+run_GA(int seed)
+{
+	unsigned	gen = 1;
+	phase_t	phase_left;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts_start);
+	start_profile();
+	setup_task_bounds();
+	if (resume)
+		gen = resume_GA();
+	else {
+		init_report();
+		start_islands(seed);
+
+		score_best = get_best_score();
+		gen_improved = gen;
+
+		report(gen, FALSE);
+	}
+	while (gen <= max_gen) {
+		const char	*reason;
+
+		gen = get_gen_stop(gen);
+		evolve_islands(gen);
+		if (n_islands > 1 && migration_interval > 0 && gen % migration_interval == 0 && gen <= max_gen) {
+			phase_left = PROF_ENTER(PHASE_MIGRATION);
+			migrate_islands();
+			PROF_LEAVE(phase_left);
+		}
+		if (gen < max_gen && (reason = get_stop_reason(gen)) != NULL) {
+			int	i;
+
+			/* finish as if gen were the last generation */
+			for (i = 0; i < n_islands; i++)
+				recheck_island(islands + i);
+			report(gen, TRUE);
+			printf("early termination at generation %u: %s\n", gen, reason);
+			break;
+		}
+		report(gen, FALSE);
+		if (checkpoint_interval > 0 && gen % checkpoint_interval == 0 && gen < max_gen)
+			checkpoint(gen);
+		if (profiling && profile_interval > 0 && gen % profile_interval == 0 && gen <= max_gen)
+			add_profile_line();
 	}
+	stop_islands();
+	phase_left = PROF_ENTER(PHASE_REPORTING);
 	close_report();
-}
\ No newline at end of file
+	PROF_LEAVE(phase_left);
+	save_profile();
+}
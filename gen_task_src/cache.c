@@ -0,0 +1,200 @@
+/*
+ * cache.c
+ * Bounded cache of gene fitness keyed by the packed attributes of genes.
+ *
+ * Provides:
+ *   - create_cache(): Creates a cache holding up to a given number of genes
+ *   - cache_lookup(): Finds the fitness of a gene with the same attributes
+ *   - cache_insert(): Stores the fitness of a gene, evicting an old one if the cache is full
+ *   - get_cache_stats(): Returns the hit, miss and eviction counters
+ *   - destroy_cache(): Frees a cache
+ *
+ * Entries are chained in hash buckets and evicted with the clock algorithm:
+ * an entry found by cache_lookup() survives the next sweep of the clock hand.
+ * Keys are compared in full, so a hit always returns the exact fitness of the gene.
+ * A cache shared by worker threads is protected by a mutex.
+ */
+
+#include "gastask.h"
+
+#include <pthread.h>
+
+#define NO_ENTRY	((unsigned)-1)
+
+typedef struct {
+	unsigned long long	hash;
+	unsigned	next;		/* next entry in the bucket */
+	BOOL		referenced;
+	fitness_t	fitness;
+	attrword_t	words[];	/* n_attrwords attribute words of the gene */
+} cache_entry_t;
+
+struct cache {
+	unsigned	n_entries, n_used;
+	size_t		entry_size;
+	char		*entries;
+	unsigned	*buckets;
+	unsigned	bucket_mask;
+	unsigned	hand;
+	BOOL		shared;
+	pthread_mutex_t	mutex;
+	cache_stats_t	stats;
+};
+
+#define ENTRY(cache, idx)	((cache_entry_t *)((cache)->entries + (size_t)(idx) * (cache)->entry_size))
+
+cache_t *
+create_cache(unsigned n_entries, BOOL shared)
+{
+	cache_t	*cache;
+	unsigned	n_buckets = 1;
+	int	i;
+
+	cache = (cache_t *)calloc(1, sizeof(cache_t));
+	if (cache == NULL)
+		FATAL(2, "cannot allocate fitness cache");
+
+	while (n_buckets < n_entries)
+		n_buckets *= 2;
+	cache->n_entries = n_entries;
+	cache->entry_size = sizeof(cache_entry_t) + n_attrwords * sizeof(attrword_t);
+	cache->entries = (char *)calloc(n_entries, cache->entry_size);
+	cache->buckets = (unsigned *)malloc(n_buckets * sizeof(unsigned));
+	if (cache->entries == NULL || cache->buckets == NULL)
+		FATAL(2, "cannot allocate fitness cache");
+	for (i = 0; i < n_buckets; i++)
+		cache->buckets[i] = NO_ENTRY;
+	cache->bucket_mask = n_buckets - 1;
+	cache->stats.n_entries = n_entries;
+
+	cache->shared = shared;
+	if (shared)
+		pthread_mutex_init(&cache->mutex, NULL);
+	return cache;
+}
+
+static unsigned long long
+hash_words(const attrword_t *words)
+{
+	unsigned long long	hash = 0x9e3779b97f4a7c15ULL;
+	unsigned	i;
+
+	for (i = 0; i < n_attrwords; i++) {
+		hash = (hash ^ words[i]) * 0xbf58476d1ce4e5b9ULL;
+		hash ^= hash >> 31;
+	}
+	return hash;
+}
+
+static cache_entry_t *
+find_entry(cache_t *cache, const gene_t *gene, unsigned long long hash)
+{
+	unsigned	idx;
+
+	for (idx = cache->buckets[hash & cache->bucket_mask]; idx != NO_ENTRY; idx = ENTRY(cache, idx)->next) {
+		cache_entry_t	*entry = ENTRY(cache, idx);
+
+		if (entry->hash == hash && memcmp(entry->words, gene->words, n_attrwords * sizeof(attrword_t)) == 0)
+			return entry;
+	}
+	return NULL;
+}
+
+BOOL
+cache_lookup(cache_t *cache, const gene_t *gene, fitness_t *fitness)
+{
+	unsigned long long	hash = hash_words(gene->words);
+	cache_entry_t	*entry;
+
+	if (cache->shared)
+		pthread_mutex_lock(&cache->mutex);
+	entry = find_entry(cache, gene, hash);
+	if (entry != NULL) {
+		entry->referenced = TRUE;
+		*fitness = entry->fitness;
+		cache->stats.n_hits++;
+	}
+	else
+		cache->stats.n_misses++;
+	if (cache->shared)
+		pthread_mutex_unlock(&cache->mutex);
+
+	return entry != NULL;
+}
+
+static void
+unlink_entry(cache_t *cache, unsigned idx)
+{
+	cache_entry_t	*entry = ENTRY(cache, idx);
+	unsigned	*pidx = cache->buckets + (entry->hash & cache->bucket_mask);
+
+	while (*pidx != idx)
+		pidx = &ENTRY(cache, *pidx)->next;
+	*pidx = entry->next;
+}
+
+/* free entry or the first unreferenced one under the clock hand */
+static unsigned
+get_victim(cache_t *cache)
+{
+	if (cache->n_used < cache->n_entries)
+		return cache->n_used++;
+
+	while (TRUE) {
+		unsigned	idx = cache->hand;
+		cache_entry_t	*entry = ENTRY(cache, idx);
+
+		cache->hand = (cache->hand + 1) % cache->n_entries;
+		if (entry->referenced) {
+			entry->referenced = FALSE;
+			continue;
+		}
+		unlink_entry(cache, idx);
+		cache->stats.n_evictions++;
+		return idx;
+	}
+}
+
+void
+cache_insert(cache_t *cache, const gene_t *gene, const fitness_t *fitness)
+{
+	unsigned long long	hash = hash_words(gene->words);
+	cache_entry_t	*entry;
+	unsigned	idx, *pbucket;
+
+	if (cache->shared)
+		pthread_mutex_lock(&cache->mutex);
+
+	/* another worker may have inserted the same gene meanwhile */
+	if (find_entry(cache, gene, hash) == NULL) {
+		idx = get_victim(cache);
+		entry = ENTRY(cache, idx);
+		pbucket = cache->buckets + (hash & cache->bucket_mask);
+
+		entry->hash = hash;
+		entry->referenced = FALSE;
+		entry->fitness = *fitness;
+		memcpy(entry->words, gene->words, n_attrwords * sizeof(attrword_t));
+		entry->next = *pbucket;
+		*pbucket = idx;
+	}
+
+	if (cache->shared)
+		pthread_mutex_unlock(&cache->mutex);
+}
+
+void
+get_cache_stats(cache_t *cache, cache_stats_t *stats)
+{
+	*stats = cache->stats;
+}
+
+void
+destroy_cache(cache_t *cache)
+{
+	if (cache->shared)
+		pthread_mutex_destroy(&cache->mutex);
+	free(cache->entries);
+	free(cache->buckets);
+	free(cache);
+}
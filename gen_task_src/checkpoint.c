@@ -0,0 +1,273 @@
+/*
+ * checkpoint.c
+ * Saves the state of a GA run periodically and resumes a run from it.
+ *
+ * Provides:
+ *   - checkpoint_interval: Generations between checkpoints (gastask --checkpoint), 0: none
+ *   - resume: Whether run_GA() continues from the checkpoint (gastask --resume)
+ *   - save_checkpoint(): Writes the state of all islands and the progress of run_GA()
+ *   - load_checkpoint(): Sets up islands from the checkpoint and returns the progress of run_GA()
+ *
+ * A checkpoint holds the progress of run_GA(), the state of report.txt and for
+ * each island its generation, random streams, counters, population statistics,
+ * genes and rank orders.
+ * Genes are saved without their per-task costs, which are rebuilt from their
+ * attributes, so a resumed run continues exactly as the checkpointed one would.
+ * Only the fitness cache starts empty, which changes its counters but no result.
+ *
+ * A checkpoint is written to a temporary file which replaces the previous one,
+ * so an interrupted run always leaves a complete checkpoint. It is named
+ * checkpoint.bin, or checkpoint_<variant>.bin for a variant.
+ */
+
+#include "gastask.h"
+
+#define CHECKPOINT_MAGIC	"GACKPT02"
+
+unsigned	checkpoint_interval;
+BOOL		resume;
+
+typedef struct {
+	char		magic[8];
+	unsigned	n_tasks, n_pops, n_islands, n_offsprings, n_attrwords;
+	unsigned long long	model_hash;
+	progress_t	progress;
+	report_state_t	report;
+} checkpoint_header_t;
+
+typedef struct {
+	unsigned	gen, n_feasible_init;
+	rng_t		rng;
+	double		util_init;
+	unsigned long long	n_moves, n_moves_improved;
+	crossover_stats_t	stats;
+	popstats_t	popstats;
+} island_state_t;
+
+/* header fields and attributes of a gene, without its costs */
+#define GENE_SAVED_SIZE	(sizeof(gene_t) + n_attrwords * sizeof(attrword_t))
+
+/*
+ * Hash of everything the evaluation of genes depends on: task costs under all
+ * attribute values, memory requirements and capacities, and the GA parameters
+ * of scores. A checkpoint is only resumed with the same hash.
+ */
+static unsigned long long
+get_model_hash(void)
+{
+	unsigned long long	hash = HASH_INIT;
+	unsigned	i, mem, cloud, cpufreq, ratio;
+
+	hash = HASH_VALUE(hash, TEE);
+	hash = HASH_VALUE(hash, cutoff);
+	hash = HASH_VALUE(hash, penalty);
+	hash = HASH_VALUE(hash, cpufreqs[n_cpufreqs - 1].power_idle);
+	for (mem = 0; mem < n_mems; mem++)
+		hash = HASH_VALUE(hash, mems[mem].max_capacity);
+	for (i = 0; i < n_offloadingratios; i++)
+		hash = HASH_VALUE(hash, offloadingratios[i]);
+
+	for (i = 0; i < n_tasks; i++) {
+		hash = HASH_VALUE(hash, tasks.memreq[i]);
+		hash = HASH_VALUE(hash, tasks.offloading_bool[i]);
+		for (mem = 0; mem < n_mems; mem++)
+			for (cloud = 0; cloud < n_clouds; cloud++)
+				for (cpufreq = 0; cpufreq < n_cpufreqs; cpufreq++)
+					for (ratio = 0; ratio < n_offloadingratios; ratio++) {
+						const taskcost_t	*cost = get_taskcost(i, mem, cloud, cpufreq, ratio, TEE);
+
+						/* fields are hashed one by one, since padding is undefined */
+						hash = HASH_VALUE(hash, cost->util);
+						hash = HASH_VALUE(hash, cost->power_cpu);
+						hash = HASH_VALUE(hash, cost->power_mem);
+						hash = HASH_VALUE(hash, cost->power_net_com);
+						hash = HASH_VALUE(hash, cost->n_violations);
+					}
+	}
+	return hash;
+}
+
+static void
+get_header(checkpoint_header_t *header)
+{
+	memset(header, 0, sizeof(checkpoint_header_t));
+	memcpy(header->magic, CHECKPOINT_MAGIC, sizeof(header->magic));
+	header->n_tasks = n_tasks;
+	header->n_pops = n_pops;
+	header->n_islands = n_islands;
+	header->n_offsprings = n_offsprings;
+	header->n_attrwords = n_attrwords;
+	header->model_hash = get_model_hash();
+}
+
+static BOOL
+write_rank(FILE *fp, island_t *island, generank_t *rank)
+{
+	unsigned	indices[n_pops];
+	int	i;
+
+	for (i = 0; i < rank->n_genes; i++)
+		indices[i] = ((char *)rank->genes[i] - (char *)island->genes) / gene_size;
+	return fwrite(&rank->n_genes, sizeof(unsigned), 1, fp) == 1 &&
+		fwrite(indices, sizeof(unsigned), rank->n_genes, fp) == rank->n_genes;
+}
+
+static BOOL
+write_island(FILE *fp, island_t *island)
+{
+	island_state_t	state;
+	int	i;
+
+	memset(&state, 0, sizeof(state));
+	state.gen = island->gen;
+	state.n_feasible_init = island->n_feasible_init;
+	state.rng = island->rng;
+	state.util_init = island->util_init;
+	state.n_moves = island->n_moves;
+	state.n_moves_improved = island->n_moves_improved;
+	state.stats = island->stats;
+	state.popstats = island->popstats;
+	if (fwrite(&state, sizeof(state), 1, fp) != 1)
+		return FALSE;
+
+	if (n_offsprings > 1) {
+		for (i = 0; i < n_offsprings; i++) {
+			if (fwrite(&island->offsprings[i].rng, sizeof(rng_t), 1, fp) != 1)
+				return FALSE;
+		}
+	}
+	for (i = 0; i < n_pops; i++) {
+		if (fwrite(get_gene(island->genes, i), GENE_SAVED_SIZE, 1, fp) != 1)
+			return FALSE;
+	}
+	return write_rank(fp, island, &island->genes_by_util) &&
+		write_rank(fp, island, &island->genes_by_power) &&
+		write_rank(fp, island, &island->genes_by_score);
+}
+
+/* a failed checkpoint is reported, but GA goes on and the previous checkpoint is kept */
+void
+save_checkpoint(const progress_t *progress)
+{
+	checkpoint_header_t	header;
+	char	path[1024], path_tmp[1040];
+	BOOL	written;
+	FILE	*fp;
+	int	i;
+
+	get_result_path("checkpoint", "bin", path, sizeof(path));
+	snprintf(path_tmp, sizeof(path_tmp), "%s.tmp", path);
+	fp = fopen(path_tmp, "wb");
+	if (fp == NULL) {
+		errmsg("cannot write checkpoint: %s", path_tmp);
+		return;
+	}
+
+	get_header(&header);
+	header.progress = *progress;
+	get_report_state(&header.report);
+	written = fwrite(&header, sizeof(header), 1, fp) == 1;
+	for (i = 0; i < n_islands && written; i++)
+		written = write_island(fp, islands + i);
+	if (written)
+		written = fflush(fp) == 0 && fsync(fileno(fp)) == 0;
+	if (fclose(fp) != 0)
+		written = FALSE;
+
+	if (!written || rename(path_tmp, path) < 0) {
+		errmsg("cannot write checkpoint: %s", path);
+		remove(path_tmp);
+	}
+}
+
+static void
+read_checkpoint(FILE *fp, void *buf, size_t size, size_t n)
+{
+	if (fread(buf, size, n, fp) != n)
+		FATAL(2, "cannot load checkpoint: truncated file");
+}
+
+static void
+read_rank(FILE *fp, island_t *island, generank_t *rank)
+{
+	unsigned	indices[n_pops];
+	unsigned	n_genes;
+	int	i;
+
+	read_checkpoint(fp, &n_genes, sizeof(unsigned), 1);
+	if (n_genes > n_pops)
+		FATAL(2, "cannot load checkpoint: invalid rank");
+	read_checkpoint(fp, indices, sizeof(unsigned), n_genes);
+	for (i = 0; i < n_genes; i++) {
+		if (indices[i] >= n_pops)
+			FATAL(2, "cannot load checkpoint: invalid rank");
+		rank->genes[i] = get_gene(island->genes, indices[i]);
+	}
+	rank->n_genes = n_genes;
+}
+
+static void
+read_island(FILE *fp, island_t *island, unsigned no)
+{
+	island_state_t	state;
+	int	i;
+
+	setup_island(island, no);
+
+	read_checkpoint(fp, &state, sizeof(state), 1);
+	island->gen = state.gen;
+	island->n_feasible_init = state.n_feasible_init;
+	island->rng = state.rng;
+	island->util_init = state.util_init;
+	island->n_moves = state.n_moves;
+	island->n_moves_improved = state.n_moves_improved;
+	island->stats = state.stats;
+	island->popstats = state.popstats;
+
+	if (n_offsprings > 1) {
+		for (i = 0; i < n_offsprings; i++)
+			read_checkpoint(fp, &island->offsprings[i].rng, sizeof(rng_t), 1);
+	}
+	for (i = 0; i < n_pops; i++) {
+		gene_t	*gene = get_gene(island->genes, i);
+
+		read_checkpoint(fp, gene, GENE_SAVED_SIZE, 1);
+		restore_gene_costs(gene);
+	}
+	read_rank(fp, island, &island->genes_by_util);
+	read_rank(fp, island, &island->genes_by_power);
+	read_rank(fp, island, &island->genes_by_score);
+}
+
+void
+load_checkpoint(progress_t *progress)
+{
+	checkpoint_header_t	header, header_conf;
+	char	path[1024];
+	FILE	*fp;
+	int	i;
+
+	get_result_path("checkpoint", "bin", path, sizeof(path));
+	fp = fopen(path, "rb");
+	if (fp == NULL)
+		FATAL(2, "checkpoint not found: %s", path);
+
+	read_checkpoint(fp, &header, sizeof(header), 1);
+	if (memcmp(header.magic, CHECKPOINT_MAGIC, sizeof(header.magic)) != 0)
+		FATAL(2, "invalid checkpoint: %s", path);
+	get_header(&header_conf);
+	if (header.n_tasks != header_conf.n_tasks || header.n_pops != header_conf.n_pops ||
+	    header.n_islands != header_conf.n_islands || header.n_offsprings != header_conf.n_offsprings ||
+	    header.n_attrwords != header_conf.n_attrwords || header.model_hash != header_conf.model_hash)
+		FATAL(2, "checkpoint does not match the configuration: %s", path);
+
+	islands = (island_t *)calloc(n_islands, sizeof(island_t));
+	if (islands == NULL)
+		FATAL(2, "cannot allocate islands");
+	for (i = 0; i < n_islands; i++)
+		read_island(fp, islands + i, i);
+	fclose(fp);
+
+	resume_report(&header.report);
+	*progress = header.progress;
+}
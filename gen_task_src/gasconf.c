@@ -0,0 +1,90 @@
+/*
+ * gasconf.c
+ * Converts a gastask configuration between the text and compiled formats.
+ *
+ * Provides:
+ *   - A text configuration is compiled, and a compiled one is written back as text
+ *   - -c, -t: Writes the compiled or the text format regardless of the input
+ *
+ * gastask loads either format. A compiled configuration has no generation-only
+ * sections, so gasgen keeps using the text one.
+ */
+
+#include "gastask.h"
+
+BOOL	verbose;
+unsigned	TEE;
+
+typedef enum {
+	OUTPUT_OTHER,
+	OUTPUT_COMPILED,
+	OUTPUT_TEXT
+} output_t;
+
+static void
+usage(void)
+{
+	fprintf(stdout,
+"Usage: gasconf <options> <input config> <output config>\n"
+" <options>\n"
+"      -h: this message\n"
+"      -c: write a compiled configuration\n"
+"      -t: write a text configuration\n"
+" Without -c or -t, the output is in the format other than the input's.\n"
+	);
+}
+
+void
+errmsg(const char *fmt, ...)
+{
+	va_list	ap;
+	char	*errmsg;
+
+	va_start(ap, fmt);
+	vasprintf(&errmsg, fmt, ap);
+	va_end(ap);
+
+	fprintf(stderr, "ERROR: %s\n", errmsg);
+
+	free(errmsg);
+}
+
+int
+main(int argc, char *argv[])
+{
+	output_t	output = OUTPUT_OTHER;
+	int	c;
+
+	while ((c = getopt(argc, argv, "cth")) != -1) {
+		switch (c) {
+		case 'c':
+			output = OUTPUT_COMPILED;
+			break;
+		case 't':
+			output = OUTPUT_TEXT;
+			break;
+		case 'h':
+			usage();
+			exit(0);
+		default:
+			errmsg("invalid option");
+			usage();
+			exit(1);
+		}
+	}
+
+	if (argc - optind < 2) {
+		usage();
+		exit(1);
+	}
+
+	load_conf(argv[optind]);
+	if (output == OUTPUT_OTHER)
+		output = conf_compiled ? OUTPUT_TEXT: OUTPUT_COMPILED;
+
+	if (output == OUTPUT_COMPILED)
+		save_compiled_conf(argv[optind + 1]);
+	else
+		save_text_conf(argv[optind + 1]);
+	return 0;
+}
@@ -6,13 +6,16 @@
  *   - Command-line interface for generating tasks, networks, and net commanders based on a configuration file
  *   - Argument parsing and usage/help display
  *   - Error message handling
- *   - Main function that loads configuration and triggers resource generation routines
+ *   - Main function that loads configuration, seeds the random generator and triggers resource generation routines
  */
 
 #include "gasgen.h"
 
 BOOL	verbose;
 
+static unsigned	seed;
+static BOOL	seed_given;
+
 static void
 usage(void)
 {
@@ -21,6 +24,7 @@ usage(void)
 " <options>\n"
 "      -h: this message\n"
 "      -v: verbose mode\n"
+"      -s <seed>: (default: derived from pid and time)\n"
 	);
 }
 
@@ -45,6 +49,13 @@ parse_args(int argc, char *argv[])
 
 	while ((c = getopt(argc, argv, "s:h")) != -1) {
 		switch (c) {
+		case 's':
+			if (sscanf(optarg, "%u", &seed) != 1) {
+				usage();
+				exit(1);
+			}
+			seed_given = TRUE;
+			break;
 		case 'h':
 			usage();
 			exit(0);
@@ -67,7 +78,9 @@ int
 main(int argc, char *argv[])
 {
 	parse_args(argc, argv);
-	srand(getpid() + time(NULL));
+	if (!seed_given)
+		seed = getpid() + time(NULL);
+	init_rand(seed);
 
 	gen_task();
 	gen_network(); 
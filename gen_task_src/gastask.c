@@ -7,13 +7,19 @@
  *   - Argument parsing and usage/help display
  *   - Error message handling
  *   - Main function that loads configuration, initializes random seed, and runs the genetic algorithm
+ *     or, with --variants, all given algorithm variants (see variant.c)
+ *   - Checkpoints of the GA run with --checkpoint and resumption with --resume (see checkpoint.c)
+ *   - Profiling of the GA run with -p and --profile-interval (see profile.c)
  */
 
 #include "gastask.h"
 
+#include <getopt.h>
+
 BOOL	verbose;
 
 static int	seed = 0;
+static BOOL	variants_given;
 
 // TEE
 unsigned TEE;
@@ -27,6 +33,16 @@ usage(void)
 "      -h: this message\n"
 "      -v: verbose mode\n"
 "      -s <seed>: (default: 0)\n"
+"      -j <threads>: number of GA islands run in parallel (default: 1)\n"
+"      -w <threads>: number of workers per island breeding offsprings (default: 1)\n"
+"      -t <seconds>: stop GA after the given wall-clock time (default: unlimited)\n"
+"      -p: profile GA phases and counters into profile.json\n"
+"      --variants <variant>,...: run variants in parallel on the same configuration\n"
+"          <variant>: [<name>=]<technique>+... or [<name>=]none, where <technique> is tee, off or dvs\n"
+"          (e.g. tee+off+dvs,off+dvs,off,dvs,none)\n"
+"      --checkpoint <generations>: save the GA state to checkpoint.bin every given generations\n"
+"      --resume: continue the run saved in checkpoint.bin, as if it had not been interrupted\n"
+"      --profile-interval <generations>: with -p, also append the profile to profile.jsonl every given generations\n"
 	);
 }
 
@@ -48,9 +64,16 @@ errmsg(const char *fmt, ...)
 static void
 parse_args(int argc, char *argv[])
 {
+	static const struct option	long_options[] = {
+		{ "variants", required_argument, NULL, 'V' },
+		{ "checkpoint", required_argument, NULL, 'C' },
+		{ "resume", no_argument, NULL, 'R' },
+		{ "profile-interval", required_argument, NULL, 'P' },
+		{ NULL, 0, NULL, 0 }
+	};
 	int	c;
 
-	while ((c = getopt(argc, argv, "s:h")) != -1) {
+	while ((c = getopt_long(argc, argv, "s:j:w:t:ph", long_options, NULL)) != -1) {
 		switch (c) {
 		case 's':
 			if (sscanf(optarg, "%d", &seed) != 1) {
@@ -58,6 +81,49 @@ parse_args(int argc, char *argv[])
 				exit(1);
 			}
 			break;
+		case 'j':
+			if (sscanf(optarg, "%u", &n_islands) != 1 || n_islands == 0) {
+				usage();
+				exit(1);
+			}
+			break;
+		case 'w':
+			if (sscanf(optarg, "%u", &n_workers) != 1 || n_workers == 0) {
+				usage();
+				exit(1);
+			}
+			break;
+		case 't':
+			if (sscanf(optarg, "%lf", &time_budget) != 1 || time_budget <= 0) {
+				usage();
+				exit(1);
+			}
+			break;
+		case 'V':
+			if (!parse_variants(optarg)) {
+				usage();
+				exit(1);
+			}
+			variants_given = TRUE;
+			break;
+		case 'C':
+			if (sscanf(optarg, "%u", &checkpoint_interval) != 1 || checkpoint_interval == 0) {
+				usage();
+				exit(1);
+			}
+			break;
+		case 'R':
+			resume = TRUE;
+			break;
+		case 'p':
+			profiling = TRUE;
+			break;
+		case 'P':
+			if (sscanf(optarg, "%u", &profile_interval) != 1 || profile_interval == 0) {
+				usage();
+				exit(1);
+			}
+			break;
 		case 'h':
 			usage();
 			exit(0);
@@ -82,8 +148,13 @@ main(int argc, char *argv[])
 	
 	parse_args(argc, argv);
 
-	srand(seed);
-	run_GA();
+	init_rand(seed);
+	compile_taskcosts();
+	if (variants_given)
+		return run_variants(seed);
+
+	init_gene_layout();
+	run_GA(seed);
 	
 	return 0;
 }
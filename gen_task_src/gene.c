@@ -0,0 +1,160 @@
+/*
+ * gene.c
+ * Compact storage of genes sized to the loaded task set.
+ *
+ * Provides:
+ *   - get_attr_domain(): Returns the number of values of an attribute type
+ *   - init_gene_layout(): Computes the packing of attributes and the size of a gene from n_tasks
+ *   - alloc_genes(): Allocates a contiguous arena of genes
+ *   - get_gene(): Returns the gene at an index of an arena
+ *   - copy_gene(): Copies a gene including its attributes, per-task costs and memory usage
+ *   - get_attr(), set_attr(): Read or write the attribute value of a task
+ *   - unpack_attrs(): Reads the attribute values of a range of tasks
+ *   - inherit_attrs(): Single-point crossover of an attribute, done word by word
+ *
+ * A gene is a gene_t header followed by the packed words of its attributes,
+ * its per-task costs and their running sums, and the running sums of its memory usage. Each attribute type is packed
+ * with the fewest bits covering its domain, so two 1-bit attributes and two
+ * 2-bit attributes of 64 tasks fit in 6 words.
+ */
+
+#include "gastask.h"
+
+attrpack_t	attrpacks[N_ATTRS];
+unsigned	n_attrwords;
+size_t		gene_size;
+
+/* number of values of an attribute type */
+unsigned
+get_attr_domain(attr_t attr)
+{
+	switch (attr) {
+	case ATTR_MEM:
+		return n_mems;
+	case ATTR_CLOUD:
+		return n_clouds;
+	case ATTR_CPUFREQ:
+		return n_cpufreqs;
+	default:
+		return n_offloadingratios;
+	}
+}
+
+void
+init_gene_layout(void)
+{
+	int	i;
+
+	n_attrwords = 0;
+	for (i = 0; i < N_ATTRS; i++) {
+		attrpack_t	*pack = attrpacks + i;
+		unsigned	domain = get_attr_domain(i);
+
+		pack->bits = 1;
+		while ((1U << pack->bits) < domain)
+			pack->bits++;
+		pack->per_word = ATTRWORD_BITS / pack->bits;
+		pack->mask = (1ULL << pack->bits) - 1;
+		pack->word_off = n_attrwords;
+		pack->n_words = (n_tasks + pack->per_word - 1) / pack->per_word;
+		n_attrwords += pack->n_words;
+	}
+
+	gene_size = sizeof(gene_t) + n_attrwords * sizeof(attrword_t) + (2 * n_tasks + 1) * sizeof(taskcost_t) +
+		(n_tasks + 1) * n_mems * sizeof(double);
+}
+
+gene_t *
+alloc_genes(unsigned n_genes)
+{
+	gene_t	*genes;
+
+	genes = (gene_t *)calloc(n_genes, gene_size);
+	if (genes == NULL)
+		FATAL(2, "cannot allocate genes");
+	return genes;
+}
+
+gene_t *
+get_gene(gene_t *genes, unsigned idx)
+{
+	return (gene_t *)((char *)genes + idx * gene_size);
+}
+
+void
+copy_gene(gene_t *dst, const gene_t *src)
+{
+	memcpy(dst, src, gene_size);
+}
+
+unsigned char
+get_attr(const gene_t *gene, attr_t attr, unsigned no_task)
+{
+	const attrpack_t	*pack = attrpacks + attr;
+	attrword_t	word = gene->words[pack->word_off + no_task / pack->per_word];
+
+	return (word >> (no_task % pack->per_word * pack->bits)) & pack->mask;
+}
+
+void
+set_attr(gene_t *gene, attr_t attr, unsigned no_task, unsigned char value)
+{
+	const attrpack_t	*pack = attrpacks + attr;
+	attrword_t	*pword = gene->words + pack->word_off + no_task / pack->per_word;
+	unsigned	shift = no_task % pack->per_word * pack->bits;
+
+	*pword = (*pword & ~(pack->mask << shift)) | ((attrword_t)value << shift);
+}
+
+/* values[0 .. end - start - 1] are set to the attribute values of tasks from start to end - 1 */
+void
+unpack_attrs(const gene_t *gene, attr_t attr, unsigned start, unsigned end, unsigned char *values)
+{
+	const attrpack_t	*pack = attrpacks + attr;
+	/* local copies, since stores into values may alias the packing */
+	const unsigned	bits = pack->bits, per_word = pack->per_word;
+	const attrword_t	mask = pack->mask;
+	const attrword_t	*pword;
+	unsigned	n, i;
+
+	if (start >= end)
+		return;
+
+	pword = gene->words + pack->word_off + start / per_word;
+	i = start % per_word;
+	while (start < end) {
+		attrword_t	word = *pword++ >> (i * bits);
+
+		n = per_word - i;
+		if (n > end - start)
+			n = end - start;
+		for (i = 0; i < n; i++) {
+			values[i] = word & mask;
+			word >>= bits;
+		}
+		values += n;
+		start += n;
+		i = 0;
+	}
+}
+
+/* tasks before crosspt take the attribute values of gene1 and the others those of gene2 */
+void
+inherit_attrs(gene_t *newborn, const gene_t *gene1, const gene_t *gene2, attr_t attr, unsigned crosspt)
+{
+	const attrpack_t	*pack = attrpacks + attr;
+	attrword_t	*words = newborn->words + pack->word_off;
+	const attrword_t	*words1 = gene1->words + pack->word_off;
+	const attrword_t	*words2 = gene2->words + pack->word_off;
+	unsigned	idx = crosspt / pack->per_word;
+	unsigned	shift = crosspt % pack->per_word * pack->bits;
+
+	memcpy(words, words1, idx * sizeof(attrword_t));
+	if (shift > 0) {
+		attrword_t	mask = (1ULL << shift) - 1;
+
+		words[idx] = (words1[idx] & mask) | (words2[idx] & ~mask);
+		idx++;
+	}
+	memcpy(words + idx, words2 + idx, (pack->n_words - idx) * sizeof(attrword_t));
+}
@@ -0,0 +1,130 @@
+/*
+ * generank.c
+ * Rank index of genes ordered by one of their fitness values (util, power or score).
+ *
+ * Provides:
+ *   - init_generank(): Prepares an empty index ordered by the given gene field
+ *   - generank_add(): Inserts a gene behind all genes with an equal or smaller value
+ *   - generank_del(): Removes a gene from the index
+ *   - generank_get(): Returns the gene at a given rank
+ *
+ * Genes are kept in a sorted array, so insertion is a binary search plus a
+ * memmove of pointers and the rank lookup used by selection is O(1).
+ * With profiling, bisection steps, entries scanned by find_gene() and entries
+ * shifted by memmove are counted as rank steps.
+ */
+
+#include "gastask.h"
+
+#define GENE_KEY(rank, gene)	(*(double *)((char *)(gene) + (rank)->key_offset))
+
+void
+init_generank(generank_t *rank, size_t key_offset, unsigned max_genes)
+{
+	rank->genes = (gene_t **)calloc(max_genes, sizeof(gene_t *));
+	if (rank->genes == NULL)
+		FATAL(2, "cannot allocate gene rank index");
+	rank->n_genes = 0;
+	rank->max_genes = max_genes;
+	rank->key_offset = key_offset;
+}
+
+/* first rank whose gene has a value greater than key */
+static unsigned
+upper_bound(generank_t *rank, double key)
+{
+	unsigned	lo = 0, hi = rank->n_genes, n_steps = 0;
+
+	while (lo < hi) {
+		unsigned	mid = (lo + hi) / 2;
+
+		if (key < GENE_KEY(rank, rank->genes[mid]))
+			hi = mid;
+		else
+			lo = mid + 1;
+		n_steps++;
+	}
+	PROF_COUNT(PROF_RANK_STEPS, n_steps);
+	return lo;
+}
+
+/* first rank whose gene has a value greater than or equal to key */
+static unsigned
+lower_bound(generank_t *rank, double key)
+{
+	unsigned	lo = 0, hi = rank->n_genes, n_steps = 0;
+
+	while (lo < hi) {
+		unsigned	mid = (lo + hi) / 2;
+
+		if (GENE_KEY(rank, rank->genes[mid]) < key)
+			lo = mid + 1;
+		else
+			hi = mid;
+		n_steps++;
+	}
+	PROF_COUNT(PROF_RANK_STEPS, n_steps);
+	return lo;
+}
+
+void
+generank_add(generank_t *rank, gene_t *gene)
+{
+	unsigned	pos;
+
+	ASSERT(rank->n_genes < rank->max_genes);
+
+	pos = upper_bound(rank, GENE_KEY(rank, gene));
+	PROF_COUNT(PROF_RANK_STEPS, rank->n_genes - pos);
+	memmove(rank->genes + pos + 1, rank->genes + pos, (rank->n_genes - pos) * sizeof(gene_t *));
+	rank->genes[pos] = gene;
+	rank->n_genes++;
+}
+
+static int
+find_gene(generank_t *rank, gene_t *gene)
+{
+	unsigned	pos, start;
+
+	for (pos = start = lower_bound(rank, GENE_KEY(rank, gene)); pos < rank->n_genes; pos++) {
+		if (rank->genes[pos] == gene) {
+			PROF_COUNT(PROF_RANK_STEPS, pos - start + 1);
+			return pos;
+		}
+		if (GENE_KEY(rank, rank->genes[pos]) != GENE_KEY(rank, gene))
+			break;
+	}
+	PROF_COUNT(PROF_RANK_STEPS, pos - start);
+
+	/* the value of gene was changed after insertion */
+	for (pos = 0; pos < rank->n_genes; pos++) {
+		if (rank->genes[pos] == gene) {
+			PROF_COUNT(PROF_RANK_STEPS, pos + 1);
+			return pos;
+		}
+	}
+	PROF_COUNT(PROF_RANK_STEPS, rank->n_genes);
+	return -1;
+}
+
+void
+generank_del(generank_t *rank, gene_t *gene)
+{
+	int	pos;
+
+	pos = find_gene(rank, gene);
+	if (pos < 0)
+		return;
+	rank->n_genes--;
+	PROF_COUNT(PROF_RANK_STEPS, rank->n_genes - pos);
+	memmove(rank->genes + pos, rank->genes + pos + 1, (rank->n_genes - pos) * sizeof(gene_t *));
+}
+
+/* returns the last gene if rank is out of range */
+gene_t *
+generank_get(generank_t *rank, unsigned pos)
+{
+	if (pos >= rank->n_genes)
+		pos = rank->n_genes - 1;
+	return rank->genes[pos];
+}
@@ -0,0 +1,174 @@
+/*
+ * island.c
+ * Runs the GA islands of the island model, one thread per island.
+ *
+ * Provides:
+ *   - start_islands(): Creates and initializes islands (and their threads if there are several islands)
+ *   - resume_islands(): Starts islands loaded from a checkpoint
+ *   - evolve_islands(): Lets every island run generations up to a given generation
+ *   - migrate_islands(): Sends the best genes of each island to the next island in a ring
+ *   - stop_islands(): Terminates island threads and their workers
+ *
+ * Islands only interact in migrate_islands(), which runs while all island threads
+ * are waiting on a barrier. Each island has its own random generator, so results
+ * only depend on the seed and the number of islands.
+ */
+
+#include "gastask.h"
+
+#include <pthread.h>
+
+unsigned	migration_interval = 1000;
+unsigned	migration_size = 2;
+
+static pthread_t		*threads;
+static pthread_barrier_t	barrier_start, barrier_done;
+static unsigned		gen_stop;
+static BOOL		finished;
+static int		island_seed;
+static BOOL		resumed;	/* islands are loaded from a checkpoint */
+
+static void *
+island_thread(void *arg)
+{
+	island_t	*island = (island_t *)arg;
+
+	if (!resumed)
+		init_island(island, island - islands, island_seed);
+	pthread_barrier_wait(&barrier_done);
+
+	while (TRUE) {
+		pthread_barrier_wait(&barrier_start);
+		if (finished)
+			break;
+		evolve_island(island, gen_stop);
+		pthread_barrier_wait(&barrier_done);
+	}
+	return NULL;
+}
+
+static void
+check_islands(void)
+{
+	if (n_offsprings + 2 > n_pops)
+		FATAL(2, "number of offsprings should not exceed n_populations - 2: %u", n_offsprings);
+	if (n_islands > 1 && migration_size >= n_pops)
+		FATAL(2, "migration size should be smaller than the population: %u", migration_size);
+}
+
+/* island threads, which initialize their islands unless resumed */
+static void
+create_island_threads(void)
+{
+	int	i;
+
+	threads = (pthread_t *)calloc(n_islands, sizeof(pthread_t));
+	pthread_barrier_init(&barrier_start, NULL, n_islands + 1);
+	pthread_barrier_init(&barrier_done, NULL, n_islands + 1);
+	for (i = 0; i < n_islands; i++) {
+		if (pthread_create(threads + i, NULL, island_thread, islands + i) != 0)
+			FATAL(2, "cannot create island thread");
+	}
+	pthread_barrier_wait(&barrier_done);
+}
+
+static void
+print_init_stats(void)
+{
+	double	util_sum = 0;
+	unsigned	n_feasible = 0;
+	int	i;
+
+	for (i = 0; i < n_islands; i++) {
+		util_sum += islands[i].util_init;
+		n_feasible += islands[i].n_feasible_init;
+	}
+	printf("initial utilization: %lf\n", util_sum / n_islands);
+	printf("initial feasible genes: %u/%u\n", n_feasible, n_pops * n_islands);
+}
+
+void
+start_islands(int seed)
+{
+	check_islands();
+	islands = (island_t *)calloc(n_islands, sizeof(island_t));
+	if (islands == NULL)
+		FATAL(2, "cannot allocate islands");
+
+	if (n_islands == 1)
+		init_island(islands, 0, seed);
+	else {
+		island_seed = seed;
+		create_island_threads();
+	}
+	print_init_stats();
+}
+
+/* start the islands set up by load_checkpoint(), which prints the same initial statistics as the checkpointed run */
+void
+resume_islands(void)
+{
+	check_islands();
+	resumed = TRUE;
+	if (n_islands > 1)
+		create_island_threads();
+	print_init_stats();
+}
+
+void
+evolve_islands(unsigned gen)
+{
+	if (n_islands == 1) {
+		evolve_island(islands, gen);
+		return;
+	}
+
+	gen_stop = gen;
+	pthread_barrier_wait(&barrier_start);
+	pthread_barrier_wait(&barrier_done);
+}
+
+void
+migrate_islands(void)
+{
+	gene_t	*emigrants;
+	int	i, j;
+
+	emigrants = alloc_genes(n_islands * migration_size);
+
+	/* copy all emigrants first, since immigrants replace the worst genes of the destination */
+	for (i = 0; i < n_islands; i++) {
+		for (j = 0; j < migration_size; j++)
+			copy_gene(get_gene(emigrants, i * migration_size + j), generank_get(&islands[i].genes_by_score, j));
+	}
+	for (i = 0; i < n_islands; i++) {
+		island_t	*island = islands + (i + 1) % n_islands;
+
+		for (j = 0; j < migration_size; j++)
+			immigrate_gene(island, get_gene(emigrants, i * migration_size + j));
+	}
+
+	free(emigrants);
+}
+
+void
+stop_islands(void)
+{
+	int	i;
+
+	for (i = 0; i < n_islands; i++) {
+		if (islands[i].workers != NULL)
+			destroy_workers(islands[i].workers);
+	}
+
+	if (n_islands == 1)
+		return;
+
+	finished = TRUE;
+	pthread_barrier_wait(&barrier_start);
+	for (i = 0; i < n_islands; i++)
+		pthread_join(threads[i], NULL);
+	pthread_barrier_destroy(&barrier_start);
+	pthread_barrier_destroy(&barrier_done);
+	free(threads);
+}
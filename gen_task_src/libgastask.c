@@ -0,0 +1,257 @@
+/*
+ * libgastask.c
+ * Implements the C API of libgastask (see libgastask.h).
+ *
+ * Provides:
+ *   - gastask_init_params(): Sets GA parameters to the defaults of gastask
+ *   - gastask_optimize(): Runs GA on a problem given as arrays and returns its best assignment
+ *
+ * GA keeps its state in globals, so every optimization is run by a forked
+ * process as variants are (see variant.c). The child loads the problem into
+ * the globals as load_conf() would, runs GA without result files and standard
+ * output, and sends the best gene back through a pipe. The caller is left
+ * untouched, even by a fatal error of GA, and concurrent calls do not share state.
+ */
+
+#include "gastask.h"
+#include "libgastask.h"
+
+#include <errno.h>
+#include <fcntl.h>
+#include <sys/wait.h>
+
+BOOL	verbose;
+
+// TEE
+unsigned TEE;
+
+void
+errmsg(const char *fmt, ...)
+{
+	va_list	ap;
+	char	*errmsg;
+
+	va_start(ap, fmt);
+	vasprintf(&errmsg, fmt, ap);
+	va_end(ap);
+
+	fprintf(stderr, "ERROR: %s\n", errmsg);
+
+	free(errmsg);
+}
+
+void
+gastask_init_params(gastask_params_t *params)
+{
+	memset(params, 0, sizeof(gastask_params_t));
+	params->max_gen = 100000;
+	params->n_pops = 100;
+	params->cutoff = 1.1;
+	params->penalty = 1.5;
+	params->n_islands = 1;
+	params->n_workers = 1;
+	params->n_offsprings = 1;
+	params->migration_interval = 1000;
+	params->migration_size = 2;
+	params->cache_size = 4096;
+	params->localsearch_elites = 1;
+	params->localsearch_moves = 100;
+}
+
+static void
+load_problem(const gastask_problem_t *problem, const gastask_params_t *params)
+{
+	const gastask_tasks_t	*tasks_given = &problem->tasks;
+	int	i;
+
+	max_gen = params->max_gen;
+	n_pops = params->n_pops;
+	cutoff = params->cutoff;
+	penalty = params->penalty;
+	TEE = params->tee;
+	n_islands = params->n_islands;
+	n_workers = params->n_workers;
+	n_offsprings = params->n_offsprings;
+	migration_interval = params->migration_interval;
+	migration_size = params->migration_size;
+	stagnation_gens = params->stagnation_gens;
+	min_improvement = params->min_improvement;
+	time_budget = params->time_budget;
+	cache_size = params->cache_size;
+	init_random = params->init_random;
+	localsearch_interval = params->localsearch_interval;
+	localsearch_elites = params->localsearch_elites;
+	localsearch_moves = params->localsearch_moves;
+	if (n_pops == 0 || n_islands == 0 || n_workers == 0 || n_offsprings == 0 || localsearch_elites == 0)
+		FATAL(2, "invalid GA parameters");
+
+	if (problem->n_cpufreqs == 0 || problem->n_mems == 0 || tasks_given->n_tasks == 0)
+		FATAL(2, "cpu frequencies, memory types and tasks should be given");
+	for (i = 0; i < problem->n_cpufreqs; i++) {
+		const gastask_cpufreq_t	*cpufreq = problem->cpufreqs + i;
+
+		add_cpufreq(cpufreq->wcet_scale, cpufreq->power_active, cpufreq->power_idle);
+	}
+	for (i = 0; i < problem->n_mems; i++) {
+		const gastask_mem_t	*mem = problem->mems + i;
+
+		add_mem(mem->type, mem->max_capacity, mem->wcet_scale, mem->power_active, mem->power_idle);
+	}
+	for (i = 0; i < tasks_given->n_tasks; i++)
+		add_task(tasks_given->wcet[i], tasks_given->period[i], tasks_given->memreq[i], tasks_given->mem_active_ratio[i],
+			 tasks_given->task_size[i], tasks_given->input_size[i], tasks_given->output_size[i], tasks_given->offloading_bool[i]);
+	for (i = 0; i < problem->n_offloadingratios; i++)
+		add_offloadingratio(problem->offloadingratios[i]);
+	for (i = 0; i < problem->n_clouds; i++) {
+		const gastask_cloud_t	*cloud = problem->clouds + i;
+
+		add_cloud(cloud->type, cloud->computation_power, cloud->power_active, cloud->power_idle,
+			  cloud->max_capacity, cloud->offloading_limit);
+	}
+	for (i = 0; i < problem->n_networks; i++)
+		add_network(problem->networks[i].uplink, problem->networks[i].downlink);
+	for (i = 0; i < problem->n_net_commanders; i++)
+		add_net_commander(problem->net_commanders[i].intercept_out, problem->net_commanders[i].intercept_in);
+}
+
+static BOOL
+write_all(int fd, const void *buf, size_t len)
+{
+	const char	*p = (const char *)buf;
+
+	while (len > 0) {
+		ssize_t	n = write(fd, p, len);
+
+		if (n <= 0)
+			return FALSE;
+		p += n;
+		len -= n;
+	}
+	return TRUE;
+}
+
+static BOOL
+read_all(int fd, void *buf, size_t len)
+{
+	char	*p = (char *)buf;
+
+	while (len > 0) {
+		ssize_t	n = read(fd, p, len);
+
+		if (n < 0 && errno == EINTR)
+			continue;
+		if (n <= 0)
+			return FALSE;
+		p += n;
+		len -= n;
+	}
+	return TRUE;
+}
+
+/* run GA in the forked child and write the result and the attributes of the best gene to fd */
+static void
+run_child(int fd, const gastask_problem_t *problem, const gastask_params_t *params)
+{
+	static const attr_t	attrs[] = { ATTR_MEM, ATTR_CPUFREQ, ATTR_CLOUD, ATTR_OFFLOADINGRATIO };
+	gastask_result_t	result = { 0, };
+	unsigned char	*values;
+	gene_t	*gene;
+	int	fd_null, i;
+
+	fd_null = open("/dev/null", O_WRONLY);
+	if (fd_null >= 0)
+		dup2(fd_null, STDOUT_FILENO);
+	save_results = FALSE;
+
+	load_problem(problem, params);
+	init_rand(params->seed);
+	compile_taskcosts();
+	init_gene_layout();
+	run_GA(params->seed);
+
+	gene = get_best_gene();
+	result.power = gene->power;
+	result.util = gene->util;
+	result.cpu_power = gene->cpu_power;
+	result.mem_power = gene->mem_power;
+	result.network_power = gene->power_netcom;
+	result.period_violation = gene->period_violation;
+	if (!write_all(fd, &result, sizeof(result)))
+		_exit(2);
+
+	values = (unsigned char *)malloc(n_tasks);
+	if (values == NULL)
+		FATAL(2, "cannot allocate result");
+	for (i = 0; i < 4; i++) {
+		unpack_attrs(gene, attrs[i], 0, n_tasks, values);
+		if (!write_all(fd, values, n_tasks))
+			_exit(2);
+	}
+}
+
+int
+gastask_optimize(const gastask_problem_t *problem, const gastask_params_t *params, gastask_result_t *result)
+{
+	unsigned char	*values[4] = { result->mem_types, result->cpufreqs, result->clouds, result->offloadingratios };
+	unsigned char	*buf;
+	gastask_result_t	result_child;
+	unsigned	n_tasks_given = problem->tasks.n_tasks;
+	BOOL	received;
+	pid_t	pid;
+	int	fds[2], status, i;
+
+	buf = (unsigned char *)malloc(n_tasks_given > 0 ? n_tasks_given : 1);
+	if (buf == NULL)
+		return -1;
+	if (pipe(fds) < 0) {
+		free(buf);
+		return -1;
+	}
+
+	fflush(stdout);
+	fflush(stderr);
+	pid = fork();
+	if (pid < 0) {
+		close(fds[0]);
+		close(fds[1]);
+		free(buf);
+		return -1;
+	}
+	if (pid == 0) {
+		/* the child leaves only by _exit(), even on FATAL() */
+		fatal_quick_exit = TRUE;
+		close(fds[0]);
+		run_child(fds[1], problem, params);
+		_exit(0);
+	}
+
+	/* the result is read before waiting, since the child may block on a full pipe */
+	close(fds[1]);
+	received = read_all(fds[0], &result_child, sizeof(result_child));
+	for (i = 0; i < 4 && received; i++) {
+		received = read_all(fds[0], buf, n_tasks_given);
+		if (received && values[i] != NULL)
+			memcpy(values[i], buf, n_tasks_given);
+	}
+	close(fds[0]);
+	free(buf);
+
+	while (waitpid(pid, &status, 0) < 0) {
+		if (errno != EINTR)
+			return -1;
+	}
+	if (!WIFEXITED(status))
+		return -1;
+	if (WEXITSTATUS(status) != 0)
+		return WEXITSTATUS(status);
+	if (!received)
+		return -1;
+
+	result->power = result_child.power;
+	result->util = result_child.util;
+	result->cpu_power = result_child.cpu_power;
+	result->mem_power = result_child.mem_power;
+	result->network_power = result_child.network_power;
+	result->period_violation = result_child.period_violation;
+	return 0;
+}
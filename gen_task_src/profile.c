@@ -0,0 +1,191 @@
+/*
+ * profile.c
+ * Opt-in instrumentation of GA phases and hot paths (gastask -p).
+ *
+ * Provides:
+ *   - profiling: Whether instrumentation is on, checked by the PROF_* macros of gastask.h
+ *   - profile_interval: Generations between lines of the profile log, 0: no log
+ *   - prof_switch(): Charges the time since the last switch to the current phase of the thread and enters another one
+ *   - get_profcounts(): Returns the event counters of the calling thread
+ *   - start_profile(): Starts the wall clock and opens the profile log
+ *   - add_profile_line(): Appends the profile so far as a JSON line to the profile log
+ *   - save_profile(): Writes the profile of the run as a JSON document
+ *
+ * Every thread (main, island and worker threads) accumulates phase times and
+ * counters in its own record, so the hot paths take no lock. Records are
+ * summed when the profile is written, at which point island threads and
+ * workers are idle. Phases nest: entering a phase suspends the time of the
+ * current one, so a phase gets only its own time. Time outside any phase,
+ * such as waiting for other threads, is not counted, and phase times are
+ * summed over threads.
+ *
+ * The profile is written to profile.json and the log to profile.jsonl, or to
+ * profile_<variant>.json(l) for a variant. With profiling off, the macros
+ * only test a global flag.
+ */
+
+#include "gastask.h"
+
+#include <pthread.h>
+
+typedef struct profdata {
+	phase_t		phase;
+	struct timespec	ts;		/* time of the last switch */
+	double		seconds[N_PHASES];
+	unsigned long long	counts[N_PROFCOUNTERS];
+	struct profdata	*next;
+} profdata_t;
+
+BOOL		profiling;
+unsigned	profile_interval;
+
+static const char	*phase_names[N_PHASES] = {
+	NULL, "init", "selection", "crossover", "evaluation", "sorting", "local_search", "migration", "reporting"
+};
+
+static const char	*counter_names[N_PROFCOUNTERS] = {
+	"evaluations", "task_evaluations", "selections", "rank_steps", "retries"
+};
+
+static __thread profdata_t	*profdata;
+static profdata_t	*profdata_all;
+static pthread_mutex_t	profdata_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+static struct timespec	ts_profile;
+static FILE	*fp_log;
+
+static double
+diff_seconds(const struct timespec *ts_from, const struct timespec *ts_to)
+{
+	return (ts_to->tv_sec - ts_from->tv_sec) + (ts_to->tv_nsec - ts_from->tv_nsec) / 1e9;
+}
+
+static profdata_t *
+get_profdata(void)
+{
+	if (profdata == NULL) {
+		profdata = (profdata_t *)calloc(1, sizeof(profdata_t));
+		if (profdata == NULL)
+			FATAL(2, "cannot allocate profile data");
+		pthread_mutex_lock(&profdata_mutex);
+		profdata->next = profdata_all;
+		profdata_all = profdata;
+		pthread_mutex_unlock(&profdata_mutex);
+	}
+	return profdata;
+}
+
+/* enter phase and return the phase left, to which PROF_LEAVE() switches back */
+phase_t
+prof_switch(phase_t phase)
+{
+	profdata_t	*data = get_profdata();
+	struct timespec	ts;
+	phase_t	phase_left = data->phase;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	if (phase_left != PHASE_NONE)
+		data->seconds[phase_left] += diff_seconds(&data->ts, &ts);
+	data->ts = ts;
+	data->phase = phase;
+	return phase_left;
+}
+
+unsigned long long *
+get_profcounts(void)
+{
+	return get_profdata()->counts;
+}
+
+static void
+open_profile(const char *ext, const char *mode, FILE **pfp)
+{
+	char	path[1024];
+
+	get_result_path("profile", ext, path, sizeof(path));
+	*pfp = fopen(path, mode);
+	if (*pfp == NULL)
+		FATAL(2, "cannot open %s", path);
+}
+
+/* the log of a resumed run is appended to that of the checkpointed run */
+void
+start_profile(void)
+{
+	if (!profiling)
+		return;
+	clock_gettime(CLOCK_MONOTONIC, &ts_profile);
+	if (profile_interval > 0)
+		open_profile("jsonl", resume ? "a" : "w", &fp_log);
+}
+
+/* write the profile summed over all threads, with sep between fields */
+static void
+write_profile(FILE *fp, const char *sep)
+{
+	double	seconds[N_PHASES] = { 0, };
+	unsigned long long	counts[N_PROFCOUNTERS] = { 0, };
+	crossover_stats_t	stats = { 0, };
+	struct timespec	ts;
+	double	elapsed;
+	profdata_t	*data;
+	int	i;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	elapsed = diff_seconds(&ts_profile, &ts);
+
+	pthread_mutex_lock(&profdata_mutex);
+	for (data = profdata_all; data != NULL; data = data->next) {
+		for (i = 0; i < N_PHASES; i++)
+			seconds[i] += data->seconds[i];
+		for (i = 0; i < N_PROFCOUNTERS; i++)
+			counts[i] += data->counts[i];
+	}
+	pthread_mutex_unlock(&profdata_mutex);
+	for (i = 0; i < n_islands; i++)
+		add_crossover_stats(&stats, &islands[i].stats);
+
+	fprintf(fp, "{%s\"generation\": %u,", sep, islands[0].gen);
+	if (variant_name != NULL)
+		fprintf(fp, "%s\"variant\": \"%s\",", sep, variant_name);
+	fprintf(fp, "%s\"n_tasks\": %u, \"n_pops\": %u, \"n_islands\": %u, \"n_offsprings\": %u, \"n_workers\": %u,",
+		sep, n_tasks, n_pops, n_islands, n_offsprings, n_workers);
+	fprintf(fp, "%s\"elapsed\": %lf,", sep, elapsed);
+
+	fprintf(fp, "%s\"phases\": {", sep);
+	for (i = PHASE_NONE + 1; i < N_PHASES; i++)
+		fprintf(fp, "%s\"%s\": %lf", i > PHASE_NONE + 1 ? ", " : "", phase_names[i], seconds[i]);
+	fprintf(fp, "},%s\"counters\": {", sep);
+	for (i = 0; i < N_PROFCOUNTERS; i++)
+		fprintf(fp, "%s\"%s\": %llu", i > 0 ? ", " : "", counter_names[i], counts[i]);
+	fprintf(fp, "},%s\"crossover\": {\"tries\": %llu, \"rejected_mem\": %llu, \"rejected_cutoff\": %llu, "
+		"\"rejected_worse\": %llu, \"prescreened\": %llu},", sep, stats.n_tries,
+		stats.n_rejected_mem, stats.n_rejected_cutoff, stats.n_rejected_worse, stats.n_prescreened);
+	fprintf(fp, "%s\"evaluations_per_sec\": %lf", sep, elapsed > 0 ? counts[PROF_EVALS] / elapsed : 0.0);
+	fprintf(fp, "%s}\n", *sep == '\n' ? "\n" : sep);
+}
+
+void
+add_profile_line(void)
+{
+	if (fp_log == NULL)
+		return;
+	write_profile(fp_log, " ");
+	fflush(fp_log);
+}
+
+void
+save_profile(void)
+{
+	FILE	*fp;
+
+	if (!profiling)
+		return;
+	if (fp_log != NULL) {
+		fclose(fp_log);
+		fp_log = NULL;
+	}
+	open_profile("json", "w", &fp);
+	write_profile(fp, "\n\t");
+	fclose(fp);
+}
@@ -3,104 +3,263 @@
  * Handles reporting and logging of genetic algorithm results for the TOMS system.
  *
  * Provides:
- *   - add_report(): Collects and writes summary statistics (power/utilization) for each generation
- *   - save_task_infos(): Saves detailed task attribute assignments for the best gene
+ *   - add_report(): Writes summary statistics (power/utilization) of all islands every report interval
+ *   - add_last_report(): Writes statistics of the generation at which GA terminated early
+ *   - get_next_report_gen(): Returns the next generation to be reported
+ *   - get_best_gene(): Returns the gene with the lowest power among all islands
+ *   - save_task_infos(): Saves detailed task attribute assignments for the best gene among all islands
+ *   - report_cache_stats(): Prints hit/miss counters of the fitness caches of all islands
+ *   - report_localsearch_stats(): Prints how many local search moves improved a gene
+ *   - report_crossover_stats(): Prints crossover attempts and their rejections by reason
+ *   - get_result_path(): Returns the path of a result file, named after the running variant if any
  *   - init_report(): Initializes the report file and writes headers
+ *   - get_report_state(), resume_report(): Save and restore the report of a checkpointed run
  *   - close_report(): Closes the report file and saves final task information
+ *
+ * Averages are taken from the running sums kept by GA.c and extremes from the
+ * ends of the rank indices, so a report line does not walk the populations.
+ * Generations are reported every report_interval generations (default:
+ * max_gen / N_REPORTS), besides the first and the last one.
+ *
+ * With report_binary, every line of report.txt is also written to report.bin
+ * as a fixed-width record. The file starts with a header: the magic
+ * "GAREPORT", then as 32-bit words the format version, the number of fields
+ * and the record size, and for every field its name (24 bytes) and its NumPy
+ * type (8 bytes, native byte order), all NUL-padded. Records follow packed in
+ * the order of the fields.
+ *
+ * Without save_results, as in libgastask, no result file is written.
  */
 
 #include "gastask.h"
 
 #define N_REPORTS	1000
 
-static int	n_report_intervals;
+#define REPORT_MAGIC	"GAREPORT"
+#define REPORT_VERSION	1
+
+static unsigned	n_report_intervals;
+
+static FILE	*fp, *fp_bin;
+
+BOOL	save_results = TRUE;
+unsigned	report_interval;	/* 0: max_gen / N_REPORTS */
+BOOL	report_binary;
+
+typedef struct {
+	char	name[24];
+	char	type[8];
+} reportfield_t;
+
+/* fields of the records of report.bin, in the order of the columns of report.txt */
+static const reportfield_t	report_fields[] = {
+	{ "generation", "<u4" },
+	{ "power_min", "<f8" }, { "power_avg", "<f8" }, { "power_max", "<f8" },
+	{ "util_min", "<f8" }, { "util_avg", "<f8" }, { "util_max", "<f8" },
+	{ "tries_per_gen", "<f8" },
+	{ "rejected_mem", "<u8" }, { "rejected_cutoff", "<u8" }, { "rejected_worse", "<u8" }, { "prescreened", "<u8" }
+};
 
-static FILE	*fp;
+#define N_REPORT_FIELDS	(sizeof(report_fields) / sizeof(reportfield_t))
+#define REPORT_RECORD_SIZE	(sizeof(unsigned) + 7 * sizeof(double) + 4 * sizeof(unsigned long long))
 
+/* append a value to a record of report.bin */
+#define PACK_VALUE(p, value)	do { memcpy(p, &(value), sizeof(value)); (p) += sizeof(value); } while (0)
+
+/* crossover counters at the last reported generation */
+static crossover_stats_t	stats_reported;
+static unsigned	gen_reported;
+
+/* path of a result file, whose name gets the variant name appended if running a variant */
 void
-add_report(unsigned gen)
+get_result_path(const char *name, const char *ext, char *path, size_t size)
+{
+	if (variant_name != NULL)
+		snprintf(path, size, "%s_%s.%s", name, variant_name, ext);
+	else
+		snprintf(path, size, "%s.%s", name, ext);
+}
+
+static FILE *
+open_result(const char *name, const char *ext, const char *mode)
+{
+	char	path[1024];
+	FILE	*fp_result;
+
+	get_result_path(name, ext, path, sizeof(path));
+	fp_result = fopen(path, mode);
+	if (fp_result == NULL)
+		FATAL(2, "cannot open %s", path);
+	return fp_result;
+}
+
+/* next generation after gen which will be reported, or max_gen + 1 if none */
+unsigned
+get_next_report_gen(unsigned gen)
+{
+	unsigned	gen_next;
+
+	gen_next = (gen / n_report_intervals + 1) * n_report_intervals;
+	if (gen < max_gen && gen_next > max_gen)
+		return max_gen;
+	if (gen_next > max_gen + 1)
+		return max_gen + 1;
+	return gen_next;
+}
+
+static void
+get_crossover_stats(crossover_stats_t *stats)
+{
+	int	i;
+
+	memset(stats, 0, sizeof(crossover_stats_t));
+	for (i = 0; i < n_islands; i++)
+		add_crossover_stats(stats, &islands[i].stats);
+}
+
+static void
+write_record(unsigned gen, const double *values, const crossover_stats_t *stats)
+{
+	char	record[REPORT_RECORD_SIZE], *p = record;
+	int	i;
+
+	PACK_VALUE(p, gen);
+	for (i = 0; i < 7; i++)
+		PACK_VALUE(p, values[i]);
+	PACK_VALUE(p, stats->n_rejected_mem);
+	PACK_VALUE(p, stats->n_rejected_cutoff);
+	PACK_VALUE(p, stats->n_rejected_worse);
+	PACK_VALUE(p, stats->n_prescreened);
+	if (fwrite(record, REPORT_RECORD_SIZE, 1, fp_bin) != 1)
+		FATAL(2, "cannot write binary report");
+}
+
+static void
+write_report(unsigned gen)
 {
 	double	util_sum = 0, power_sum = 0;
 	double	util_avg, power_avg = -1;
-	double	util_min, util_max, power_min = -1, power_max;
+	double	util_min = 0, util_max = 0, power_min = -1, power_max = 0;
 	unsigned	n_valid_genes = 0;
+	crossover_stats_t	stats, stats_new;
+	double	tries_per_gen = 0;
 	gene_t	*gene;
-	struct list_head	*lp;
 	int	i;
 
-	if (fp == NULL)
-		return;
+	for (i = 0; i < n_islands; i++) {
+		island_t	*island = islands + i;
 
-#ifdef N_REPORTS
-	if (n_report_intervals == 0) {
-		n_report_intervals = max_gen / N_REPORTS;
-		if (n_report_intervals == 0)
-			n_report_intervals = 1;
-	}
-	else if (gen % n_report_intervals != 0 && gen != max_gen)
-		return;
-#endif
-	for (i = 0; i < n_pops; i++) {
-		gene = genes + i;
-		util_sum += gene->util;
-		if (gene->util <= 1.0) {
-			power_sum += gene->power;
-			n_valid_genes++;
-		}
+		util_sum += island->popstats.util_sum + island->popstats.util_comp;
+		power_sum += island->popstats.power_sum + island->popstats.power_comp;
+		n_valid_genes += island->popstats.n_valid;
+
+		gene = generank_get(&island->genes_by_util, 0);
+		if (i == 0 || gene->util < util_min)
+			util_min = gene->util;
+		gene = generank_get(&island->genes_by_util, island->genes_by_util.n_genes - 1);
+		if (i == 0 || gene->util > util_max)
+			util_max = gene->util;
+
+		gene = generank_get(&island->genes_by_power, 0);
+		if (gene->util <= 1.0 && (power_min < 0 || gene->power < power_min))
+			power_min = gene->power;
+		gene = generank_get(&island->genes_by_power, island->genes_by_power.n_genes - 1);
+		if (i == 0 || gene->power > power_max)
+			power_max = gene->power;
 	}
 
-	util_avg = util_sum / n_pops;
+	util_avg = util_sum / (n_pops * n_islands);
 	if (n_valid_genes > 0)
 		power_avg = power_sum / n_valid_genes;
 
-	gene = list_entry(genes_by_util.next, gene_t, list_util);
-	util_min = gene->util;
-	gene = list_entry(genes_by_util.prev, gene_t, list_util);
-	util_max = gene->util;
-
-	list_for_each (lp, &genes_by_power) {
-		gene = list_entry(genes_by_power.next, gene_t, list_power);
-		if (gene->util <= 1.0) {
-			power_min = gene->power;
-			break;
-		}
-	}
-	gene = list_entry(genes_by_power.prev, gene_t, list_power);
-	power_max = gene->power;
 	if (power_avg < 0)
 		power_avg = power_max;
 	if (power_min < 0)
 		power_min = power_max;
-	fprintf(fp, "%u %lf %lf %lf %lf %lf %lf\n", gen,
-		power_min, power_avg, power_max, util_min, util_avg, util_max);
+
+	/* crossover counters since the last reported generation */
+	get_crossover_stats(&stats);
+	if (gen > gen_reported && gen_reported > 0)
+		tries_per_gen = (double)(stats.n_tries - stats_reported.n_tries) / (gen - gen_reported);
+	stats_new.n_rejected_mem = stats.n_rejected_mem - stats_reported.n_rejected_mem;
+	stats_new.n_rejected_cutoff = stats.n_rejected_cutoff - stats_reported.n_rejected_cutoff;
+	stats_new.n_rejected_worse = stats.n_rejected_worse - stats_reported.n_rejected_worse;
+	stats_new.n_prescreened = stats.n_prescreened - stats_reported.n_prescreened;
+
+	fprintf(fp, "%u %lf %lf %lf %lf %lf %lf %lf %llu %llu %llu %llu\n", gen,
+		power_min, power_avg, power_max, util_min, util_avg, util_max, tries_per_gen,
+		stats_new.n_rejected_mem, stats_new.n_rejected_cutoff, stats_new.n_rejected_worse, stats_new.n_prescreened);
+	if (fp_bin != NULL) {
+		double	values[7] = { power_min, power_avg, power_max, util_min, util_avg, util_max, tries_per_gen };
+
+		write_record(gen, values, &stats_new);
+	}
+	stats_reported = stats;
+	gen_reported = gen;
+}
+
+void
+add_report(unsigned gen)
+{
+	if (fp == NULL)
+		return;
+
+	if (gen != 1 && gen % n_report_intervals != 0 && gen != max_gen)
+		return;
+	write_report(gen);
+}
+
+/* unlike add_report(), gen is always reported */
+void
+add_last_report(unsigned gen)
+{
+	if (fp != NULL)
+		write_report(gen);
+}
+
+/* gene with the lowest power among all islands */
+gene_t *
+get_best_gene(void)
+{
+	gene_t	*gene_best = NULL;
+	int	i;
+
+	for (i = 0; i < n_islands; i++) {
+		gene_t	*gene = generank_get(&islands[i].genes_by_power, 0);
+
+		if (gene_best == NULL || gene->power < gene_best->power)
+			gene_best = gene;
+	}
+	return gene_best;
 }
 
 static void
 save_task_infos(void)
 {
 	gene_t	*gene;
+	unsigned	mem_type, cpufreq, cloud, ratio;
 	int	i, n_offloading = 0, cpufreq0 = 0, cpufreq1 = 0, cpufreq2 = 0, cpufreq3 = 0; 
 
-	fp = fopen("task.txt", "w");
-	if (fp == NULL){
-		FATAL(2, "cannot open task.txt");
-	}
+	fp = open_result("task", "txt", "w");
 
 	fprintf(fp, "# mem_idx cpufreq_idx cloud_idx offloadingratio_idx\n"); 
-	gene = list_entry(genes_by_power.next, gene_t, list_power);
+	gene = get_best_gene();
 	if (gene->util > 2.0) {
 		FATAL(2, "over-utilized gene: %lf", gene->util);
 	}
 	for (i = 0; i < n_tasks; i++) {
-		fprintf(fp, "%u %u %u %u\n", (unsigned)gene->taskattrs_mem.attrs[i], (unsigned)gene->taskattrs_cpufreq.attrs[i],
-		(unsigned)gene->taskattrs_cloud.attrs[i], (unsigned)gene->taskattrs_offloadingratio.attrs[i]); 
-		if((unsigned)gene->taskattrs_offloadingratio.attrs[i] != 0)
+		mem_type = get_attr(gene, ATTR_MEM, i);
+		cpufreq = get_attr(gene, ATTR_CPUFREQ, i);
+		cloud = get_attr(gene, ATTR_CLOUD, i);
+		ratio = get_attr(gene, ATTR_OFFLOADINGRATIO, i);
+		fprintf(fp, "%u %u %u %u\n", mem_type, cpufreq, cloud, ratio); 
+		if(ratio != 0)
 			n_offloading++;
-		if((unsigned)gene->taskattrs_cpufreq.attrs[i] == 0) 
+		if(cpufreq == 0) 
 			cpufreq0++;
-		else if ((unsigned)gene->taskattrs_cpufreq.attrs[i] == 1)
+		else if (cpufreq == 1)
 			cpufreq1++;
-		else if ((unsigned)gene->taskattrs_cpufreq.attrs[i] == 2)
+		else if (cpufreq == 2)
 			cpufreq2++;
 		else
 			cpufreq3++;
@@ -115,20 +274,147 @@ save_task_infos(void)
 	printf("period violation: %u\n", gene->period_violation); 
 }
 
+static void
+report_cache_stats(void)
+{
+	unsigned long long	n_hits = 0, n_misses = 0, n_evictions = 0;
+	int	i;
+
+	if (cache_size == 0)
+		return;
+
+	for (i = 0; i < n_islands; i++) {
+		cache_stats_t	stats;
+
+		get_cache_stats(islands[i].cache, &stats);
+		n_hits += stats.n_hits;
+		n_misses += stats.n_misses;
+		n_evictions += stats.n_evictions;
+	}
+	printf("fitness cache: %u entries hits: %llu misses: %llu hit ratio: %.6lf evictions: %llu\n", cache_size,
+	       n_hits, n_misses, n_hits + n_misses > 0 ? (double)n_hits / (n_hits + n_misses) : 0.0, n_evictions);
+}
+
+static void
+report_localsearch_stats(void)
+{
+	unsigned long long	n_moves = 0, n_moves_improved = 0;
+	int	i;
+
+	if (localsearch_interval == 0)
+		return;
+
+	for (i = 0; i < n_islands; i++) {
+		n_moves += islands[i].n_moves;
+		n_moves_improved += islands[i].n_moves_improved;
+	}
+	printf("local search: moves: %llu improved: %llu\n", n_moves, n_moves_improved);
+}
+
+static void
+report_crossover_stats(void)
+{
+	crossover_stats_t	stats;
+
+	get_crossover_stats(&stats);
+	printf("crossover: tries: %llu rejected memory: %llu cutoff: %llu worse: %llu prescreened: %llu\n", stats.n_tries,
+	       stats.n_rejected_mem, stats.n_rejected_cutoff, stats.n_rejected_worse, stats.n_prescreened);
+}
+
+static void
+setup_report_intervals(void)
+{
+	n_report_intervals = report_interval > 0 ? report_interval : max_gen / N_REPORTS;
+	if (n_report_intervals == 0)
+		n_report_intervals = 1;
+}
+
+static void
+write_bin_header(void)
+{
+	unsigned	header[3] = { REPORT_VERSION, N_REPORT_FIELDS, REPORT_RECORD_SIZE };
+
+	if (fwrite(REPORT_MAGIC, strlen(REPORT_MAGIC), 1, fp_bin) != 1 ||
+	    fwrite(header, sizeof(header), 1, fp_bin) != 1 ||
+	    fwrite(report_fields, sizeof(report_fields), 1, fp_bin) != 1)
+		FATAL(2, "cannot write binary report");
+}
+
 void
 init_report(void)
 {
-	fp = fopen("report.txt", "w");
-	if (fp == NULL) {
-		FATAL(2, "cannot open report.txt");
+	setup_report_intervals();
+	if (!save_results)
+		return;
+
+	fp = open_result("report", "txt", "w");
+	fprintf(fp, "# generation power_min power_avg power_max util_min util_avg util_max "
+		"tries_per_gen rejected_mem rejected_cutoff rejected_worse prescreened\n");
+	if (report_binary) {
+		fp_bin = open_result("report", "bin", "wb");
+		write_bin_header();
+	}
+}
+
+static long
+get_report_offset(FILE *fp_report)
+{
+	if (fp_report == NULL)
+		return 0;
+	fflush(fp_report);
+	return ftell(fp_report);
+}
+
+void
+get_report_state(report_state_t *state)
+{
+	state->offset = get_report_offset(fp);
+	state->offset_bin = get_report_offset(fp_bin);
+	state->stats_reported = stats_reported;
+	state->gen_reported = gen_reported;
+}
+
+static FILE *
+reopen_result(const char *name, const char *ext, long offset)
+{
+	FILE	*fp_result = open_result(name, ext, "r+");
+
+	if (ftruncate(fileno(fp_result), offset) < 0 || fseek(fp_result, 0, SEEK_END) < 0)
+		FATAL(2, "cannot resume report");
+	return fp_result;
+}
+
+/* continue the report of a checkpointed run, dropping lines written after the checkpoint */
+void
+resume_report(const report_state_t *state)
+{
+	setup_report_intervals();
+	stats_reported = state->stats_reported;
+	gen_reported = state->gen_reported;
+	if (!save_results)
+		return;
+
+	fp = reopen_result("report", "txt", state->offset);
+	if (report_binary) {
+		if (state->offset_bin == 0)
+			FATAL(2, "cannot resume report: checkpointed run has no binary report");
+		fp_bin = reopen_result("report", "bin", state->offset_bin);
 	}
-	fprintf(fp, "# generation power_min power_avg power_max util_min util_avg util_max\n");
 }
 
 void
 close_report(void)
 {
+	if (!save_results)
+		return;
 	if (fp != NULL)
 		fclose(fp);
+	if (fp_bin != NULL) {
+		fclose(fp_bin);
+		fp_bin = NULL;
+	}
 	save_task_infos();
+	report_cache_stats();
+	report_localsearch_stats();
+	report_crossover_stats();
 }
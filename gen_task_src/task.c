@@ -3,12 +3,19 @@
  * Manages the list of tasks and provides utility functions for task analysis in the TOMS system.
  *
  * Provides:
- *   - tasks: Array storing all task entries
+ *   - tasks: Task model in structure-of-arrays layout, grown as tasks are added
  *   - n_tasks: Number of registered tasks
  *   - add_task(): Adds a new task with specified attributes
- *   - get_task_utilpower(): Calculates utilization and power consumption for a task under given resource assignments
- *   - get_task_utilpower_TEE(): Calculates utilization and power for a task considering Trusted Execution Environment (TEE) overheads
+ *   - setup_costparams(): Prepares the parameters of a resource assignment for eval_tasks()
+ *   - eval_tasks(): Calculates utilization, power consumption and deadline ratio of a range of tasks
+ *                   under a resource assignment, with or without Trusted Execution Environment (TEE) overheads
  *   - get_task_memreq(): Returns the memory requirement for a given task
+ *   - compile_taskcosts(): Precomputes the cost of every task under every resource assignment
+ *   - get_taskcost(): Looks up a precomputed task cost
+ *
+ * eval_tasks() is a single loop over plain arrays without calls or branches,
+ * which the compiler vectorizes. The models differ only in the per-task
+ * constants it reads.
  */
 
 #include "gastask.h"
@@ -17,152 +24,272 @@
 #define KBps_TO_KBms   (1.0 / 1000.0)    // KB/s → KB/ms
 #define MBPS_TO_KBms   (MBPS_TO_KBps * KBps_TO_KBms)  // 최종 변환 (0.125)
 
+// TEE
+#define TEE_IO_RATE	200.0	/* KB/ms of encryption and decryption of input and output */
+#define TEE_SLOWDOWN	1.08	/* slowdown of memory-active execution in the cloud enclave */
+
 unsigned	n_tasks;
-task_t	tasks[MAX_TASKS];
+taskset_t	tasks;
 
-extern unsigned	n_networks; 
-extern network_t  networks[MAX_NETWORKS]; 
+static unsigned	max_tasks;
 
-extern unsigned	n_net_commanders; 
-extern net_commander_t  net_commanders[MAX_NETCOMMANDERS]; 
+/* [TEE][task][mem][cpufreq][offloadingratio][cloud] */
+static taskcost_t	*taskcosts[2];
+/* dimensions of the tables, which stay valid when a variant uses fewer cpu frequencies or offloading ratios */
+static unsigned	n_cpufreqs_table, n_offloadingratios_table;
 
 void
-get_task_utilpower(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, double *putil, double *ppower_cpu, double *ppower_mem, double *ppower_net_com, double *pdeadline)
+setup_costparams(costparams_t *params, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, BOOL tee)
 {
-	task_t    *task = tasks + no_task;
 	mem_t    *mem = mems + mem_type;
-	cloud_t *cloud = clouds + cloud_type; 
+	cloud_t *cloud = clouds + cloud_type;
 	cpufreq_t    *cpufreq = cpufreqs + cpufreq_type;
-	network_t    *network = networks + no_task; 
-	net_commander_t   *net_commander = net_commanders + no_task; 
-	double    wcet_scaled_cpu = 1 / cpufreq->wcet_scale;
-	double    wcet_scaled_mem = 1 / mem->wcet_scale;
-	double    wcet_scaled_cloud = 1 / cloud->computation_power; 
-	double    cpu_power_unit;
-	double  net_com_power_unit = 1; 
-	double    wcet_scaled;
-	double    transtime; 
-	double  netcomtime; 
 
-	// If any network uplink or downlink is 0, set all tasks' offloading_bool to 0
-	if (network->uplink == 0.0 || network->downlink == 0.0) {
-		for (unsigned i = 0; i < n_tasks; ++i) {
-			tasks[i].offloading_bool = 0;
-		}
+	params->wcet_scaled_cpu = 1 / cpufreq->wcet_scale;
+	params->wcet_scaled_mem = 1 / mem->wcet_scale;
+	params->wcet_scaled_cloud = 1 / cloud->computation_power;
+	params->cpu_power_unit = (cpufreq->power_active * params->wcet_scaled_cpu + cpufreq->power_idle * params->wcet_scaled_mem) /
+		(params->wcet_scaled_cpu + params->wcet_scaled_mem);
+	params->mem_power_active = mem->power_active;
+	params->mem_power_idle = mem->power_idle;
+	params->offloadingratio = offloadingratios[offloadingratio];
+	params->tee = tee;
+}
+
+/*
+ * Loop of eval_tasks() over plain arrays, which are restrict parameters
+ * so that the compiler can vectorize it without alias checks.
+ */
+static void
+eval_tasks_kernel(const costparams_t *params, unsigned start, unsigned end,
+		  const double *restrict wcet, const double *restrict period, const double *restrict memreq, const double *restrict mem_active_ratio,
+		  const double *restrict transtimes, const double *restrict netcomtimes, const double *restrict cloudscales,
+		  double *restrict util, double *restrict power_cpu, double *restrict power_mem, double *restrict power_net_com, double *restrict deadline)
+{
+	const double	wcet_scaled_cpu = params->wcet_scaled_cpu, wcet_scaled_mem = params->wcet_scaled_mem;
+	const double	wcet_scaled_cloud = params->wcet_scaled_cloud, cpu_power_unit = params->cpu_power_unit;
+	const double	mem_power_active = params->mem_power_active, mem_power_idle = params->mem_power_idle;
+	const double	ratio = params->offloadingratio;
+	unsigned	i;
+
+	for (i = start; i < end; i++) {
+		double	wcet_scaled = wcet[i] * wcet_scaled_cpu * wcet_scaled_mem; // ADDMEM
+		double	transtime = transtimes[i], netcomtime = netcomtimes[i];
+		double	mar = mem_active_ratio[i];
+		double	cloudtime = wcet_scaled_cloud * wcet[i] * cloudscales[i];
+
+		util[i] = (wcet_scaled * (1.0 - ratio) + (wcet_scaled_cpu * netcomtime) * ratio) / period[i];
+		deadline[i] = (cloudtime + wcet_scaled_cpu * netcomtime + transtime) / (period[i]) * ratio; //gyuri
+		power_cpu[i] = cpu_power_unit * (wcet_scaled / period[i]) * (1 - ratio) + cpu_power_unit * (netcomtime / period[i]) * (ratio);
+		power_net_com[i] = ((transtime) / period[i]) * ratio;
+		power_mem[i] = (memreq[i] * (mar * mem_power_active + (1 - mar) * mem_power_idle) * wcet_scaled / period[i] +
+			memreq[i] * mem_power_idle * (1 - wcet_scaled / period[i]));
 	}
+}
+
+/*
+ * Fills costs[i] for tasks start <= i < end. Both models share the formulas;
+ * the TEE model adds encryption time to network communication and slows down
+ * memory-active execution in the cloud.
+ */
+void
+eval_tasks(const costparams_t *params, unsigned start, unsigned end, taskcostvec_t *costs)
+{
+	eval_tasks_kernel(params, start, end, tasks.wcet, tasks.period, tasks.memreq, tasks.mem_active_ratio, tasks.transtime,
+			  params->tee ? tasks.netcomtime_tee: tasks.netcomtime, params->tee ? tasks.cloudscale_tee: tasks.cloudscale,
+			  costs->util, costs->power_cpu, costs->power_mem, costs->power_net_com, costs->deadline);
+}
+
+unsigned
+get_task_memreq(unsigned no_task)
+{
+	return (unsigned)tasks.memreq[no_task];
+}
+
+static unsigned
+get_taskcost_idx(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio)
+{
+	return (((no_task * n_mems + mem_type) * n_cpufreqs_table + cpufreq_type) * n_offloadingratios_table + offloadingratio) * n_clouds + cloud_type;
+}
+
+void
+alloc_taskcostvec(taskcostvec_t *costs, unsigned n)
+{
+	double	*buf;
+
+	buf = (double *)malloc(5 * n * sizeof(double));
+	if (buf == NULL)
+		FATAL(2, "cannot allocate task cost vector");
+	costs->util = buf;
+	costs->power_cpu = buf + n;
+	costs->power_mem = buf + 2 * n;
+	costs->power_net_com = buf + 3 * n;
+	costs->deadline = buf + 4 * n;
+}
+
+void
+free_taskcostvec(taskcostvec_t *costs)
+{
+	free(costs->util);
+}
 
-	wcet_scaled = task->wcet * wcet_scaled_cpu * wcet_scaled_mem; // ADDMEM
-	// wcet_scaled = task->wcet * wcet_scaled_cpu; 
-	
-	// if (wcet_scaled >= task->period)
-	//     FATAL(3, "task[%u]: scaled wcet exceeds task period: %lf > %u", task->no, wcet_scaled, task->period);
-	if (network->uplink > 0.0 && network->downlink > 0.0) {
-		transtime = ((task->task_size + task->input_size) / (double)network->uplink + task->output_size / (double)network->downlink) / MBPS_TO_KBms;
-		netcomtime = net_commander->intercept_out + net_commander->intercept_in;
+static void
+compile_taskcosts_model(BOOL tee)
+{
+	taskcostvec_t	costs;
+	unsigned	i, mem, cpufreq, ratio, cloud;
+
+	taskcosts[tee] = (taskcost_t *)malloc(n_tasks * n_mems * n_cpufreqs * n_offloadingratios * n_clouds * sizeof(taskcost_t));
+	if (taskcosts[tee] == NULL)
+		FATAL(2, "cannot allocate task costs");
+
+	alloc_taskcostvec(&costs, n_tasks);
+	for (mem = 0; mem < n_mems; mem++) {
+		for (cpufreq = 0; cpufreq < n_cpufreqs; cpufreq++) {
+			for (ratio = 0; ratio < n_offloadingratios; ratio++) {
+				for (cloud = 0; cloud < n_clouds; cloud++) {
+					costparams_t	params;
+
+					setup_costparams(&params, mem, cloud, cpufreq, ratio, tee);
+					eval_tasks(&params, 0, n_tasks, &costs);
+					for (i = 0; i < n_tasks; i++) {
+						taskcost_t	*cost = taskcosts[tee] + get_taskcost_idx(i, mem, cloud, cpufreq, ratio);
+
+						cost->util = costs.util[i];
+						cost->power_cpu = costs.power_cpu[i];
+						cost->power_mem = costs.power_mem[i];
+						cost->power_net_com = costs.power_net_com[i];
+						cost->n_violations = (costs.deadline[i] > 1.0) ? 1: 0;
+					}
+				}
+			}
+		}
 	}
-	else{
-		transtime = 0.0;
-		netcomtime = 0.0;
+	free_taskcostvec(&costs);
+}
+
+/* network of a task, or NULL if it has none or one with a zero link, so that it cannot offload */
+static network_t *
+get_task_network(unsigned no_task)
+{
+	network_t	*network;
+
+	if (no_task >= n_networks)
+		return NULL;
+	network = networks + no_task;
+	if (network->uplink == 0 || network->downlink == 0)
+		return NULL;
+	return network;
+}
+
+/*
+ * Per-task constants of both models which do not depend on the resource assignment:
+ * network transfer and communication times, and cloud execution time scales.
+ */
+static void
+compile_tasklinks(void)
+{
+	unsigned	i;
+
+	for (i = 0; i < n_tasks; i++) {
+		double	mar = tasks.mem_active_ratio[i];
+		network_t    *network = get_task_network(i);
+		net_commander_t   net_commander = { 0, };
+
+		if (i < n_net_commanders)
+			net_commander = net_commanders[i];
+		if (network != NULL) {
+			tasks.transtime[i] = ((tasks.task_size[i] + tasks.input_size[i]) / (double)network->uplink + tasks.output_size[i] / (double)network->downlink) / MBPS_TO_KBms;
+			tasks.netcomtime[i] = net_commander.intercept_out + net_commander.intercept_in;
+			// TEE: input encryption and output decryption
+			tasks.netcomtime_tee[i] = net_commander.intercept_out + net_commander.intercept_in + tasks.input_size[i] / TEE_IO_RATE + tasks.output_size[i] / TEE_IO_RATE;
+		}
+		else {
+			tasks.transtime[i] = 0.0;
+			tasks.netcomtime[i] = 0.0;
+			tasks.netcomtime_tee[i] = 0.0;
+		}
+		tasks.cloudscale[i] = 1.0;
+		tasks.cloudscale_tee[i] = (1 - mar) + TEE_SLOWDOWN * mar;
 	}
-	
-	*putil = (wcet_scaled  * (1.0 - offloadingratios[offloadingratio]) + (wcet_scaled_cpu * netcomtime) * offloadingratios[offloadingratio]) / task->period; 
-	*pdeadline = (wcet_scaled_cloud * task->wcet + wcet_scaled_cpu * netcomtime + transtime) / (task->period) * offloadingratios[offloadingratio]; //gyuri 
-	cpu_power_unit = (cpufreq->power_active * wcet_scaled_cpu + cpufreq->power_idle * wcet_scaled_mem) / (wcet_scaled_cpu + wcet_scaled_mem);
-	*ppower_cpu = cpu_power_unit * (wcet_scaled / task->period) * (1 - offloadingratios[offloadingratio]) + cpu_power_unit * (netcomtime / task->period) * (offloadingratios[offloadingratio]); 
-	*ppower_net_com = net_com_power_unit * ((transtime) / task->period) * offloadingratios[offloadingratio];  
-	*ppower_mem = (task->memreq * (task->mem_active_ratio * mem->power_active + (1 - task->mem_active_ratio) * mem->power_idle) * wcet_scaled / task->period +
-		task->memreq * mem->power_idle * (1 - wcet_scaled / task->period));
 }
 
-// TEE
-void get_task_utilpower_TEE(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, double *putil, double *ppower_cpu, double *ppower_mem, double *ppower_net_com, double *pdeadline)
+/*
+ * Build the task cost tables for both the normal and TEE models.
+ * Must be called once the configuration is loaded and before running GA.
+ */
+void
+compile_taskcosts(void)
 {
-	task_t *task = tasks + no_task;
-	mem_t *mem = mems + mem_type;
-	cloud_t *cloud = clouds + cloud_type;
-	cpufreq_t *cpufreq = cpufreqs + cpufreq_type;
-
-	network_t *network = networks + no_task;
-	net_commander_t *net_commander = net_commanders + no_task;
-	double wcet_scaled_cpu = 1 / cpufreq->wcet_scale;
-	double wcet_scaled_mem = 1 / mem->wcet_scale;
-	double wcet_scaled_cloud = 1 / cloud->computation_power;
-	double cpu_power_unit;
-	double net_com_power_unit = 1;
-	double wcet_scaled;
-	double transtime;
-	double netcomtime;
+	unsigned	i, j;
 
 	// If any network uplink or downlink is 0, set all tasks' offloading_bool to 0
-	if (network->uplink == 0.0 || network->downlink == 0.0) {
-		for (unsigned i = 0; i < n_tasks; ++i) {
-			tasks[i].offloading_bool = 0;
+	for (i = 0; i < n_tasks; i++) {
+		if (get_task_network(i) == NULL) {
+			for (j = 0; j < n_tasks; j++)
+				tasks.offloading_bool[j] = 0;
+			break;
 		}
 	}
 
-	wcet_scaled = task->wcet * wcet_scaled_cpu * wcet_scaled_mem;
-
-	// TEE
-	double IET, IDT, OET, ODT;
-	double slowdown = 1.08;
-
-	IET = task->input_size / 200.0;
-	IDT = IET;
-	OET = task->output_size / 200.0;
-	ODT = OET;
-
-	
-	//if (wcet_scaled >= task->period)
-	//    FATAL(3, "task[%u]: scaled wcet exceeds task period: %lf > %u", task->no, wcet_scaled, task->period);
-	if (network->uplink > 0.0 && network->downlink > 0.0) {
-		transtime = ((task->task_size + task->input_size) / (double)network->uplink + task->output_size / (double)network->downlink) / MBPS_TO_KBms;
-		// TEE
-		netcomtime = net_commander->intercept_out + net_commander->intercept_in + IET + ODT;
-	}else{
-		transtime = 0.0;
-		netcomtime = 0.0;
-	}
-	*pdeadline = (wcet_scaled_cloud * task->wcet * ((1 - task->mem_active_ratio) + slowdown * task->mem_active_ratio) + wcet_scaled_cpu * netcomtime + transtime) / (task->period) * offloadingratios[offloadingratio]; // 1
-	
-	
-	// Util for task
-	*putil = (wcet_scaled * (1.0 - offloadingratios[offloadingratio]) + (wcet_scaled_cpu * netcomtime) * offloadingratios[offloadingratio]) / task->period;
-	
-	// Power Unit
-	cpu_power_unit = (cpufreq->power_active * wcet_scaled_cpu + cpufreq->power_idle * wcet_scaled_mem) / (wcet_scaled_cpu + wcet_scaled_mem);
-	
-	// Power
-	*ppower_cpu = cpu_power_unit * (wcet_scaled / task->period) * (1 - offloadingratios[offloadingratio]) 
-				+ cpu_power_unit * (netcomtime / task->period) * (offloadingratios[offloadingratio]);
-
-	*ppower_net_com = net_com_power_unit * ((transtime) / task->period) * offloadingratios[offloadingratio];
-	
-	*ppower_mem = (task->memreq * (task->mem_active_ratio * mem->power_active + (1 - task->mem_active_ratio) * mem->power_idle) * wcet_scaled / task->period +
-				   task->memreq * mem->power_idle * (1 - wcet_scaled / task->period));
+	n_cpufreqs_table = n_cpufreqs;
+	n_offloadingratios_table = n_offloadingratios;
+	compile_tasklinks();
+	compile_taskcosts_model(FALSE);
+	compile_taskcosts_model(TRUE);
 }
 
-unsigned
-get_task_memreq(unsigned no_task)
+const taskcost_t *
+get_taskcost(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, BOOL tee)
+{
+	return taskcosts[tee] + get_taskcost_idx(no_task, mem_type, cloud_type, cpufreq_type, offloadingratio);
+}
+
+static void *
+realloc_tasks(void *values, size_t size)
 {
-	task_t	*task = tasks + no_task;
-	return task->memreq;
+	values = realloc(values, max_tasks * size);
+	if (values == NULL)
+		FATAL(2, "cannot allocate tasks");
+	return values;
+}
+
+#define GROW_TASKS(values)	values = realloc_tasks(values, sizeof(*(values)))
+
+static void
+grow_tasks(void)
+{
+	max_tasks = max_tasks == 0 ? 256: max_tasks * 2;
+
+	GROW_TASKS(tasks.wcet);
+	GROW_TASKS(tasks.period);
+	GROW_TASKS(tasks.memreq);
+	GROW_TASKS(tasks.mem_active_ratio);
+	GROW_TASKS(tasks.task_size);
+	GROW_TASKS(tasks.input_size);
+	GROW_TASKS(tasks.output_size);
+	GROW_TASKS(tasks.offloading_bool);
+	GROW_TASKS(tasks.transtime);
+	GROW_TASKS(tasks.netcomtime);
+	GROW_TASKS(tasks.netcomtime_tee);
+	GROW_TASKS(tasks.cloudscale);
+	GROW_TASKS(tasks.cloudscale_tee);
 }
 
 void
 add_task(unsigned wcet, unsigned period, unsigned memreq, double mem_active_ratio, unsigned task_size, unsigned input_size, unsigned output_size, unsigned offloading_bool)
 {
-	task_t	*task;
-
-	task = tasks + n_tasks;
-	task->wcet = wcet;
-	task->period = period;
-	task->memreq = memreq;
-	task->mem_active_ratio = mem_active_ratio;
-	task->task_size = task_size;
-	task->input_size = input_size;
-	task->output_size = output_size;
-	task->offloading_bool = offloading_bool;
+	if (n_tasks == max_tasks)
+		grow_tasks();
+
+	tasks.wcet[n_tasks] = wcet;
+	tasks.period[n_tasks] = period;
+	tasks.memreq[n_tasks] = memreq;
+	tasks.mem_active_ratio[n_tasks] = mem_active_ratio;
+	tasks.task_size[n_tasks] = task_size;
+	tasks.input_size[n_tasks] = input_size;
+	tasks.output_size[n_tasks] = output_size;
+	tasks.offloading_bool[n_tasks] = offloading_bool;
 
 	n_tasks++;
-	task->no = n_tasks;
-}
\ No newline at end of file
+}
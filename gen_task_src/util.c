@@ -3,23 +3,173 @@
  * Utility functions for random number generation and related helpers.
  *
  * Provides:
- *   - get_rand(): Returns a random unsigned integer less than max_value
+ *   - rng_seed(): Initializes a random stream from a seed
+ *   - rng_jump(), rng_long_jump(): Advance a stream by 2^128 or 2^192 steps to obtain independent substreams
+ *   - rng_rand(): Returns a random unsigned integer less than max_value from a stream
+ *   - rng_rand_except(): Same as rng_rand(), except ex_value
+ *   - init_rand(): Seeds the default stream
+ *   - get_rand(): Returns a random unsigned integer less than max_value from the default stream
  *   - get_rand_except(): Returns a random unsigned integer less than max_value, except ex_value
+ *   - hash_bytes(): Adds bytes to an FNV-1a hash
+ *   - fatal_exit(): Terminates the process after a fatal error (used by FATAL())
+ *
+ * Streams are xoshiro256** generators whose state is owned by the caller, so
+ * threads can draw numbers without locking. Bounded numbers are drawn with
+ * Lemire's multiply-and-reject method, which has no modulo bias.
  */
 #include "common.h"
 
+static rng_t	rng_default;
+
+BOOL	fatal_quick_exit;
+
+static inline unsigned long long
+rotl(const unsigned long long x, int k)
+{
+	return (x << k) | (x >> (64 - k));
+}
+
+static unsigned long long
+splitmix64(unsigned long long *pstate)
+{
+	unsigned long long	z = (*pstate += 0x9e3779b97f4a7c15ULL);
+
+	z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+	z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+	return z ^ (z >> 31);
+}
+
+void
+rng_seed(rng_t *rng, unsigned long long seed)
+{
+	int	i;
+
+	for (i = 0; i < 4; i++)
+		rng->s[i] = splitmix64(&seed);
+}
+
+static inline unsigned long long
+rng_next(rng_t *rng)
+{
+	unsigned long long	*s = rng->s;
+	const unsigned long long	result = rotl(s[1] * 5, 7) * 9;
+	const unsigned long long	t = s[1] << 17;
+
+	s[2] ^= s[0];
+	s[3] ^= s[1];
+	s[1] ^= s[2];
+	s[0] ^= s[3];
+	s[2] ^= t;
+	s[3] = rotl(s[3], 45);
+
+	return result;
+}
+
+static void
+do_jump(rng_t *rng, const unsigned long long *jump)
+{
+	unsigned long long	s[4] = { 0, };
+	int	i, b;
+
+	for (i = 0; i < 4; i++) {
+		for (b = 0; b < 64; b++) {
+			if (jump[i] & (1ULL << b)) {
+				s[0] ^= rng->s[0];
+				s[1] ^= rng->s[1];
+				s[2] ^= rng->s[2];
+				s[3] ^= rng->s[3];
+			}
+			rng_next(rng);
+		}
+	}
+	memcpy(rng->s, s, sizeof(s));
+}
+
+/* equivalent to 2^128 calls to rng_next() */
+void
+rng_jump(rng_t *rng)
+{
+	static const unsigned long long	jump[] = { 0x180ec6d33cfd0abaULL, 0xd5a61266f0c9392cULL, 0xa9582618e03fc9aaULL, 0x39abdc4529b1661cULL };
+
+	do_jump(rng, jump);
+}
+
+/* equivalent to 2^192 calls to rng_next() */
+void
+rng_long_jump(rng_t *rng)
+{
+	static const unsigned long long	jump[] = { 0x76e15d3efefdcbbfULL, 0xc5004e441c522fb3ULL, 0x77710069854ee241ULL, 0x39109bb02acbe635ULL };
+
+	do_jump(rng, jump);
+}
+
 unsigned
-get_rand(unsigned max_value)
+rng_rand(rng_t *rng, unsigned max_value)
 {
-	return abs(rand()) % max_value;
+	unsigned long long	m = (rng_next(rng) >> 32) * max_value;
+	unsigned	l = (unsigned)m;
+
+	if (l < max_value) {
+		unsigned	threshold = -max_value % max_value;
+
+		while (l < threshold) {
+			m = (rng_next(rng) >> 32) * max_value;
+			l = (unsigned)m;
+		}
+	}
+	return m >> 32;
 }
 
 unsigned
-get_rand_except(unsigned max_value, unsigned int ex_value)
+rng_rand_except(rng_t *rng, unsigned max_value, unsigned int ex_value)
 {
 	while (TRUE) {
-		unsigned	value = get_rand(max_value);
+		unsigned	value = rng_rand(rng, max_value);
 		if (value != ex_value)
 			return value;
 	}
 }
+
+void
+init_rand(unsigned long long seed)
+{
+	rng_seed(&rng_default, seed);
+}
+
+unsigned
+get_rand(unsigned max_value)
+{
+	return rng_rand(&rng_default, max_value);
+}
+
+unsigned
+get_rand_except(unsigned max_value, unsigned int ex_value)
+{
+	return rng_rand_except(&rng_default, max_value, ex_value);
+}
+
+unsigned long long
+hash_bytes(unsigned long long hash, const void *data, size_t len)
+{
+	const unsigned char	*p = (const unsigned char *)data;
+	size_t	i;
+
+	/* FNV-1a */
+	for (i = 0; i < len; i++)
+		hash = (hash ^ p[i]) * 0x100000001b3ULL;
+	return hash;
+}
+
+void
+fatal_exit(int exitcode)
+{
+	/*
+	 * A child forked by gastask_optimize() shares the stdio buffers and atexit
+	 * handlers of the host, which exit() would flush and run a second time.
+	 */
+	if (fatal_quick_exit) {
+		fflush(stderr);
+		_exit(exitcode);
+	}
+	exit(exitcode);
+}
@@ -0,0 +1,167 @@
+/*
+ * variant.c
+ * Runs several algorithm variants on one loaded configuration.
+ *
+ * Provides:
+ *   - parse_variants(): Parses a list of variants such as "tee+off+dvs,off+dvs,off,dvs,none"
+ *   - run_variants(): Runs GA for every variant in parallel and prints their results in order
+ *
+ * A variant enables a subset of the techniques of the configuration:
+ * "tee" uses the TEE model, "off" allows all offloading ratios and "dvs" all cpu
+ * frequencies. Without "off", only the first offloading ratio, which must be 0, is
+ * used, and without "dvs" only the first cpu frequency. "none" enables nothing.
+ * A variant may be named as "<name>=<techniques>", and is named after its
+ * techniques otherwise.
+ *
+ * The configuration is parsed and the task cost model is compiled once. Every
+ * variant is then run by a forked process sharing the model, since GA keeps its
+ * state in globals. Its standard output is captured and printed as a "*<name>"
+ * section, and its task and report files get "_<name>" suffixes.
+ */
+
+#include "gastask.h"
+
+#include <sys/wait.h>
+#include <unistd.h>
+
+#define MAX_VARIANTS	16
+
+typedef struct {
+	char	*name;
+	BOOL	tee, off, dvs;
+} variant_t;
+
+const char	*variant_name;	/* NULL unless running a variant */
+
+static variant_t	variants[MAX_VARIANTS];
+static unsigned	n_variants;
+
+static BOOL
+parse_variant(char *str, variant_t *variant)
+{
+	char	*techs = strchr(str, '='), *tech, *saveptr;
+
+	if (techs != NULL) {
+		*techs++ = '\0';
+		variant->name = str;
+	}
+	else {
+		/* techniques are cut by strtok_r() below */
+		variant->name = strdup(str);
+		techs = str;
+	}
+	if (*variant->name == '\0')
+		return FALSE;
+
+	if (strcmp(techs, "none") == 0)
+		return TRUE;
+	for (tech = strtok_r(techs, "+", &saveptr); tech != NULL; tech = strtok_r(NULL, "+", &saveptr)) {
+		if (strcmp(tech, "tee") == 0)
+			variant->tee = TRUE;
+		else if (strcmp(tech, "off") == 0)
+			variant->off = TRUE;
+		else if (strcmp(tech, "dvs") == 0)
+			variant->dvs = TRUE;
+		else
+			return FALSE;
+	}
+	return TRUE;
+}
+
+BOOL
+parse_variants(const char *list)
+{
+	char	*str, *saveptr;
+
+	/* the copy of list is kept, since names point into it */
+	for (str = strtok_r(strdup(list), ",", &saveptr); str != NULL; str = strtok_r(NULL, ",", &saveptr)) {
+		if (n_variants == MAX_VARIANTS) {
+			errmsg("too many variants: max %d", MAX_VARIANTS);
+			return FALSE;
+		}
+		if (!parse_variant(str, variants + n_variants)) {
+			errmsg("invalid variants: %s", list);
+			return FALSE;
+		}
+		n_variants++;
+	}
+	if (n_variants == 0) {
+		errmsg("no variant given");
+		return FALSE;
+	}
+	return TRUE;
+}
+
+static void
+run_variant(const variant_t *variant, int seed)
+{
+	variant_name = variant->name;
+	TEE = variant->tee;
+	if (!variant->dvs)
+		n_cpufreqs = 1;
+	if (!variant->off) {
+		if (offloadingratios[0] != 0)
+			FATAL(2, "variant %s needs offloading ratio 0 first in the configuration", variant->name);
+		n_offloadingratios = 1;
+	}
+
+	init_gene_layout();
+	run_GA(seed);
+	fflush(stdout);
+}
+
+static void
+print_output(FILE *fp)
+{
+	char	buf[4096];
+	size_t	n;
+
+	rewind(fp);
+	while ((n = fread(buf, 1, sizeof(buf), fp)) > 0)
+		fwrite(buf, 1, n, stdout);
+}
+
+/* return non-zero if any variant failed */
+int
+run_variants(int seed)
+{
+	FILE	*outputs[MAX_VARIANTS];
+	pid_t	pids[MAX_VARIANTS];
+	int	ret = 0;
+	int	i;
+
+	fflush(stdout);
+	for (i = 0; i < n_variants; i++) {
+		outputs[i] = tmpfile();
+		if (outputs[i] == NULL)
+			FATAL(2, "cannot create output of variant: %s", variants[i].name);
+
+		pids[i] = fork();
+		if (pids[i] < 0)
+			FATAL(2, "cannot run variant: %s", variants[i].name);
+		if (pids[i] == 0) {
+			dup2(fileno(outputs[i]), STDOUT_FILENO);
+			run_variant(variants + i, seed);
+			exit(0);
+		}
+	}
+
+	for (i = 0; i < n_variants; i++) {
+		int	status;
+
+		if (i > 0)
+			printf("\n");
+		printf("*%s\n", variants[i].name);
+		fflush(stdout);
+
+		waitpid(pids[i], &status, 0);
+		print_output(outputs[i]);
+		fflush(stdout);
+		fclose(outputs[i]);
+		if (!WIFEXITED(status) || WEXITSTATUS(status) != 0) {
+			errmsg("variant %s failed", variants[i].name);
+			ret = 1;
+		}
+	}
+	return ret;
+}
@@ -0,0 +1,135 @@
+/*
+ * workers.c
+ * Minimal pool of worker threads which run indexed jobs in parallel.
+ *
+ * Provides:
+ *   - create_workers(): Starts a pool with the given number of threads (including the caller)
+ *   - run_workers(): Runs func(arg, idx) for idx in [0, n_jobs) and waits for all of them
+ *   - destroy_workers(): Terminates the pool
+ *
+ * The calling thread takes jobs too, so a pool of one thread runs jobs serially
+ * without any synchronization.
+ */
+
+#include "gastask.h"
+
+#include <pthread.h>
+
+struct workers {
+	unsigned	n_threads;
+	pthread_t	*threads;
+	pthread_mutex_t	mutex;
+	pthread_cond_t	cond_start, cond_done;
+	void		(*func)(void *arg, unsigned idx);
+	void		*arg;
+	unsigned	n_jobs, next_job, n_jobs_done;
+	unsigned	round;
+	BOOL		finished;
+};
+
+/* take jobs of the current round until none is left; called with mutex held */
+static void
+do_jobs(workers_t *workers)
+{
+	while (workers->next_job < workers->n_jobs) {
+		unsigned	idx = workers->next_job++;
+
+		pthread_mutex_unlock(&workers->mutex);
+		workers->func(workers->arg, idx);
+		pthread_mutex_lock(&workers->mutex);
+
+		workers->n_jobs_done++;
+		if (workers->n_jobs_done == workers->n_jobs)
+			pthread_cond_signal(&workers->cond_done);
+	}
+}
+
+static void *
+worker_thread(void *arg)
+{
+	workers_t	*workers = (workers_t *)arg;
+	unsigned	round = 0;
+
+	pthread_mutex_lock(&workers->mutex);
+	while (TRUE) {
+		while (!workers->finished && workers->round == round)
+			pthread_cond_wait(&workers->cond_start, &workers->mutex);
+		if (workers->finished)
+			break;
+		round = workers->round;
+		do_jobs(workers);
+	}
+	pthread_mutex_unlock(&workers->mutex);
+	return NULL;
+}
+
+workers_t *
+create_workers(unsigned n_threads)
+{
+	workers_t	*workers;
+	int	i;
+
+	workers = (workers_t *)calloc(1, sizeof(workers_t));
+	if (workers == NULL)
+		FATAL(2, "cannot allocate workers");
+	workers->n_threads = n_threads;
+	if (n_threads <= 1)
+		return workers;
+
+	pthread_mutex_init(&workers->mutex, NULL);
+	pthread_cond_init(&workers->cond_start, NULL);
+	pthread_cond_init(&workers->cond_done, NULL);
+	workers->threads = (pthread_t *)calloc(n_threads - 1, sizeof(pthread_t));
+	for (i = 0; i < n_threads - 1; i++) {
+		if (pthread_create(workers->threads + i, NULL, worker_thread, workers) != 0)
+			FATAL(2, "cannot create worker thread");
+	}
+	return workers;
+}
+
+void
+run_workers(workers_t *workers, void (*func)(void *arg, unsigned idx), void *arg, unsigned n_jobs)
+{
+	unsigned	i;
+
+	if (workers->n_threads <= 1) {
+		for (i = 0; i < n_jobs; i++)
+			func(arg, i);
+		return;
+	}
+
+	pthread_mutex_lock(&workers->mutex);
+	workers->func = func;
+	workers->arg = arg;
+	workers->n_jobs = n_jobs;
+	workers->next_job = 0;
+	workers->n_jobs_done = 0;
+	workers->round++;
+	pthread_cond_broadcast(&workers->cond_start);
+
+	do_jobs(workers);
+	while (workers->n_jobs_done < workers->n_jobs)
+		pthread_cond_wait(&workers->cond_done, &workers->mutex);
+	pthread_mutex_unlock(&workers->mutex);
+}
+
+void
+destroy_workers(workers_t *workers)
+{
+	int	i;
+
+	if (workers->n_threads > 1) {
+		pthread_mutex_lock(&workers->mutex);
+		workers->finished = TRUE;
+		pthread_cond_broadcast(&workers->cond_start);
+		pthread_mutex_unlock(&workers->mutex);
+
+		for (i = 0; i < workers->n_threads - 1; i++)
+			pthread_join(workers->threads[i], NULL);
+		pthread_mutex_destroy(&workers->mutex);
+		pthread_cond_destroy(&workers->cond_start);
+		pthread_cond_destroy(&workers->cond_done);
+		free(workers->threads);
+	}
+	free(workers);
+}
@@ -0,0 +1,57 @@
+"""
+gastask report.bin 로더
+
+`report <interval> binary` 옵션으로 gastask가 report.txt와 함께 쓰는 report.bin을
+NumPy structured array로 읽는다. 헤더에 필드 이름과 타입이 있으므로 report.txt를
+파싱하지 않고 파일 전체를 한 번에 메모리로 읽는다.
+
+    from load_report import load_report, load_reports
+    data = load_report("report.bin")
+    data["generation"], data["power_min"]
+    runs = load_reports(glob.glob("runs/*/report.bin"))   # {path: array}
+"""
+
+import numpy as np
+
+MAGIC = b"GAREPORT"
+VERSION = 1
+FIELD_NAME_SIZE = 24
+FIELD_TYPE_SIZE = 8
+
+
+def read_dtype(buf):
+    """report.bin 헤더 → (dtype, 헤더 길이)"""
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a gastask binary report")
+    version, n_fields, record_size = np.frombuffer(buf, dtype=np.uint32, count=3, offset=len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"unsupported binary report version: {version}")
+
+    offset = len(MAGIC) + 3 * 4
+    fields = []
+    for _ in range(n_fields):
+        name = buf[offset:offset + FIELD_NAME_SIZE].rstrip(b"\0").decode()
+        offset += FIELD_NAME_SIZE
+        type_ = buf[offset:offset + FIELD_TYPE_SIZE].rstrip(b"\0").decode()
+        offset += FIELD_TYPE_SIZE
+        fields.append((name, type_))
+
+    dtype = np.dtype(fields)
+    if dtype.itemsize != record_size:
+        raise ValueError(f"record size mismatch: {dtype.itemsize} != {record_size}")
+    return dtype, offset
+
+
+def load_report(path):
+    """report.bin → 세대별 레코드의 structured array"""
+    with open(path, "rb") as f:
+        buf = f.read()
+    dtype, offset = read_dtype(buf)
+    # 중단된 실행의 마지막 레코드가 잘려 있을 수 있으므로 완전한 레코드만 읽음
+    count = (len(buf) - offset) // dtype.itemsize
+    return np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+
+
+def load_reports(paths):
+    """여러 실행의 report.bin → {path: array}"""
+    return {path: load_report(path) for path in paths}
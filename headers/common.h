@@ -9,9 +9,11 @@
 
 #include <stdio.h>
 #include <stdlib.h>
+#include <stddef.h>
 #include <getopt.h>
 #include <stdarg.h>
 #include <string.h>
+#include <ctype.h>
 #include <assert.h>
 #include <math.h>
 #include <unistd.h>
@@ -23,10 +25,19 @@
 #define FALSE	0
 
 #define ASSERT(cond)			do { assert(cond); } while (0)
-#define FATAL(exitcode, fmt, ...)	do { errmsg(fmt, ## __VA_ARGS__); exit(exitcode); } while (0)
+#define FATAL(exitcode, fmt, ...)	do { errmsg(fmt, ## __VA_ARGS__); fatal_exit(exitcode); } while (0)
 
 typedef int	BOOL;
 
+/* FNV-1a offset basis, the initial value of hash_bytes() */
+#define HASH_INIT	0xcbf29ce484222325ULL
+#define HASH_VALUE(hash, value)	hash_bytes(hash, &(value), sizeof(value))
+
+/* state of a xoshiro256** random stream */
+typedef struct {
+	unsigned long long	s[4];
+} rng_t;
+
 typedef enum {
 	SECT_UNKNOWN,
 	SECT_GENETIC,
@@ -44,6 +55,16 @@ typedef enum {
 	SECT_TEE 	
 } section_t;
 
+#define CONF_MAX_LINE	1024
+
+/* configuration mapped into memory and read line by line */
+typedef struct {
+	const char	*data, *end;
+	const char	*next;			/* start of the next line */
+	const char	*line_start;		/* start of the current line in data */
+	char		line[CONF_MAX_LINE];	/* current line without its line break */
+} conf_t;
+
 typedef struct {
 	char		*typestr;
 	unsigned	max_capacity;
@@ -58,13 +79,28 @@ extern double   offloadingratios[];
 
 void errmsg(const char *fmt, ...);
 void load_conf(const char *fpath);
-void parse_mem(FILE *fp);
+void parse_mem(conf_t *conf);
 
+BOOL read_conf_line(conf_t *conf);
+BOOL read_section_line(conf_t *conf);
+BOOL is_blank_line(const char *line);
+int scan_line(const char *line, const char *fields, ...);
 section_t check_section(const char *line);
-void skip_section(FILE *fp);
-void parse_conf(FILE *fp);
+void skip_section(conf_t *conf);
+void parse_conf(conf_t *conf);
 char *trim(char *str);
+void rng_seed(rng_t *rng, unsigned long long seed);
+void rng_jump(rng_t *rng);
+void rng_long_jump(rng_t *rng);
+unsigned rng_rand(rng_t *rng, unsigned max_value);
+unsigned rng_rand_except(rng_t *rng, unsigned max_value, unsigned ex_value);
+void init_rand(unsigned long long seed);
 unsigned get_rand(unsigned max_value);
 unsigned get_rand_except(unsigned max_value, unsigned ex_value);
+unsigned long long hash_bytes(unsigned long long hash, const void *data, size_t len);
+
+/* set in a process forked from a host of libgastask, which must not run the host's exit handlers */
+extern BOOL	fatal_quick_exit;
+void fatal_exit(int exitcode);
 
 #endif
@@ -2,55 +2,208 @@
  * Common header for the gastask module.
  * 
  * Defines:
- *   - Constants: MAX_TASKS, MAX_NETWORKS, MAX_CPU_FREQS, MAX_MEMS, MAX_NETCOMMANDERS,
- *                MAX_OFFLOADING_RATIOS, MAX_CLOUDS, MAX_ATTRTYPES
- *   - Data structures: taskattrs_t, gene_t, task_t, cpufreq_t, cloud_t, network_t, net_commander_t
- *   - Extern variables: max_gen, n_tasks, n_cpufreqs, n_offloadingratios, n_clouds, n_pops, n_networks, n_net_commanders, TEE, etc.
- *   - Function prototypes: add_mem, add_cpufreq, add_task, add_offloadingratio, add_cloud, add_network, add_net_commander, get_task_utilpower, get_task_memreq, init_report, close_report, add_report, run_GA
+ *   - Constants: MAX_CPU_FREQS, MAX_MEMS, MAX_OFFLOADING_RATIOS, MAX_CLOUDS, MAX_ATTRTYPES
+ *   - Data structures: attr_t, attrpack_t, taskattrs_t, taskcost_t, gene_t, generank_t, crossover_stats_t, fitstatus_t, popstats_t, progress_t, report_state_t, phase_t, profcounter_t, fitness_t, cache_stats_t, offspring_t, island_t, taskset_t, costparams_t, taskcostvec_t, cpufreq_t, cloud_t, network_t, net_commander_t
+ *   - Extern variables: max_gen, n_tasks, n_cpufreqs, n_offloadingratios, n_clouds, n_pops, n_islands, n_offsprings, n_workers, cache_size, init_random, localsearch_*, islands, n_networks, n_net_commanders, TEE, variant_name, save_results, report_interval, report_binary, checkpoint_interval, resume, profiling, profile_interval, conf_compiled, etc.
+ *   - Function prototypes: add_mem, add_cpufreq, add_task, add_offloadingratio, add_cloud, add_network, add_net_commander, *_compiled_conf, save_text_conf, setup_costparams, eval_tasks, *_taskcostvec, get_task_memreq, compile_taskcosts, get_taskcost, *_gene(s), *_attr(s), *_cache*, generank_*, init_report, *_island(s), add_crossover_stats, *_workers, close_report, add_report, get_best_gene, get_result_path, *_report_state, resume_report, run_GA, *_checkpoint, prof_switch, get_profcounts, *_profile*, *_variants
+ *   - Macros: GENE_COSTS, GENE_COSTS_SUM, GENE_MEMSUM, PROF_ENTER, PROF_LEAVE, PROF_COUNT
  */
 #ifndef _GASTASK_H_
 #define _GASTASK_H_
 
 #include "common.h"
 
-#define MAX_TASKS	200
-#define MAX_NETWORKS	200 
 #define MAX_CPU_FREQS	5
 #define MAX_MEMS	5
-#define MAX_NETCOMMANDERS 200 
 #define MAX_OFFLOADING_RATIOS	5 
 #define MAX_CLOUDS		5 
 #define MAX_ATTRTYPES	5
 
+typedef unsigned long long	attrword_t;
+
+#define ATTRWORD_BITS	64
+
+/* attribute types assigned to every task by a gene */
+typedef enum {
+	ATTR_MEM,
+	ATTR_CLOUD,
+	ATTR_CPUFREQ,
+	ATTR_OFFLOADINGRATIO,
+	N_ATTRS
+} attr_t;
+
+/* packing of the values of an attribute type into the words of a gene */
+typedef struct {
+	unsigned	bits, per_word;
+	attrword_t	mask;
+	unsigned	word_off, n_words;
+} attrpack_t;
+
+/* number of tasks per attribute value and the most frequent value */
 typedef struct {
-	unsigned char	attrs[MAX_TASKS];
 	unsigned	n_tasks_per_type[MAX_ATTRTYPES];
 	unsigned	max_type;
 } taskattrs_t;
 
+/* per-task contribution to the fitness of a gene */
+typedef struct {
+	double		util, power_cpu, power_mem, power_net_com;
+	unsigned	n_violations;
+} taskcost_t;
+
+/*
+ * Header of a gene, which is followed by n_attrwords words of packed attributes,
+ * n_tasks per-task costs, n_tasks + 1 running sums of the costs and n_tasks + 1
+ * running sums of the memory used per memory type.
+ * Genes are gene_size bytes long and live in arenas from alloc_genes().
+ */
 typedef struct {
-	taskattrs_t	taskattrs_mem;
-	taskattrs_t taskattrs_cloud; 
-	taskattrs_t	taskattrs_cpufreq;
-	taskattrs_t	taskattrs_offloadingratio; 
 	double		util, power, score, mem_power, cpu_power, power_netcom; 
 	unsigned 	period_violation; 
-	struct list_head	list_util;
-	struct list_head	list_power;
-	struct list_head	list_score;
+	attrword_t	words[];
 } gene_t;
 
+#define GENE_COSTS(gene)	((taskcost_t *)((gene)->words + n_attrwords))
+#define GENE_COSTS_SUM(gene)	(GENE_COSTS(gene) + n_tasks)	/* costs_sum[i]: sum of costs[0 .. i - 1] */
+#define GENE_MEMSUM(gene)	((double *)(GENE_COSTS_SUM(gene) + n_tasks + 1))	/* memsum[i * n_mems + m]: memory of type m used by tasks 0 .. i - 1 */
+
+/* genes sorted in ascending order of the double field at key_offset */
+typedef struct {
+	gene_t		**genes;
+	unsigned	n_genes, max_genes;
+	size_t		key_offset;
+} generank_t;
+
+typedef struct workers	workers_t;
+
+/* crossover attempts and their rejections by reason */
+typedef struct {
+	unsigned long long	n_tries;
+	unsigned long long	n_rejected_mem, n_rejected_cutoff, n_rejected_worse;
+	unsigned long long	n_prescreened;	/* rejected by bounds before evaluation */
+} crossover_stats_t;
+
+/* outcome of evaluating a gene */
+typedef enum {
+	FIT_OK,		/* within memory capacity and cutoff */
+	FIT_MEM,	/* memory capacity exceeded, not evaluated */
+	FIT_UTIL	/* utilization over cutoff, power and score not set */
+} fitstatus_t;
+
+/* fitness of a gene as stored in a fitness cache */
+typedef struct {
+	fitstatus_t	status;
+	double		util, power, score, mem_power, cpu_power, power_netcom;
+	unsigned	period_violation;
+} fitness_t;
+
+typedef struct cache	cache_t;
+
+typedef struct {
+	unsigned	n_entries;
+	unsigned long long	n_hits, n_misses, n_evictions;
+} cache_stats_t;
+
+/* child bred by a worker in batched crossover */
+typedef struct {
+	gene_t		*newborn;	/* worst gene replaced by the child */
+	gene_t		*child;
+	rng_t		rng;
+	BOOL		born;
+	crossover_stats_t	stats;
+} offspring_t;
+
+/* running sums over the genes of an island, updated as genes are replaced */
+typedef struct {
+	double		util_sum, util_comp;	/* compensated sum and its lost low-order part */
+	double		power_sum, power_comp;	/* of genes with util <= 1.0 */
+	unsigned	n_valid;		/* genes with util <= 1.0 */
+} popstats_t;
+
+/* progress of run_GA() saved in checkpoints */
+typedef struct {
+	unsigned	gen, gen_improved;
+	double		score_best, elapsed;
+} progress_t;
+
+/* state of report.txt saved in checkpoints */
+typedef struct {
+	long		offset;		/* length of report.txt */
+	long		offset_bin;	/* length of report.bin */
+	crossover_stats_t	stats_reported;
+	unsigned	gen_reported;
+} report_state_t;
+
+/* phases of GA timed by profiling, PHASE_NONE being outside any phase */
+typedef enum {
+	PHASE_NONE,
+	PHASE_INIT,
+	PHASE_SELECTION,
+	PHASE_CROSSOVER,
+	PHASE_EVALUATION,
+	PHASE_SORTING,
+	PHASE_LOCALSEARCH,
+	PHASE_MIGRATION,
+	PHASE_REPORTING,
+	N_PHASES
+} phase_t;
+
+/* events counted by profiling */
+typedef enum {
+	PROF_EVALS,		/* gene evaluations */
+	PROF_TASK_EVALS,	/* task costs summed by gene evaluations */
+	PROF_SELECTIONS,	/* parents selected */
+	PROF_RANK_STEPS,	/* bisection steps, scanned and shifted entries of rank indices */
+	PROF_RETRIES,		/* crossover attempts after the first one of a child */
+	N_PROFCOUNTERS
+} profcounter_t;
+
+/* GA population of an island, evolved by its own thread in island mode */
 typedef struct {
 	unsigned	no;
-	unsigned	wcet;
-	unsigned	period;
-	unsigned	memreq;
-	double		mem_active_ratio;
-	unsigned	task_size;
-	unsigned 	input_size;
-	unsigned	output_size;
-	unsigned	offloading_bool;
-} task_t;
+	gene_t		*genes;
+	generank_t	genes_by_util, genes_by_power, genes_by_score;
+	unsigned	gen;
+	rng_t		rng;
+	double		util_init;
+	unsigned	n_feasible_init;	/* initial genes within memory capacities and cutoff */
+	offspring_t	*offsprings;
+	workers_t	*workers;
+	cache_t		*cache;		/* NULL if fitness caching is off */
+	unsigned long long	n_moves, n_moves_improved;	/* local search */
+	crossover_stats_t	stats;
+	popstats_t	popstats;
+} island_t;
+
+/* task model in structure-of-arrays layout, indexed by task number and grown by add_task() */
+typedef struct {
+	double		*wcet;
+	double		*period;
+	double		*memreq;
+	double		*mem_active_ratio;
+	unsigned	*task_size;
+	unsigned 	*input_size;
+	unsigned	*output_size;
+	unsigned	*offloading_bool;
+	/* per-task constants of the normal and TEE models, set by compile_taskcosts() */
+	double		*transtime;
+	double		*netcomtime, *netcomtime_tee;
+	double		*cloudscale, *cloudscale_tee;
+} taskset_t;
+
+/* resource assignment shared by the tasks evaluated by eval_tasks() */
+typedef struct {
+	double		wcet_scaled_cpu, wcet_scaled_mem, wcet_scaled_cloud;
+	double		cpu_power_unit;
+	double		mem_power_active, mem_power_idle;
+	double		offloadingratio;
+	BOOL		tee;
+} costparams_t;
+
+/* task costs in structure-of-arrays layout, filled by eval_tasks() */
+typedef struct {
+	double		*util, *power_cpu, *power_mem, *power_net_com, *deadline;
+} taskcostvec_t;
 
 typedef struct {
 	double		wcet_scale;
@@ -87,20 +240,40 @@ extern unsigned	n_cpufreqs;
 extern unsigned	n_offloadingratios; 
 extern unsigned n_clouds; 
 extern unsigned	n_pops;
+extern unsigned	n_islands;
+extern unsigned	n_offsprings, n_workers;
+extern unsigned	migration_interval, migration_size;
+extern unsigned	stagnation_gens;
+extern double	min_improvement, time_budget;
+extern unsigned	cache_size;
+extern BOOL	init_random;
+extern unsigned	localsearch_interval, localsearch_elites, localsearch_moves;
 extern unsigned n_networks; 
 extern unsigned n_net_commanders; 
 
 // TEE
 extern unsigned TEE;
 
-extern struct list_head	genes_by_util;
-extern struct list_head	genes_by_power;
-extern gene_t	*genes;
+extern const char	*variant_name;
+extern BOOL	save_results;
+extern unsigned	report_interval;
+extern BOOL	report_binary;
+extern unsigned	checkpoint_interval;
+extern BOOL	resume;
+extern BOOL	profiling;
+extern unsigned	profile_interval;
+extern BOOL	conf_compiled;
+
+extern island_t	*islands;
+extern taskset_t	tasks;
+extern attrpack_t	attrpacks[];
+extern unsigned	n_attrwords;
+extern size_t	gene_size;
 extern cpufreq_t	cpufreqs[];
 extern double	offloadingratios[]; 
 extern cloud_t	clouds[]; 
-extern network_t networks[]; 
-extern net_commander_t net_commands[]; 
+extern network_t *networks; 
+extern net_commander_t *net_commanders; 
 
 extern double	cutoff, penalty;
 
@@ -117,13 +290,85 @@ void add_cloud(const char *typestr, double computation_power, double power_activ
 void add_network(unsigned uplink, unsigned downlink); 
 void add_net_commander(unsigned intercept_out, unsigned intercept_in); 
 
-void get_task_utilpower(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, double *putil, double *ppower_cpu, double *ppower_mem, double *ppower_net_com, double *pdeadline);
+BOOL is_compiled_conf(const conf_t *conf);
+void load_compiled_conf(conf_t *conf);
+void save_compiled_conf(const char *path);
+void save_text_conf(const char *path);
+
+void setup_costparams(costparams_t *params, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, BOOL tee);
+void eval_tasks(const costparams_t *params, unsigned start, unsigned end, taskcostvec_t *costs);
+void alloc_taskcostvec(taskcostvec_t *costs, unsigned n);
+void free_taskcostvec(taskcostvec_t *costs);
 unsigned get_task_memreq(unsigned no_task);
+void compile_taskcosts(void);
+const taskcost_t *get_taskcost(unsigned no_task, unsigned char mem_type, unsigned char cloud_type, unsigned char cpufreq_type, unsigned char offloadingratio, BOOL tee);
+
+unsigned get_attr_domain(attr_t attr);
+void init_gene_layout(void);
+gene_t *alloc_genes(unsigned n_genes);
+gene_t *get_gene(gene_t *genes, unsigned idx);
+void copy_gene(gene_t *dst, const gene_t *src);
+unsigned char get_attr(const gene_t *gene, attr_t attr, unsigned no_task);
+void set_attr(gene_t *gene, attr_t attr, unsigned no_task, unsigned char value);
+void unpack_attrs(const gene_t *gene, attr_t attr, unsigned start, unsigned end, unsigned char *values);
+void inherit_attrs(gene_t *newborn, const gene_t *gene1, const gene_t *gene2, attr_t attr, unsigned crosspt);
+
+cache_t *create_cache(unsigned n_entries, BOOL shared);
+BOOL cache_lookup(cache_t *cache, const gene_t *gene, fitness_t *fitness);
+void cache_insert(cache_t *cache, const gene_t *gene, const fitness_t *fitness);
+void get_cache_stats(cache_t *cache, cache_stats_t *stats);
+void destroy_cache(cache_t *cache);
+
+void init_generank(generank_t *rank, size_t key_offset, unsigned max_genes);
+void generank_add(generank_t *rank, gene_t *gene);
+void generank_del(generank_t *rank, gene_t *gene);
+gene_t *generank_get(generank_t *rank, unsigned pos);
 
 void init_report(void);
 void close_report(void);
 void add_report(unsigned gen);
+void add_last_report(unsigned gen);
+unsigned get_next_report_gen(unsigned gen);
+gene_t *get_best_gene(void);
+void get_result_path(const char *name, const char *ext, char *path, size_t size);
+void get_report_state(report_state_t *state);
+void resume_report(const report_state_t *state);
+
+void setup_island(island_t *island, unsigned no);
+void init_island(island_t *island, unsigned no, int seed);
+void restore_gene_costs(gene_t *gene);
+void evolve_island(island_t *island, unsigned gen_stop);
+void recheck_island(island_t *island);
+void immigrate_gene(island_t *island, const gene_t *gene);
+void add_crossover_stats(crossover_stats_t *sum, const crossover_stats_t *stats);
+
+workers_t *create_workers(unsigned n_threads);
+void run_workers(workers_t *workers, void (*func)(void *arg, unsigned idx), void *arg, unsigned n_jobs);
+void destroy_workers(workers_t *workers);
+
+void start_islands(int seed);
+void resume_islands(void);
+void evolve_islands(unsigned gen_stop);
+void migrate_islands(void);
+void stop_islands(void);
+
+void run_GA(int seed);
+
+void save_checkpoint(const progress_t *progress);
+void load_checkpoint(progress_t *progress);
+
+phase_t prof_switch(phase_t phase);
+unsigned long long *get_profcounts(void);
+void start_profile(void);
+void add_profile_line(void);
+void save_profile(void);
+
+/* with profiling off, instrumentation only tests the flag */
+#define PROF_ENTER(phase)	(profiling ? prof_switch(phase) : PHASE_NONE)
+#define PROF_LEAVE(phase_left)	do { if (profiling) prof_switch(phase_left); } while (0)
+#define PROF_COUNT(counter, n)	do { if (profiling) get_profcounts()[counter] += (n); } while (0)
 
-void run_GA(void);
+BOOL parse_variants(const char *list);
+int run_variants(int seed);
 
 #endif
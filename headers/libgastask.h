@@ -0,0 +1,102 @@
+/*
+ * libgastask.h
+ * C API of libgastask, the GA scheduler of gastask as a shared library.
+ *
+ * Provides:
+ *   - Data structures: gastask_params_t, gastask_cpufreq_t, gastask_mem_t, gastask_cloud_t, gastask_network_t,
+ *     gastask_net_commander_t, gastask_tasks_t, gastask_problem_t, gastask_result_t
+ *   - gastask_init_params(): Sets GA parameters to the defaults of gastask
+ *   - gastask_optimize(): Runs GA on a problem and returns its best assignment
+ *
+ * A problem holds the sections of a gastask configuration as arrays. Tasks are
+ * given as one array per attribute, in the order of the *task section.
+ * gastask_optimize() is re-entrant: it keeps no state between calls and may be
+ * called from several threads at once.
+ */
+#ifndef _LIBGASTASK_H_
+#define _LIBGASTASK_H_
+
+/* *genetic section, its options and the command line options of gastask */
+typedef struct {
+	unsigned	max_gen, n_pops;
+	double		cutoff, penalty;
+	int		seed;
+	unsigned	tee;
+	unsigned	n_islands, n_workers, n_offsprings;
+	unsigned	migration_interval, migration_size;
+	unsigned	stagnation_gens;
+	double		min_improvement, time_budget;
+	unsigned	cache_size;
+	int		init_random;
+	unsigned	localsearch_interval, localsearch_elites, localsearch_moves;
+} gastask_params_t;
+
+typedef struct {
+	double	wcet_scale, power_active, power_idle;
+} gastask_cpufreq_t;
+
+typedef struct {
+	const char	*type;
+	unsigned	max_capacity;
+	double		wcet_scale, power_active, power_idle;
+} gastask_mem_t;
+
+typedef struct {
+	const char	*type;
+	double		computation_power, power_active, power_idle;
+	unsigned	max_capacity;
+	double		offloading_limit;
+} gastask_cloud_t;
+
+typedef struct {
+	unsigned	uplink, downlink;
+} gastask_network_t;
+
+typedef struct {
+	unsigned	intercept_out, intercept_in;
+} gastask_net_commander_t;
+
+typedef struct {
+	unsigned	n_tasks;
+	const unsigned	*wcet, *period, *memreq;
+	const double	*mem_active_ratio;
+	const unsigned	*task_size, *input_size, *output_size, *offloading_bool;
+} gastask_tasks_t;
+
+typedef struct {
+	const gastask_cpufreq_t	*cpufreqs;
+	unsigned	n_cpufreqs;
+	const gastask_mem_t	*mems;
+	unsigned	n_mems;
+	const gastask_cloud_t	*clouds;
+	unsigned	n_clouds;
+	const double	*offloadingratios;
+	unsigned	n_offloadingratios;
+	const gastask_network_t	*networks;
+	unsigned	n_networks;
+	const gastask_net_commander_t	*net_commanders;
+	unsigned	n_net_commanders;
+	gastask_tasks_t	tasks;
+} gastask_problem_t;
+
+/*
+ * Best assignment found, as printed by gastask and saved in task.txt.
+ * The attribute arrays are provided by the caller with n_tasks entries each,
+ * and are filled unless NULL.
+ */
+typedef struct {
+	double		power, util;
+	double		cpu_power, mem_power, network_power;
+	unsigned	period_violation;
+	unsigned char	*mem_types, *cpufreqs, *clouds, *offloadingratios;
+} gastask_result_t;
+
+void gastask_init_params(gastask_params_t *params);
+
+/*
+ * Returns 0 on success, the exit code of gastask if GA failed, e.g. 2 for an
+ * invalid problem or 3 if no feasible gene was found, or -1 if GA could not be run.
+ */
+int gastask_optimize(const gastask_problem_t *problem, const gastask_params_t *params, gastask_result_t *result);
+
+#endif
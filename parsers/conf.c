@@ -4,12 +4,24 @@
  *
  * Provides:
  *   - Utility functions for trimming whitespace and identifying configuration sections
+ *   - read_conf_line(), read_section_line(): Line reader over the configuration mapped into memory
+ *   - is_blank_line(): Whether a line has only spaces and tabs
+ *   - scan_line(): Converts the fields of a line without the format parsing of sscanf()
  *   - Functions to skip or parse specific sections (e.g., memory)
  *   - Main entry point to load and process the configuration file
+ *
+ * The configuration is mapped into memory and read in a single pass. A line is
+ * copied into the line buffer of conf_t without its line break, so LF and CRLF
+ * files are read alike. A section ends at a blank line or at the next section
+ * line, which is left unread for parse_conf().
  */
 
 #include "gastask.h"
 
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+
 char *
 trim(char *str)
 {
@@ -44,17 +56,17 @@ check_section(const char *line)
 		return SECT_MEM;
 	if (strncmp(line + 1, "task", 4) == 0)
 		return SECT_TASK;
-	if(strncmp(line + 1, "gennetwork", 10) == 0) 
+	if(strncmp(line + 1, "gennetwork", 10) == 0)
 		return SECT_GENNETWORK;
-	if(strncmp(line + 1, "gennetcommander", 15) == 0) 
+	if(strncmp(line + 1, "gennetcommander", 15) == 0)
 		return SECT_GENNETCOMMANDER;
-	if(strncmp(line + 1, "cloud", 5) == 0) 
+	if(strncmp(line + 1, "cloud", 5) == 0)
 		return SECT_CLOUD;
-	if(strncmp(line + 1, "offloadingratio", 15) == 0) 
+	if(strncmp(line + 1, "offloadingratio", 15) == 0)
 		return SECT_OFFLOADINGRATIO;
-	if(strncmp(line + 1, "network", 7) == 0) 
+	if(strncmp(line + 1, "network", 7) == 0)
 		return SECT_NETWORK;
-	if(strncmp(line + 1, "netcommander", 12) == 0) 
+	if(strncmp(line + 1, "netcommander", 12) == 0)
 		return SECT_NET_COMMANDER;
 	// TEE
 	if(strncmp(line + 1, "TEE", 3) == 0)
@@ -62,49 +74,141 @@ check_section(const char *line)
 	return SECT_UNKNOWN;
 }
 
-void
-skip_section(FILE *fp)
+/* read the next line into conf->line, or return FALSE at the end of the configuration */
+BOOL
+read_conf_line(conf_t *conf)
 {
-	char	buf[1024];
+	const char	*eol;
+	size_t	len;
+
+	if (conf->next >= conf->end)
+		return FALSE;
 
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '#')
+	conf->line_start = conf->next;
+	eol = memchr(conf->next, '\n', conf->end - conf->next);
+	if (eol == NULL)
+		eol = conf->end;
+	conf->next = eol < conf->end ? eol + 1 : eol;
+
+	len = eol - conf->line_start;
+	if (len > 0 && conf->line_start[len - 1] == '\r')
+		len--;
+	if (len >= CONF_MAX_LINE)
+		FATAL(2, "cannot load configuration: too long line: %.40s...", conf->line_start);
+	memcpy(conf->line, conf->line_start, len);
+	conf->line[len] = '\0';
+	return TRUE;
+}
+
+BOOL
+is_blank_line(const char *line)
+{
+	return line[strspn(line, " \t")] == '\0';
+}
+
+/*
+ * Read the next line of the current section, skipping comments. At a blank
+ * line or a section line, FALSE is returned and the line is left unread.
+ */
+BOOL
+read_section_line(conf_t *conf)
+{
+	while (read_conf_line(conf)) {
+		if (conf->line[0] == '#')
 			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
+		if (is_blank_line(conf->line) || conf->line[0] == '*') {
+			conf->next = conf->line_start;
+			return FALSE;
 		}
+		return TRUE;
 	}
+	return FALSE;
+}
+
+/*
+ * Convert the whitespace-separated fields of line as given by fields:
+ * 'u' for unsigned, 'f' for double, 's' for a string into a buffer of
+ * CONF_MAX_LINE bytes and '-' for a field to be skipped. As sscanf(), the number
+ * of converted fields before the first missing or invalid one is returned.
+ */
+int
+scan_line(const char *line, const char *fields, ...)
+{
+	va_list	ap;
+	const char	*p = line;
+	char	*end;
+	int	n_scanned = 0;
+
+	va_start(ap, fields);
+	for (; *fields != '\0'; fields++, p = end) {
+		size_t	len;
+
+		p += strspn(p, " \t");
+		if (*p == '\0')
+			break;
+		switch (*fields) {
+		case 'u': {
+			unsigned long	value = strtoul(p, &end, 10);
+
+			if (end == p)
+				goto out;
+			*va_arg(ap, unsigned *) = value;
+			break;
+		}
+		case 'f': {
+			double	value = strtod(p, &end);
+
+			if (end == p)
+				goto out;
+			*va_arg(ap, double *) = value;
+			break;
+		}
+		case 's': {
+			char	*str = va_arg(ap, char *);
+
+			len = strcspn(p, " \t");
+			memcpy(str, p, len);
+			str[len] = '\0';
+			end = (char *)p + len;
+			break;
+		}
+		default:
+			end = (char *)p + strcspn(p, " \t");
+			continue;
+		}
+		n_scanned++;
+	}
+out:
+	va_end(ap);
+	return n_scanned;
 }
 
 void
-parse_mem(FILE *fp)
+skip_section(conf_t *conf)
 {
-	char	buf[1024];
+	while (read_section_line(conf));
+}
 
-	while (fgets(buf, 1024, fp)) {
+void
+parse_mem(conf_t *conf)
+{
+	while (read_section_line(conf)) {
 		unsigned	max_capacity;
 		double		wcet_scale, power_active, power_idle;
-		char		type[1024];
+		char		type[CONF_MAX_LINE];
 
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%s %u %lf %lf %lf", type, &max_capacity, &wcet_scale, &power_active, &power_idle) != 5) {
-			FATAL(2, "cannot load configuration: invalid memory spec: %s", trim(buf));
+		if (scan_line(conf->line, "sufff", type, &max_capacity, &wcet_scale, &power_active, &power_idle) != 5) {
+			FATAL(2, "cannot load configuration: invalid memory spec: %s", trim(conf->line));
 		}
 
 		if (max_capacity == 0) {
-			FATAL(2, "invalid max memory capacity: %s", trim(buf));
+			FATAL(2, "invalid max memory capacity: %s", trim(conf->line));
 		}
 		if (wcet_scale < 0 || wcet_scale > 1) {
-			FATAL(2, "invalid memory wcet scale: %s", trim(buf));
+			FATAL(2, "invalid memory wcet scale: %s", trim(conf->line));
 		}
 		if (power_active < 0 || power_idle < 0) {
-			FATAL(2, "invalid memory power: %s", trim(buf));
+			FATAL(2, "invalid memory power: %s", trim(conf->line));
 		}
 
 		add_mem(type, max_capacity, wcet_scale, power_active, power_idle);
@@ -114,14 +218,32 @@ parse_mem(FILE *fp)
 void
 load_conf(const char *fpath)
 {
-	FILE	*fp;
+	conf_t	conf;
+	struct stat	st;
+	void	*data = NULL;
+	int	fd;
 
-	fp = fopen(fpath, "r");
-	if (fp == NULL) {
+	fd = open(fpath, O_RDONLY);
+	if (fd < 0) {
 		FATAL(1, "configuration not found: %s", fpath);
 	}
+	if (fstat(fd, &st) < 0) {
+		FATAL(1, "cannot load configuration: %s", fpath);
+	}
+	if (st.st_size > 0) {
+		data = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+		if (data == MAP_FAILED) {
+			FATAL(1, "cannot map configuration: %s", fpath);
+		}
+		madvise(data, st.st_size, MADV_SEQUENTIAL);
+	}
+	close(fd);
 
-	parse_conf(fp);
+	memset(&conf, 0, sizeof(conf));
+	conf.data = conf.next = (const char *)data;
+	conf.end = conf.data + st.st_size;
+	parse_conf(&conf);
 
-	fclose(fp);
+	if (data != NULL)
+		munmap(data, st.st_size);
 }
@@ -0,0 +1,509 @@
+/*
+ * conf_compiled.c
+ * Compiled configuration of the gastask module, loaded without parsing.
+ *
+ * Provides:
+ *   - conf_compiled: Whether the last configuration loaded was a compiled one
+ *   - is_compiled_conf(): Whether a configuration mapped into memory is a compiled one
+ *   - load_compiled_conf(): Loads the genetic parameters, resources and tasks of a compiled configuration
+ *   - save_compiled_conf(): Writes the loaded configuration as a compiled one
+ *   - save_text_conf(): Writes the loaded configuration as a text one
+ *
+ * A compiled configuration starts with a magic, the FNV-1a hash and the size of
+ * its payload. The payload holds the genetic parameters and, for each section,
+ * its number of entries followed by one flat array per field, in the order of
+ * the fields of the text section. Numbers are in host byte order.
+ * Generation-only sections (*gentask, *gennetwork, *gennetcommander) are not kept.
+ */
+
+#include "gastask.h"
+
+#define CONF_COMPILED_MAGIC	"GACONFB1"
+#define CONF_MAGIC_SIZE		8
+
+BOOL	conf_compiled;
+
+typedef struct {
+	char		magic[CONF_MAGIC_SIZE];
+	unsigned long long	hash;
+	unsigned long long	size;
+} conf_header_t;
+
+/* genetic parameters and options */
+typedef struct {
+	unsigned	max_gen, n_pops;
+	double		cutoff, penalty;
+	unsigned	migration_interval, migration_size;
+	unsigned	n_offsprings;
+	unsigned	stagnation_gens;
+	double		min_improvement;
+	unsigned	init_random;
+	unsigned	cache_size;
+	unsigned	localsearch_interval, localsearch_elites, localsearch_moves;
+	unsigned	report_interval, report_binary;
+	unsigned	TEE;
+} conf_genetic_t;
+
+/* payload being read, with bounds checked on every read */
+typedef struct {
+	const char	*p, *end;
+} conf_reader_t;
+
+/* payload being written, grown as needed */
+typedef struct {
+	char	*data;
+	size_t	len, size;
+} conf_writer_t;
+
+BOOL
+is_compiled_conf(const conf_t *conf)
+{
+	return conf->end - conf->data >= CONF_MAGIC_SIZE && memcmp(conf->data, CONF_COMPILED_MAGIC, CONF_MAGIC_SIZE) == 0;
+}
+
+static const void *
+take(conf_reader_t *reader, size_t len)
+{
+	const void	*p = reader->p;
+
+	if ((size_t)(reader->end - reader->p) < len) {
+		FATAL(2, "cannot load configuration: truncated compiled configuration");
+	}
+	reader->p += len;
+	return p;
+}
+
+static unsigned
+take_unsigned(conf_reader_t *reader)
+{
+	unsigned	value;
+
+	memcpy(&value, take(reader, sizeof(value)), sizeof(value));
+	return value;
+}
+
+static double
+take_double(conf_reader_t *reader)
+{
+	double	value;
+
+	memcpy(&value, take(reader, sizeof(value)), sizeof(value));
+	return value;
+}
+
+static const char *
+take_string(conf_reader_t *reader)
+{
+	unsigned	len = take_unsigned(reader);
+	const char	*str = take(reader, len + 1);
+
+	if (str[len] != '\0') {
+		FATAL(2, "cannot load configuration: invalid string in compiled configuration");
+	}
+	return str;
+}
+
+/* a column of n values, read element by element since it may be unaligned */
+static const char *
+take_column(conf_reader_t *reader, unsigned n, size_t elem_size)
+{
+	return take(reader, (size_t)n * elem_size);
+}
+
+static unsigned
+column_unsigned(const char *column, unsigned i)
+{
+	unsigned	value;
+
+	memcpy(&value, column + (size_t)i * sizeof(value), sizeof(value));
+	return value;
+}
+
+static double
+column_double(const char *column, unsigned i)
+{
+	double	value;
+
+	memcpy(&value, column + (size_t)i * sizeof(value), sizeof(value));
+	return value;
+}
+
+static void
+load_genetic(conf_reader_t *reader)
+{
+	conf_genetic_t	genetic;
+
+	memcpy(&genetic, take(reader, sizeof(genetic)), sizeof(genetic));
+	max_gen = genetic.max_gen;
+	n_pops = genetic.n_pops;
+	cutoff = genetic.cutoff;
+	penalty = genetic.penalty;
+	migration_interval = genetic.migration_interval;
+	migration_size = genetic.migration_size;
+	n_offsprings = genetic.n_offsprings;
+	stagnation_gens = genetic.stagnation_gens;
+	min_improvement = genetic.min_improvement;
+	init_random = genetic.init_random;
+	cache_size = genetic.cache_size;
+	localsearch_interval = genetic.localsearch_interval;
+	localsearch_elites = genetic.localsearch_elites;
+	localsearch_moves = genetic.localsearch_moves;
+	report_interval = genetic.report_interval;
+	report_binary = genetic.report_binary;
+	TEE = genetic.TEE;
+}
+
+static void
+load_resources(conf_reader_t *reader)
+{
+	const char	*col1, *col2, *col3;
+	unsigned	n, i;
+
+	n = take_unsigned(reader);
+	col1 = take_column(reader, n, sizeof(double));
+	col2 = take_column(reader, n, sizeof(double));
+	col3 = take_column(reader, n, sizeof(double));
+	for (i = 0; i < n; i++)
+		add_cpufreq(column_double(col1, i), column_double(col2, i), column_double(col3, i));
+
+	n = take_unsigned(reader);
+	for (i = 0; i < n; i++) {
+		const char	*typestr = take_string(reader);
+		unsigned	max_capacity = take_unsigned(reader);
+		double		wcet_scale = take_double(reader);
+		double		power_active = take_double(reader);
+
+		add_mem(typestr, max_capacity, wcet_scale, power_active, take_double(reader));
+	}
+
+	n = take_unsigned(reader);
+	for (i = 0; i < n; i++) {
+		const char	*typestr = take_string(reader);
+		double		computation_power = take_double(reader);
+		double		power_active = take_double(reader);
+		double		power_idle = take_double(reader);
+		unsigned	max_capacity = take_unsigned(reader);
+
+		add_cloud(typestr, computation_power, power_active, power_idle, max_capacity, take_double(reader));
+	}
+
+	n = take_unsigned(reader);
+	col1 = take_column(reader, n, sizeof(double));
+	for (i = 0; i < n; i++)
+		add_offloadingratio(column_double(col1, i));
+
+	n = take_unsigned(reader);
+	col1 = take_column(reader, n, sizeof(unsigned));
+	col2 = take_column(reader, n, sizeof(unsigned));
+	for (i = 0; i < n; i++)
+		add_network(column_unsigned(col1, i), column_unsigned(col2, i));
+
+	n = take_unsigned(reader);
+	col1 = take_column(reader, n, sizeof(unsigned));
+	col2 = take_column(reader, n, sizeof(unsigned));
+	for (i = 0; i < n; i++)
+		add_net_commander(column_unsigned(col1, i), column_unsigned(col2, i));
+}
+
+static void
+load_tasks(conf_reader_t *reader)
+{
+	const char	*wcet, *period, *memreq, *mem_active_ratio;
+	const char	*task_size, *input_size, *output_size, *offloading_bool;
+	unsigned	n, i;
+
+	n = take_unsigned(reader);
+	wcet = take_column(reader, n, sizeof(unsigned));
+	period = take_column(reader, n, sizeof(unsigned));
+	memreq = take_column(reader, n, sizeof(unsigned));
+	mem_active_ratio = take_column(reader, n, sizeof(double));
+	task_size = take_column(reader, n, sizeof(unsigned));
+	input_size = take_column(reader, n, sizeof(unsigned));
+	output_size = take_column(reader, n, sizeof(unsigned));
+	offloading_bool = take_column(reader, n, sizeof(unsigned));
+
+	if (n > 0 && n_cpufreqs == 0) {
+		FATAL(2, "cpu frequency section should be defined ahead of task section");
+	}
+	for (i = 0; i < n; i++) {
+		if (column_unsigned(wcet, i) >= column_unsigned(period, i)) {
+			FATAL(2, "wcet is larger or equal than period: task %u", i + 1);
+		}
+		add_task(column_unsigned(wcet, i), column_unsigned(period, i), column_unsigned(memreq, i),
+			 column_double(mem_active_ratio, i), column_unsigned(task_size, i),
+			 column_unsigned(input_size, i), column_unsigned(output_size, i), column_unsigned(offloading_bool, i));
+	}
+}
+
+void
+load_compiled_conf(conf_t *conf)
+{
+	conf_header_t	header;
+	conf_reader_t	reader;
+
+	if ((size_t)(conf->end - conf->data) < sizeof(header)) {
+		FATAL(2, "cannot load configuration: truncated compiled configuration");
+	}
+	memcpy(&header, conf->data, sizeof(header));
+	if (header.size != (unsigned long long)(conf->end - conf->data) - sizeof(header)) {
+		FATAL(2, "cannot load configuration: truncated compiled configuration");
+	}
+
+	reader.p = conf->data + sizeof(header);
+	reader.end = conf->end;
+	if (hash_bytes(HASH_INIT, reader.p, header.size) != header.hash) {
+		FATAL(2, "cannot load configuration: compiled configuration is corrupted");
+	}
+
+	load_genetic(&reader);
+	load_resources(&reader);
+	load_tasks(&reader);
+	if (reader.p != reader.end) {
+		FATAL(2, "cannot load configuration: trailing data in compiled configuration");
+	}
+	conf->next = conf->end;
+	conf_compiled = TRUE;
+}
+
+static void
+put(conf_writer_t *writer, const void *data, size_t len)
+{
+	if (writer->len + len > writer->size) {
+		while (writer->len + len > writer->size)
+			writer->size = writer->size == 0 ? 4096: writer->size * 2;
+		writer->data = (char *)realloc(writer->data, writer->size);
+		if (writer->data == NULL)
+			FATAL(2, "cannot allocate compiled configuration");
+	}
+	memcpy(writer->data + writer->len, data, len);
+	writer->len += len;
+}
+
+#define PUT_VALUE(writer, value)	put(writer, &(value), sizeof(value))
+
+static void
+put_string(conf_writer_t *writer, const char *str)
+{
+	unsigned	len = strlen(str);
+
+	PUT_VALUE(writer, len);
+	put(writer, str, len + 1);
+}
+
+static void
+put_genetic(conf_writer_t *writer)
+{
+	conf_genetic_t	genetic;
+
+	/* no padding bytes of unknown value go into the hash */
+	memset(&genetic, 0, sizeof(genetic));
+	genetic.max_gen = max_gen;
+	genetic.n_pops = n_pops;
+	genetic.cutoff = cutoff;
+	genetic.penalty = penalty;
+	genetic.migration_interval = migration_interval;
+	genetic.migration_size = migration_size;
+	genetic.n_offsprings = n_offsprings;
+	genetic.stagnation_gens = stagnation_gens;
+	genetic.min_improvement = min_improvement;
+	genetic.init_random = init_random;
+	genetic.cache_size = cache_size;
+	genetic.localsearch_interval = localsearch_interval;
+	genetic.localsearch_elites = localsearch_elites;
+	genetic.localsearch_moves = localsearch_moves;
+	genetic.report_interval = report_interval;
+	genetic.report_binary = report_binary;
+	genetic.TEE = TEE;
+	PUT_VALUE(writer, genetic);
+}
+
+static void
+put_resources(conf_writer_t *writer)
+{
+	unsigned	i;
+
+	PUT_VALUE(writer, n_cpufreqs);
+	for (i = 0; i < n_cpufreqs; i++)
+		PUT_VALUE(writer, cpufreqs[i].wcet_scale);
+	for (i = 0; i < n_cpufreqs; i++)
+		PUT_VALUE(writer, cpufreqs[i].power_active);
+	for (i = 0; i < n_cpufreqs; i++)
+		PUT_VALUE(writer, cpufreqs[i].power_idle);
+
+	PUT_VALUE(writer, n_mems);
+	for (i = 0; i < n_mems; i++) {
+		put_string(writer, mems[i].typestr);
+		PUT_VALUE(writer, mems[i].max_capacity);
+		PUT_VALUE(writer, mems[i].wcet_scale);
+		PUT_VALUE(writer, mems[i].power_active);
+		PUT_VALUE(writer, mems[i].power_idle);
+	}
+
+	PUT_VALUE(writer, n_clouds);
+	for (i = 0; i < n_clouds; i++) {
+		put_string(writer, clouds[i].typestr);
+		PUT_VALUE(writer, clouds[i].computation_power);
+		PUT_VALUE(writer, clouds[i].power_active);
+		PUT_VALUE(writer, clouds[i].power_idle);
+		PUT_VALUE(writer, clouds[i].max_capacity);
+		PUT_VALUE(writer, clouds[i].offloading_limit);
+	}
+
+	PUT_VALUE(writer, n_offloadingratios);
+	put(writer, offloadingratios, n_offloadingratios * sizeof(double));
+
+	PUT_VALUE(writer, n_networks);
+	for (i = 0; i < n_networks; i++)
+		PUT_VALUE(writer, networks[i].uplink);
+	for (i = 0; i < n_networks; i++)
+		PUT_VALUE(writer, networks[i].downlink);
+
+	PUT_VALUE(writer, n_net_commanders);
+	for (i = 0; i < n_net_commanders; i++)
+		PUT_VALUE(writer, net_commanders[i].intercept_out);
+	for (i = 0; i < n_net_commanders; i++)
+		PUT_VALUE(writer, net_commanders[i].intercept_in);
+}
+
+/* a column of task values, which add_task() has kept as doubles */
+static void
+put_task_column(conf_writer_t *writer, const double *values)
+{
+	unsigned	i;
+
+	for (i = 0; i < n_tasks; i++) {
+		unsigned	value = (unsigned)values[i];
+
+		PUT_VALUE(writer, value);
+	}
+}
+
+static void
+put_tasks(conf_writer_t *writer)
+{
+	PUT_VALUE(writer, n_tasks);
+	put_task_column(writer, tasks.wcet);
+	put_task_column(writer, tasks.period);
+	put_task_column(writer, tasks.memreq);
+	put(writer, tasks.mem_active_ratio, n_tasks * sizeof(double));
+	put(writer, tasks.task_size, n_tasks * sizeof(unsigned));
+	put(writer, tasks.input_size, n_tasks * sizeof(unsigned));
+	put(writer, tasks.output_size, n_tasks * sizeof(unsigned));
+	put(writer, tasks.offloading_bool, n_tasks * sizeof(unsigned));
+}
+
+static void
+write_file(const char *path, const void *data, size_t len)
+{
+	FILE	*fp;
+
+	fp = fopen(path, "w");
+	if (fp == NULL) {
+		FATAL(1, "cannot open configuration: %s", path);
+	}
+	if (len > 0 && fwrite(data, len, 1, fp) != 1) {
+		FATAL(1, "cannot write configuration: %s", path);
+	}
+	if (fclose(fp) != 0) {
+		FATAL(1, "cannot write configuration: %s", path);
+	}
+}
+
+void
+save_compiled_conf(const char *path)
+{
+	conf_writer_t	writer = { NULL, 0, 0 };
+	conf_header_t	header;
+
+	memset(&header, 0, sizeof(header));
+	PUT_VALUE(&writer, header);
+	put_genetic(&writer);
+	put_resources(&writer);
+	put_tasks(&writer);
+
+	memcpy(header.magic, CONF_COMPILED_MAGIC, CONF_MAGIC_SIZE);
+	header.size = writer.len - sizeof(header);
+	header.hash = hash_bytes(HASH_INIT, writer.data + sizeof(header), header.size);
+	memcpy(writer.data, &header, sizeof(header));
+
+	write_file(path, writer.data, writer.len);
+	free(writer.data);
+}
+
+/* shortest decimal form of value which is read back as the same double */
+static const char *
+format_double(char *buf, double value)
+{
+	int	prec;
+
+	for (prec = 6; prec < 17; prec++) {
+		snprintf(buf, 32, "%.*g", prec, value);
+		if (strtod(buf, NULL) == value)
+			return buf;
+	}
+	snprintf(buf, 32, "%.17g", value);
+	return buf;
+}
+
+void
+save_text_conf(const char *path)
+{
+	FILE	*fp;
+	char	buf[4][32];
+	unsigned	i;
+
+	fp = fopen(path, "w");
+	if (fp == NULL) {
+		FATAL(1, "cannot open configuration: %s", path);
+	}
+
+	fprintf(fp, "# max_generations n_populations cutoff penalty\n*genetic\n");
+	fprintf(fp, "%u %u %s %s\n", max_gen, n_pops, format_double(buf[0], cutoff), format_double(buf[1], penalty));
+	fprintf(fp, "migration %u %u\n", migration_interval, migration_size);
+	fprintf(fp, "offspring %u\n", n_offsprings);
+	fprintf(fp, "stagnation %u %s\n", stagnation_gens, format_double(buf[0], min_improvement));
+	fprintf(fp, "init %s\n", init_random ? "random": "greedy");
+	fprintf(fp, "cache %u\n", cache_size);
+	fprintf(fp, "localsearch %u %u %u\n", localsearch_interval, localsearch_elites, localsearch_moves);
+	fprintf(fp, "report %u %s\n", report_interval, report_binary ? "binary": "text");
+
+	fprintf(fp, "\n# wcet_scale power_active power_idle\n*cpufreq\n");
+	for (i = 0; i < n_cpufreqs; i++)
+		fprintf(fp, "%s %s %s\n", format_double(buf[0], cpufreqs[i].wcet_scale),
+			format_double(buf[1], cpufreqs[i].power_active), format_double(buf[2], cpufreqs[i].power_idle));
+
+	fprintf(fp, "\n# type max_capacity wcet_scale power_active power_idle\n*mem\n");
+	for (i = 0; i < n_mems; i++)
+		fprintf(fp, "%s %u %s %s %s\n", mems[i].typestr, mems[i].max_capacity, format_double(buf[0], mems[i].wcet_scale),
+			format_double(buf[1], mems[i].power_active), format_double(buf[2], mems[i].power_idle));
+
+	fprintf(fp, "\n# type computation_power power_active power_idle max_capacity offloading_limit\n*cloud\n");
+	for (i = 0; i < n_clouds; i++)
+		fprintf(fp, "%s %s %s %s %u %s\n", clouds[i].typestr, format_double(buf[0], clouds[i].computation_power),
+			format_double(buf[1], clouds[i].power_active), format_double(buf[2], clouds[i].power_idle),
+			clouds[i].max_capacity, format_double(buf[3], clouds[i].offloading_limit));
+
+	fprintf(fp, "\n# offloading_ratio\n*offloadingratio\n");
+	for (i = 0; i < n_offloadingratios; i++)
+		fprintf(fp, "%s\n", format_double(buf[0], offloadingratios[i]));
+
+	fprintf(fp, "\n# TEE\n*TEE\n%u\n", TEE);
+
+	fprintf(fp, "\n# uplink downlink\n*network\n");
+	for (i = 0; i < n_networks; i++)
+		fprintf(fp, "%u %u\n", networks[i].uplink, networks[i].downlink);
+
+	fprintf(fp, "\n# intercept_out intercept_in\n*netcommander\n");
+	for (i = 0; i < n_net_commanders; i++)
+		fprintf(fp, "%u %u\n", net_commanders[i].intercept_out, net_commanders[i].intercept_in);
+
+	fprintf(fp, "\n# wcet period memreq mem_active_ratio task_size input_size output_size offloading_bool\n*task\n");
+	for (i = 0; i < n_tasks; i++)
+		fprintf(fp, "%u %u %u %s %u %u %u %u\n", (unsigned)tasks.wcet[i], (unsigned)tasks.period[i], (unsigned)tasks.memreq[i],
+			format_double(buf[0], tasks.mem_active_ratio[i]), tasks.task_size[i], tasks.input_size[i],
+			tasks.output_size[i], tasks.offloading_bool[i]);
+
+	if (fclose(fp) != 0) {
+		FATAL(1, "cannot write configuration: %s", path);
+	}
+}
@@ -24,21 +24,13 @@ extern unsigned n_net_commander_target;
 extern unsigned intercept_out_min, intercept_out_max, intercept_in_min, intercept_in_max; 
 
 static void
-parse_gentask(FILE *fp)
+parse_gentask(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u %u %lf %lf %u %u %u %u %u %u %u", &wcet_min, &wcet_max, &mem_total,
+	while (read_section_line(conf)) {
+		if (scan_line(conf->line, "uuuffuuuuuuu", &wcet_min, &wcet_max, &mem_total,
 			   &util_cpu, &util_target, &n_tasks_target, &task_size_min, &task_size_max,
 			   &input_size_min, &input_size_max, &output_size_min, &output_size_max) != 12) { 
-			FATAL(2, "cannot load configuration: invalid gentask parameters: %s", trim(buf));
+			FATAL(2, "cannot load configuration: invalid gentask parameters: %s", trim(conf->line));
 		}
 		if (util_cpu > util_target) {
 			FATAL(2, "target utilization cannot be smaller than full utilzation");
@@ -47,52 +39,34 @@ parse_gentask(FILE *fp)
 }
 
 static void
-parse_gennetwork(FILE *fp)
+parse_gennetwork(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u %u %u %u", &uplink_min, &uplink_max,
+	while (read_section_line(conf)) {
+		if (scan_line(conf->line, "uuuuu", &uplink_min, &uplink_max,
 				&downlink_min, &downlink_max, &n_networks_target) != 5) { 
-			FATAL(2, "cannot load configuration: invalid gennetwork parameters: %s", trim(buf));
+			FATAL(2, "cannot load configuration: invalid gennetwork parameters: %s", trim(conf->line));
 		}
 	}
 }
 
 static void
-parse_gennetcommander(FILE *fp)
+parse_gennetcommander(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u %u %u %u", &intercept_out_min, &intercept_out_max,
+	while (read_section_line(conf)) {
+		if (scan_line(conf->line, "uuuuu", &intercept_out_min, &intercept_out_max,
 				&intercept_in_min, &intercept_in_max, &n_net_commander_target) != 5) { 
-			FATAL(2, "cannot load configuration: invalid gencommander parameters: %s", trim(buf));
+			FATAL(2, "cannot load configuration: invalid gencommander parameters: %s", trim(conf->line));
 		}
 	}
 }
 
 void
-parse_conf(FILE *fp)
+parse_conf(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '\n' || buf[0] == '#')
+	while (read_conf_line(conf)) {
+		if (is_blank_line(conf->line) || conf->line[0] == '#')
 			continue;
-		switch (check_section(buf)) {
+		switch (check_section(conf->line)) {
 		case SECT_GENETIC:
 		case SECT_CPUFREQ:
 		case SECT_TASK:
@@ -102,22 +76,22 @@ parse_conf(FILE *fp)
 		// TEE
 		case SECT_TEE:
 		case SECT_NET_COMMANDER: 
-			skip_section(fp);
+			skip_section(conf);
 			break;
 		case SECT_MEM:
-			parse_mem(fp);
+			parse_mem(conf);
 			break;
 		case SECT_GENTASK:
-			parse_gentask(fp);
+			parse_gentask(conf);
 			break;
 		case SECT_GENNETWORK: 
-			parse_gennetwork(fp);
+			parse_gennetwork(conf);
 			break;
 		case SECT_GENNETCOMMANDER: 
-			parse_gennetcommander(fp);
+			parse_gennetcommander(conf);
 			break;
 		default:
-			errmsg("unknown section: %s", trim(buf));
+			errmsg("unknown section: %s", trim(conf->line));
 			FATAL(2, "cannot load configuration");
 		}
 	}
@@ -4,7 +4,7 @@
  *
  * Provides:
  *   - parse_conf(): Main entry point to parse the configuration file and dispatch section handlers
- *   - parse_genetic(): Parses genetic algorithm parameters
+ *   - parse_genetic(): Parses genetic algorithm parameters and options
  *   - parse_cpufreq(): Parses CPU frequency settings
  *   - parse_mem(): Parses memory type settings
  *   - parse_task(): Parses task list and attributes
@@ -14,80 +14,133 @@
  *   - parse_net_commander(): Parses net commander settings
  *   - parse_TEE(): Parses Trusted Execution Environment option
  *   - skip_section(): Skips irrelevant or generation-only sections
+ *
+ * A compiled configuration (see conf_compiled.c) is loaded instead of parsed.
  */
 
 #include "gastask.h"
 
+/* optional "<name> <values>" lines following the genetic parameters */
 static void
-parse_genetic(FILE *fp)
+parse_genetic_option(char *line)
 {
-	char	buf[1024];
+	char	name[CONF_MAX_LINE];
 
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
+	if (scan_line(line, "s", name) != 1) {
+		FATAL(2, "cannot load configuration: invalid genetic option: %s", trim(line));
+	}
+	if (strcmp(name, "migration") == 0) {
+		if (scan_line(line, "-uu", &migration_interval, &migration_size) != 2) {
+			FATAL(2, "cannot load configuration: invalid migration option: %s", trim(line));
 		}
-		if (sscanf(buf, "%u %u %lf %lf", &max_gen, &n_pops, &cutoff, &penalty) != 4) {
-			FATAL(2, "cannot load configuration: invalid genetic parameters: %s", trim(buf));
+	}
+	else if (strcmp(name, "offspring") == 0) {
+		if (scan_line(line, "-u", &n_offsprings) != 1 || n_offsprings == 0) {
+			FATAL(2, "cannot load configuration: invalid offspring option: %s", trim(line));
+		}
+	}
+	else if (strcmp(name, "stagnation") == 0) {
+		int	n_args = scan_line(line, "-uf", &stagnation_gens, &min_improvement);
+
+		if (n_args < 1 || min_improvement < 0) {
+			FATAL(2, "cannot load configuration: invalid stagnation option: %s", trim(line));
 		}
 	}
+	else if (strcmp(name, "localsearch") == 0) {
+		int	n_args = scan_line(line, "-uuu", &localsearch_interval, &localsearch_elites, &localsearch_moves);
+
+		if (n_args < 1 || localsearch_elites == 0) {
+			FATAL(2, "cannot load configuration: invalid localsearch option: %s", trim(line));
+		}
+	}
+	else if (strcmp(name, "init") == 0) {
+		char	method[CONF_MAX_LINE];
+
+		if (scan_line(line, "-s", method) != 1) {
+			FATAL(2, "cannot load configuration: invalid init option: %s", trim(line));
+		}
+		if (strcmp(method, "random") == 0)
+			init_random = TRUE;
+		else if (strcmp(method, "greedy") == 0)
+			init_random = FALSE;
+		else {
+			FATAL(2, "cannot load configuration: invalid init option: %s", trim(line));
+		}
+	}
+	else if (strcmp(name, "report") == 0) {
+		char	format[CONF_MAX_LINE] = "text";
+
+		if (scan_line(line, "-us", &report_interval, format) < 1) {
+			FATAL(2, "cannot load configuration: invalid report option: %s", trim(line));
+		}
+		if (strcmp(format, "binary") == 0)
+			report_binary = TRUE;
+		else if (strcmp(format, "text") == 0)
+			report_binary = FALSE;
+		else {
+			FATAL(2, "cannot load configuration: invalid report option: %s", trim(line));
+		}
+	}
+	else if (strcmp(name, "cache") == 0) {
+		if (scan_line(line, "-u", &cache_size) != 1) {
+			FATAL(2, "cannot load configuration: invalid cache option: %s", trim(line));
+		}
+	}
+	else {
+		FATAL(2, "cannot load configuration: unknown genetic option: %s", trim(line));
+	}
 }
 
 static void
-parse_cpufreq(FILE *fp)
+parse_genetic(conf_t *conf)
 {
-	char	buf[1024];
+	while (read_section_line(conf)) {
+		if (isalpha(conf->line[0])) {
+			parse_genetic_option(conf->line);
+			continue;
+		}
+		if (scan_line(conf->line, "uuff", &max_gen, &n_pops, &cutoff, &penalty) != 4) {
+			FATAL(2, "cannot load configuration: invalid genetic parameters: %s", trim(conf->line));
+		}
+	}
+}
 
-	while (fgets(buf, 1024, fp)) {
+static void
+parse_cpufreq(conf_t *conf)
+{
+	while (read_section_line(conf)) {
 		double	wcet_scale, power_active, power_idle;
 
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%lf %lf %lf", &wcet_scale, &power_active, &power_idle) != 3) {
-			FATAL(2, "cannot load configuration: invalid CPU frequency format: %s", trim(buf));
+		if (scan_line(conf->line, "fff", &wcet_scale, &power_active, &power_idle) != 3) {
+			FATAL(2, "cannot load configuration: invalid CPU frequency format: %s", trim(conf->line));
 		}
 
 		if (wcet_scale < 0 || wcet_scale > 1) {
-			FATAL(2, "invalid cpu frequency wcet scale: %s", trim(buf));
+			FATAL(2, "invalid cpu frequency wcet scale: %s", trim(conf->line));
 		}
 		if (power_active < 0 || power_idle < 0) {
-			FATAL(2, "invalid cpu frequency power: %s", trim(buf));
+			FATAL(2, "invalid cpu frequency power: %s", trim(conf->line));
 		}
 		add_cpufreq(wcet_scale, power_active, power_idle);
 	}	
 }
 
 static void
-parse_task(FILE *fp)
+parse_task(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
+	while (read_section_line(conf)) {
 		unsigned	wcet, period, memreq;
 		double		mem_active_ratio;
 		unsigned	task_size;
 		unsigned	input_size, output_size;
 		unsigned	offloading_bool;
 
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u %u %lf %u %u %u %u", &wcet, &period, &memreq, &mem_active_ratio, &task_size, &input_size, &output_size, &offloading_bool) != 8) {
-			FATAL(2, "cannot load configuration: invalid task format: %s", trim(buf));
+		if (scan_line(conf->line, "uuufuuuu", &wcet, &period, &memreq, &mem_active_ratio, &task_size, &input_size, &output_size, &offloading_bool) != 8) {
+			FATAL(2, "cannot load configuration: invalid task format: %s", trim(conf->line));
 		}
 
 		if (wcet >= period) {
-			FATAL(2, "wcet is larger or equal than period: %s", trim(buf));
+			FATAL(2, "wcet is larger or equal than period: %s", trim(conf->line));
 		}
 		add_task(wcet, period, memreq, mem_active_ratio, task_size, input_size, output_size, offloading_bool);
 	}
@@ -95,21 +148,13 @@ parse_task(FILE *fp)
 
 
 static void
-parse_network(FILE *fp)
+parse_network(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
+	while (read_section_line(conf)) {
 		unsigned	uplink, downlink;
 
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u", &uplink, &downlink) != 2) {
-			FATAL(2, "cannot load configuration: invalid network format: %s", trim(buf));
+		if (scan_line(conf->line, "uu", &uplink, &downlink) != 2) {
+			FATAL(2, "cannot load configuration: invalid network format: %s", trim(conf->line));
 		}
 
 		add_network(uplink, downlink);
@@ -118,21 +163,13 @@ parse_network(FILE *fp)
 
 
 static void
-parse_net_commander(FILE *fp)
+parse_net_commander(conf_t *conf)
 {
-	char	buf[1024];
-
-	while (fgets(buf, 1024, fp)) {
+	while (read_section_line(conf)) {
 		unsigned	intercept_out, intercept_in;
 
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%u %u", &intercept_out, &intercept_in) != 2) {
-			FATAL(2, "cannot load configuration: invalid network commander format: %s", trim(buf));
+		if (scan_line(conf->line, "uu", &intercept_out, &intercept_in) != 2) {
+			FATAL(2, "cannot load configuration: invalid network commander format: %s", trim(conf->line));
 		}
 
 		add_net_commander(intercept_out, intercept_in);
@@ -141,30 +178,24 @@ parse_net_commander(FILE *fp)
 
 
 void
-parse_cloud(FILE *fp)
+parse_cloud(conf_t *conf)
 {
-	char	buf[1024];
-	while (fgets(buf, 1024, fp)) {
+	while (read_section_line(conf)) {
 		double	computation_power, power_active, power_idle, offloading_limit;
 		unsigned max_capacity;
-		char	type[1024];
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%s %lf %lf %lf %u %lf", type, &computation_power, &power_active, &power_idle, &max_capacity, &offloading_limit) != 6) {
-			FATAL(2, "cannot load configuration: invalid cloud format: %s", trim(buf));
+		char	type[CONF_MAX_LINE];
+
+		if (scan_line(conf->line, "sfffuf", type, &computation_power, &power_active, &power_idle, &max_capacity, &offloading_limit) != 6) {
+			FATAL(2, "cannot load configuration: invalid cloud format: %s", trim(conf->line));
 		}
 		if(max_capacity == 0){
-			FATAL(2, "invalid max memory capacity: %s", trim(buf));
+			FATAL(2, "invalid max memory capacity: %s", trim(conf->line));
 		}
 		if (power_active < 0 || power_idle < 0) {
-			FATAL(2, "invalid memory power: %s", trim(buf));
+			FATAL(2, "invalid memory power: %s", trim(conf->line));
 		}
 		if (offloading_limit > 1){
-			FATAL(2, "offloading limit is smaller or equal to one: %s", trim(buf));
+			FATAL(2, "offloading limit is smaller or equal to one: %s", trim(conf->line));
 		}
 		add_cloud(type, computation_power, power_active, power_idle, max_capacity, offloading_limit);
 	}
@@ -172,53 +203,37 @@ parse_cloud(FILE *fp)
 
 
 static void
-parse_offloadingratio(FILE *fp)
+parse_offloadingratio(conf_t *conf)
 {
-	char	buf[1024];
-	while (fgets(buf, 1024, fp)) {
+	while (read_section_line(conf)) {
 		double	r;
-		
-		if (buf[0] == '#')
-			continue;
-		if (buf[0] == '\n' || buf[0] == '*') {
-			fseek(fp, -1 * strlen(buf), SEEK_CUR);
-			return;
-		}
-		if (sscanf(buf, "%lf", &r) != 1) {
-			FATAL(2, "cannot load configuration: invalid ratio format: %s", trim(buf));
+
+		if (scan_line(conf->line, "f", &r) != 1) {
+			FATAL(2, "cannot load configuration: invalid ratio format: %s", trim(conf->line));
 		}
 		if (r < 0) {
-			FATAL(2, "ratio should not be a negative value: %s", trim(buf));
+			FATAL(2, "ratio should not be a negative value: %s", trim(conf->line));
 		}
 
 		if (r > 1) {
-			FATAL(2, "ratio is smaller or equal to one: %s", trim(buf));
+			FATAL(2, "ratio is smaller or equal to one: %s", trim(conf->line));
 		}
 		add_offloadingratio(r);
 	}
 }
 
 static void
-parse_TEE(FILE *fp)
+parse_TEE(conf_t *conf)
 {
-    char buf[1024];
     unsigned val;
 
-    while (fgets(buf, 1024, fp)) {
-        if (buf[0] == '#')
-            continue;
-
-        if (buf[0] == '\n' || buf[0] == '*') {
-            fseek(fp, -1 * strlen(buf), SEEK_CUR);
-            return;
-        }
-
-        if (sscanf(buf, "%u", &val) != 1) {
-            FATAL(2, "cannot load configuration: invalid TEE value: %s", trim(buf));
+    while (read_section_line(conf)) {
+        if (scan_line(conf->line, "u", &val) != 1) {
+            FATAL(2, "cannot load configuration: invalid TEE value: %s", trim(conf->line));
         }
 
         if (val != 0 && val != 1) {
-            FATAL(2, "TEE value must be either 0 or 1: %s", trim(buf));
+            FATAL(2, "TEE value must be either 0 or 1: %s", trim(conf->line));
         }
 
         TEE = val;  
@@ -230,52 +245,55 @@ parse_TEE(FILE *fp)
 
 
 void
-parse_conf(FILE *fp)
+parse_conf(conf_t *conf)
 {
-	char	buf[1024];
+	if (is_compiled_conf(conf)) {
+		load_compiled_conf(conf);
+		return;
+	}
 
-	while (fgets(buf, 1024, fp)) {
-		if (buf[0] == '\n' || buf[0] == '#')
+	while (read_conf_line(conf)) {
+		if (is_blank_line(conf->line) || conf->line[0] == '#')
 			continue;
-		switch (check_section(buf)) {
+		switch (check_section(conf->line)) {
 		case SECT_GENETIC:
-			parse_genetic(fp);
+			parse_genetic(conf);
 			break;
 		case SECT_GENTASK:
 		case SECT_GENNETWORK: 
 		case SECT_GENNETCOMMANDER: 
-			skip_section(fp);
+			skip_section(conf);
 			break;
 		case SECT_CPUFREQ:
-			parse_cpufreq(fp);
+			parse_cpufreq(conf);
 			break;
 		case SECT_MEM:
-			parse_mem(fp);
+			parse_mem(conf);
 			break;
 		case SECT_TASK:
 			if (n_cpufreqs == 0) {
 				FATAL(2, "cpu frequency section should be defined ahead of task section");
 			}
-			parse_task(fp);
+			parse_task(conf);
 			break;
 		case SECT_OFFLOADINGRATIO: 
-			parse_offloadingratio(fp);
+			parse_offloadingratio(conf);
 			break;
 		case SECT_CLOUD:	
-			parse_cloud(fp);
+			parse_cloud(conf);
 			break;
 		case SECT_NETWORK: 
-			parse_network(fp);
+			parse_network(conf);
 			break;
 		case SECT_NET_COMMANDER: 
-			parse_net_commander(fp);
+			parse_net_commander(conf);
 			break;
 		// TEE
 		case SECT_TEE:
-			parse_TEE(fp);
+			parse_TEE(conf);
 			break;
 		default:
-			errmsg("unknown section: %s", trim(buf));
+			errmsg("unknown section: %s", trim(conf->line));
 			FATAL(2, "cannot load configuration");
 		}
 	}
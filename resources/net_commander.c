@@ -3,20 +3,29 @@
  * Manages the list of available net commander resources for the system.
  *
  * Provides:
- *   - net_commanders: Array storing net commander intercept values
+ *   - net_commanders: Array storing net commander intercept values, grown as net commanders are added
  *   - n_net_commanders: Number of registered net commanders
  *   - add_net_commander(): Adds a new net commander with specified intercept values
  */
 
 #include "gastask.h" 
 
-net_commander_t	net_commanders[MAX_NETCOMMANDERS];
+net_commander_t	*net_commanders;
 unsigned	n_net_commanders;
 
+static unsigned	max_net_commanders;
+
 void
 add_net_commander(unsigned intercept_out, unsigned intercept_in)
 {
     net_commander_t *net_commander;
+
+    if (n_net_commanders == max_net_commanders) {
+        max_net_commanders = max_net_commanders == 0 ? 256: max_net_commanders * 2;
+        net_commanders = (net_commander_t *)realloc(net_commanders, max_net_commanders * sizeof(net_commander_t));
+        if (net_commanders == NULL)
+            FATAL(2, "cannot allocate net commanders");
+    }
     net_commander = net_commanders + n_net_commanders;
     net_commander->intercept_out = intercept_out;
     net_commander->intercept_in = intercept_in;
@@ -3,19 +3,28 @@
  * Manages the list of available network resources (uplink/downlink rates) for the system.
  *
  * Provides:
- *   - networks: Array storing network resource entries
+ *   - networks: Array storing network resource entries, grown as networks are added
  *   - n_networks: Number of registered networks
  *   - add_network(): Adds a new network resource with specified uplink and downlink rates
  */
 #include "gastask.h" 
 
-network_t	networks[MAX_NETWORKS];
+network_t	*networks;
 unsigned	n_networks;
 
+static unsigned	max_networks;
+
 void
 add_network(unsigned uplink, unsigned downlink)
 {
     network_t *network;
+
+    if (n_networks == max_networks) {
+        max_networks = max_networks == 0 ? 256: max_networks * 2;
+        networks = (network_t *)realloc(networks, max_networks * sizeof(network_t));
+        if (networks == NULL)
+            FATAL(2, "cannot allocate networks");
+    }
     network = networks + n_networks;
     network->uplink = uplink;
     network->downlink = downlink;
@@ -2,108 +2,233 @@
 # -*- coding: utf-8 -*-
 """
 실험 결과 분석 및 시각화 스크립트
+- Parquet / Arrow(feather) 결과를 필요한 열만 읽음 (없으면 CSV)
+- 결과를 청크 단위로 읽어 (Server_Power, Network, Workload, 알고리즘)별 합계, 개수, 최저 Power 행을
+  한 번에 집계 → 모든 요약 표와 그래프는 이 표에서 계산 (메모리는 행 수가 아니라 실험 점 수에 비례)
+- 알고리즘별 Power 분포(상자 그림)는 알고리즘마다 최대 SAMPLE_ROWS개 표본 (그보다 적으면 전체)
+
+사용 예:
+    ./analyze_results.py                                  # experiment_results.{parquet,feather,arrow,csv}
+    ./analyze_results.py sweep.parquet --chunk-rows 500000
 """
 
+import argparse
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pathlib import Path
 
-def load_and_analyze_results():
-    """결과 파일 로드 및 기본 분석"""
-    results_file = Path("experiment_results.csv")
-    
-    if not results_file.exists():
-        print("experiment_results.csv 파일이 없습니다.")
+try:
+    import pyarrow.dataset as pa_ds
+except ImportError:
+    pa_ds = None
+
+KEYS = ["Server_Power", "Network", "Workload", "Section"]
+VALUES = ["Power", "Util", "Offloading_Ratio"]
+COLUMNS = KEYS + VALUES
+DEFAULT_FILES = ["experiment_results.parquet", "experiment_results.feather",
+                 "experiment_results.arrow", "experiment_results.csv"]
+CHUNK_ROWS = 1_000_000
+SAMPLE_ROWS = 100_000
+SEED = 42
+
+ARROW_FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather", ".ipc": "feather"}
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """결과 파일(또는 Parquet 디렉토리) → COLUMNS만 담은 DataFrame 청크들"""
+    path = Path(path)
+    fmt = "parquet" if path.is_dir() else ARROW_FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        yield from pd.read_csv(path, usecols=COLUMNS, chunksize=chunk_rows)
+        return
+    if pa_ds is None:
+        raise SystemExit(f"{path}: Parquet/Arrow 파일을 읽으려면 pyarrow가 필요합니다 (CSV는 없이도 가능)")
+    dataset = pa_ds.dataset(path, format=fmt)
+    for batch in dataset.to_batches(columns=COLUMNS, batch_size=chunk_rows):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+class Aggregate:
+    """
+    청크를 차례로 더하는 그룹 집계
+    - groups: KEYS별 지표 합계(<지표>_sum)와 개수(<지표>_n), 처음 나온 순서
+    - best: KEYS별 최저 Power 행 (같으면 먼저 나온 행)
+    - samples: 알고리즘별 Power 표본 (저수지 표집)
+    """
+
+    def __init__(self, sample_rows=SAMPLE_ROWS, seed=SEED):
+        self.n_rows = 0
+        self.groups = None
+        self.best = None
+        self.samples = {}
+        self.seen = {}
+        self.sample_rows = sample_rows
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, chunk):
+        chunk = chunk.reset_index(drop=True)
+        chunk["_row"] = np.arange(self.n_rows, self.n_rows + len(chunk))
+        self.n_rows += len(chunk)
+
+        grouped = chunk.groupby(KEYS, sort=False)
+        part = pd.concat([grouped[VALUES].sum().add_suffix("_sum"),
+                          grouped[VALUES].count().add_suffix("_n")], axis=1)
+        self.groups = part if self.groups is None else \
+            pd.concat([self.groups, part]).groupby(level=KEYS, sort=False).sum()
+
+        valid = chunk[chunk["Power"].notna()]
+        best = valid.loc[valid.groupby(KEYS, sort=False)["Power"].idxmin()]
+        if self.best is not None:
+            best = pd.concat([self.best, best])
+        self.best = best.sort_values(["Power", "_row"], kind="stable").drop_duplicates(KEYS)
+
+        for algo, power in chunk.groupby("Section", sort=False)["Power"]:
+            self._sample(algo, power.dropna().to_numpy())
+
+    def _sample(self, algo, values):
+        """알고리즘별 Power 저수지 표집 (전체가 sample_rows 이하이면 모든 값)"""
+        seen = self.seen.get(algo, 0)
+        self.seen[algo] = seen + len(values)
+        sample = self.samples.get(algo, np.empty(0))
+        room = max(self.sample_rows - len(sample), 0)
+        sample = np.concatenate([sample, values[:room]])
+        rest = values[room:]
+        if len(rest):
+            # i번째 값(전체 기준)은 sample_rows / i 확률로 임의의 자리를 대신함
+            idx = seen + room + np.arange(1, len(rest) + 1)
+            slots = (self.rng.random(len(rest)) * idx).astype(np.int64)
+            keep = slots < self.sample_rows
+            sample[slots[keep]] = rest[keep]
+        self.samples[algo] = sample
+
+    def mean(self, by, value="Power"):
+        """groups를 by로 묶은 value 평균 (by 순서대로 정렬)"""
+        rolled = self.groups.groupby(level=by)[[f"{value}_sum", f"{value}_n"]].sum()
+        return rolled[f"{value}_sum"] / rolled[f"{value}_n"]
+
+    def unique(self, key):
+        return pd.Series(self.groups.index.get_level_values(key)).unique()
+
+
+def aggregate(path, chunk_rows=CHUNK_ROWS):
+    agg = Aggregate()
+    for chunk in read_chunks(path, chunk_rows):
+        agg.add(chunk)
+    return agg if agg.n_rows else None
+
+
+def find_results_file():
+    for name in DEFAULT_FILES:
+        if Path(name).exists():
+            return Path(name)
+    return None
+
+
+def load_and_analyze_results(path=None, chunk_rows=CHUNK_ROWS):
+    """결과 파일 집계 및 기본 분석"""
+    results_file = Path(path) if path else find_results_file()
+
+    if results_file is None or not results_file.exists():
+        print(f"{results_file or 'experiment_results.csv'} 파일이 없습니다.")
         return None
-        
-    df = pd.read_csv(results_file)
-    
+
+    agg = aggregate(results_file, chunk_rows)
+    if agg is None:
+        print(f"{results_file}에 결과가 없습니다.")
+        return None
+
     print("=== 실험 결과 요약 ===")
-    print(f"총 실험 수: {len(df)}")
-    print(f"Server Power 범위: {df['Server_Power'].unique()}")
-    print(f"Network 범위: {df['Network'].unique()}")
-    print(f"Workload 범위: {df['Workload'].unique()}")
-    print(f"알고리즘: {df['Section'].unique()}")
+    print(f"총 실험 수: {agg.n_rows}")
+    print(f"Server Power 범위: {agg.unique('Server_Power')}")
+    print(f"Network 범위: {agg.unique('Network')}")
+    print(f"Workload 범위: {agg.unique('Workload')}")
+    print(f"알고리즘: {agg.unique('Section')}")
     print()
-    
+
     # 알고리즘별 평균 성능
     print("=== 알고리즘별 평균 성능 ===")
-    algo_avg = df.groupby('Section')[['Power', 'Util', 'Offloading_Ratio']].mean()
+    algo_avg = pd.DataFrame({v: agg.mean("Section", v) for v in VALUES})
     print(algo_avg.round(3))
     print()
-    
+
     # 워크로드별 성능
     print("=== 워크로드별 평균 Power 소모량 ===")
-    workload_power = df.groupby(['Workload', 'Section'])['Power'].mean().unstack()
+    workload_power = agg.mean(["Workload", "Section"]).unstack()
     print(workload_power.round(3))
     print()
-    
+
     # 네트워크별 성능
     print("=== 네트워크별 평균 Power 소모량 ===")
-    network_power = df.groupby(['Network', 'Section'])['Power'].mean().unstack()
+    network_power = agg.mean(["Network", "Section"]).unstack()
     print(network_power.round(3))
     print()
-    
+
     # 서버 파워별 성능
     print("=== 서버 파워별 평균 Power 소모량 ===")
-    server_power = df.groupby(['Server_Power', 'Section'])['Power'].mean().unstack()
+    server_power = agg.mean(["Server_Power", "Section"]).unstack()
     print(server_power.round(3))
-    
-    return df
 
-def create_visualizations(df):
+    return agg
+
+def create_visualizations(agg, output="experiment_analysis.png"):
     """결과 시각화"""
     plt.style.use('seaborn-v0_8')
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    
+    algos = agg.unique('Section')
+
     # 1. 알고리즘별 파워 소모량
-    df.boxplot(column='Power', by='Section', ax=axes[0,0])
+    names = sorted(agg.samples)
+    # DataFrame.boxplot과 같은 색
+    line = {'color': 'C0'}
+    axes[0,0].boxplot([agg.samples[a] for a in names], boxprops=line, whiskerprops=line, capprops=line,
+                      medianprops={'color': 'C2'})
+    axes[0,0].set_xticks(range(1, len(names) + 1), names)
+    fig.suptitle('Boxplot grouped by Section')
     axes[0,0].set_title('알고리즘별 Power 소모량 분포')
     axes[0,0].set_xlabel('Algorithm')
     axes[0,0].set_ylabel('Power')
-    
-    # 2. 워크로드 vs 파워
-    for algo in df['Section'].unique():
-        algo_data = df[df['Section'] == algo]
-        axes[0,1].plot(algo_data['Workload'], algo_data['Power'], 'o-', label=algo, alpha=0.7)
-    axes[0,1].set_title('워크로드별 Power 소모량')
-    axes[0,1].set_xlabel('Workload')
-    axes[0,1].set_ylabel('Power')
-    axes[0,1].legend()
-    
-    # 3. 네트워크 vs 파워
-    for algo in df['Section'].unique():
-        algo_data = df[df['Section'] == algo]
-        axes[1,0].plot(algo_data['Network'], algo_data['Power'], 'o-', label=algo, alpha=0.7)
-    axes[1,0].set_title('네트워크별 Power 소모량')
-    axes[1,0].set_xlabel('Network Bandwidth')
-    axes[1,0].set_ylabel('Power')
-    axes[1,0].legend()
-    
+
+    # 2. 워크로드 vs 파워, 3. 네트워크 vs 파워 (알고리즘별 평균)
+    for ax, key, title, xlabel in ((axes[0,1], 'Workload', '워크로드별 Power 소모량', 'Workload'),
+                                   (axes[1,0], 'Network', '네트워크별 Power 소모량', 'Network Bandwidth')):
+        power = agg.mean([key, 'Section']).unstack()
+        for algo in algos:
+            ax.plot(power.index, power[algo], 'o-', label=algo, alpha=0.7)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Power')
+        ax.legend()
+
     # 4. 서버 파워 vs 시스템 파워
-    server_power_avg = df.groupby(['Server_Power', 'Section'])['Power'].mean().reset_index()
+    server_power_avg = agg.mean(['Server_Power', 'Section']).rename('Power').reset_index()
     sns.barplot(data=server_power_avg, x='Server_Power', y='Power', hue='Section', ax=axes[1,1])
     axes[1,1].set_title('서버 파워별 평균 Power 소모량')
-    
+
     plt.tight_layout()
-    plt.savefig('experiment_analysis.png', dpi=300, bbox_inches='tight')
-    print("시각화 결과 저장: experiment_analysis.png")
+    plt.savefig(output, dpi=300, bbox_inches='tight')
+    print(f"시각화 결과 저장: {output}")
 
-def find_best_configurations(df):
+def find_best_configurations(agg):
     """최적 구성 찾기"""
     print("\n=== 최적 구성 분석 ===")
-    
-    # 각 알고리즘별 최저 파워 구성
+
+    # 각 알고리즘별 최저 파워 구성 (best는 Power, 행 순서로 정렬되어 있음)
     print("알고리즘별 최저 Power 구성:")
-    for algo in df['Section'].unique():
-        algo_data = df[df['Section'] == algo]
-        best = algo_data.loc[algo_data['Power'].idxmin()]
+    best_by_algo = agg.best.drop_duplicates('Section')
+    for algo in agg.unique('Section'):
+        rows = best_by_algo[best_by_algo['Section'] == algo]
+        if rows.empty:
+            continue
+        best = rows.iloc[0]
         print(f"{algo}: Power={best['Power']:.3f}, Server={best['Server_Power']}, "
               f"Network={best['Network']}, Workload={best['Workload']}")
-    
+
     print("\n전체 최저 Power 구성:")
-    overall_best = df.loc[df['Power'].idxmin()]
+    overall_best = agg.best.iloc[0]
     print(f"Algorithm: {overall_best['Section']}")
     print(f"Power: {overall_best['Power']:.3f}")
     print(f"Server Power: {overall_best['Server_Power']}")
@@ -113,10 +238,16 @@ def find_best_configurations(df):
     print(f"Offloading Ratio: {overall_best['Offloading_Ratio']:.3f}")
 
 def main():
-    df = load_and_analyze_results()
-    if df is not None:
-        create_visualizations(df)
-        find_best_configurations(df)
+    parser = argparse.ArgumentParser(description="실험 결과 분석 및 시각화")
+    parser.add_argument("results", nargs="?", help="결과 파일 (.parquet, .feather, .arrow, .csv 또는 Parquet 디렉토리)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="한 번에 읽는 행 수")
+    parser.add_argument("-o", "--output", default="experiment_analysis.png", help="그래프 파일")
+    args = parser.parse_args()
+
+    agg = load_and_analyze_results(args.results, args.chunk_rows)
+    if agg is not None:
+        create_visualizations(agg, args.output)
+        find_best_configurations(agg)
 
 if __name__ == "__main__":
     main()
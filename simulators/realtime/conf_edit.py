@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gastask 설정 편집 (문자열 → 문자열, 파일은 건드리지 않음)
+- 섹션 본문(다음 빈 줄/섹션까지)을 바꾼 설정 문자열을 돌려줌
+- task_gen.py, batch_candy.py, batch_experiment.py 공용
+
+사용 예:
+    content = set_cloud_power(content, 4)
+    content = set_network(content, 100)
+    content = set_tasks(content, ["100 1000 ...", ...])
+"""
+
+
+def edit_section(content, name, func):
+    """*name 섹션 본문(다음 빈 줄/섹션까지)의 줄 목록을 func(lines)로 교체"""
+    lines = content.split("\n")
+    try:
+        start = lines.index(f"*{name}") + 1
+    except ValueError:
+        raise ValueError(f"section not found: *{name}")
+    end = start
+    while end < len(lines) and lines[end].strip() and not lines[end].startswith("*"):
+        end += 1
+    lines[start:end] = func(lines[start:end])
+    return "\n".join(lines)
+
+
+def set_cloud_power(content, power):
+    """*cloud 섹션의 computation_power 수정"""
+    def edit(lines):
+        return [" ".join([ln.split()[0], str(power)] + ln.split()[2:]) if not ln.startswith("#") else ln
+                for ln in lines]
+    return edit_section(content, "cloud", edit)
+
+
+def set_network(content, bw):
+    """*network 섹션의 모든 링크를 uplink=downlink=bw로 (줄 수 유지)"""
+    return edit_section(content, "network", lambda lines: [f"{bw} {bw}" for _ in lines])
+
+
+def set_tasks(content, task_lines):
+    """*task 섹션 교체"""
+    return edit_section(content, "task", lambda lines: list(task_lines))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+libgastask 파이썬 바인딩
+- gastask의 GA를 ./gastask 실행 없이 프로세스 안에서 호출 (libgastask.so, C API: headers/libgastask.h)
+- 태스크/CPU 주파수/네트워크 등은 NumPy 배열로 전달, 결과는 dict (태스크별 속성은 uint8 배열)
+- .conf 재작성, task.txt/stdout 파싱이 필요 없음
+- 호출마다 독립된 GA 실행이므로 여러 스레드에서 동시에 최적화 가능
+
+사용 예:
+    import libgastask
+    result = libgastask.optimize(**libgastask.read_conf("../gastask.conf"), seed=1)
+    print(result["power"], result["offloadingratios"])
+
+libgastask.so 위치: GASTASK_LIB 환경 변수, 이 파일의 폴더, simulators/, build/ 순서로 찾음
+"""
+
+import ctypes
+import os
+from ctypes import POINTER, c_char_p, c_double, c_int, c_uint, c_ubyte
+from pathlib import Path
+
+import numpy as np
+
+# *task 섹션의 열 순서
+TASK_FIELDS = ("wcet", "period", "memreq", "mem_active_ratio",
+               "task_size", "input_size", "output_size", "offloading_bool")
+
+# gastask_params_t 필드 (optimize()의 키워드 인자)
+PARAM_FIELDS = (
+    ("max_gen", c_uint), ("n_pops", c_uint), ("cutoff", c_double), ("penalty", c_double),
+    ("seed", c_int), ("tee", c_uint),
+    ("n_islands", c_uint), ("n_workers", c_uint), ("n_offsprings", c_uint),
+    ("migration_interval", c_uint), ("migration_size", c_uint),
+    ("stagnation_gens", c_uint), ("min_improvement", c_double), ("time_budget", c_double),
+    ("cache_size", c_uint), ("init_random", c_int),
+    ("localsearch_interval", c_uint), ("localsearch_elites", c_uint), ("localsearch_moves", c_uint),
+)
+
+
+class _Params(ctypes.Structure):
+    _fields_ = list(PARAM_FIELDS)
+
+
+class _CpuFreq(ctypes.Structure):
+    _fields_ = [("wcet_scale", c_double), ("power_active", c_double), ("power_idle", c_double)]
+
+
+class _Mem(ctypes.Structure):
+    _fields_ = [("type", c_char_p), ("max_capacity", c_uint),
+                ("wcet_scale", c_double), ("power_active", c_double), ("power_idle", c_double)]
+
+
+class _Cloud(ctypes.Structure):
+    _fields_ = [("type", c_char_p), ("computation_power", c_double), ("power_active", c_double),
+                ("power_idle", c_double), ("max_capacity", c_uint), ("offloading_limit", c_double)]
+
+
+class _Network(ctypes.Structure):
+    _fields_ = [("uplink", c_uint), ("downlink", c_uint)]
+
+
+class _NetCommander(ctypes.Structure):
+    _fields_ = [("intercept_out", c_uint), ("intercept_in", c_uint)]
+
+
+class _Tasks(ctypes.Structure):
+    _fields_ = [("n_tasks", c_uint)] + [
+        (name, POINTER(c_double) if name == "mem_active_ratio" else POINTER(c_uint)) for name in TASK_FIELDS]
+
+
+class _Problem(ctypes.Structure):
+    _fields_ = [
+        ("cpufreqs", POINTER(_CpuFreq)), ("n_cpufreqs", c_uint),
+        ("mems", POINTER(_Mem)), ("n_mems", c_uint),
+        ("clouds", POINTER(_Cloud)), ("n_clouds", c_uint),
+        ("offloadingratios", POINTER(c_double)), ("n_offloadingratios", c_uint),
+        ("networks", POINTER(_Network)), ("n_networks", c_uint),
+        ("net_commanders", POINTER(_NetCommander)), ("n_net_commanders", c_uint),
+        ("tasks", _Tasks),
+    ]
+
+
+class _Result(ctypes.Structure):
+    _fields_ = [
+        ("power", c_double), ("util", c_double),
+        ("cpu_power", c_double), ("mem_power", c_double), ("network_power", c_double),
+        ("period_violation", c_uint),
+        ("mem_types", POINTER(c_ubyte)), ("cpufreqs", POINTER(c_ubyte)),
+        ("clouds", POINTER(c_ubyte)), ("offloadingratios", POINTER(c_ubyte)),
+    ]
+
+
+class GastaskError(RuntimeError):
+    """GA 실패 (code: gastask 종료 코드, 2: 잘못된 입력, 3: 가능한 해 없음, -1: 실행 실패)"""
+
+    def __init__(self, code):
+        super().__init__(f"gastask failed: {code}")
+        self.code = code
+
+
+_lib = None
+
+
+def load_library(path=None):
+    """libgastask.so 로드 (한 번만)"""
+    global _lib
+    if _lib is not None and path is None:
+        return _lib
+
+    if path is None:
+        path = os.environ.get("GASTASK_LIB")
+    if path is None:
+        here = Path(__file__).resolve().parent
+        for cand in (here, here.parent, here.parent.parent / "build"):
+            if (cand / "libgastask.so").exists():
+                path = cand / "libgastask.so"
+                break
+        else:
+            raise FileNotFoundError("libgastask.so not found: build it or set GASTASK_LIB")
+
+    lib = ctypes.CDLL(str(path))
+    lib.gastask_init_params.argtypes = [POINTER(_Params)]
+    lib.gastask_init_params.restype = None
+    lib.gastask_optimize.argtypes = [POINTER(_Problem), POINTER(_Params), POINTER(_Result)]
+    lib.gastask_optimize.restype = c_int
+    _lib = lib
+    return lib
+
+
+def _array(values, dtype, n_cols):
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    if arr.size == 0:
+        arr = arr.reshape(0, n_cols)
+    if arr.ndim != 2 or arr.shape[1] != n_cols:
+        raise ValueError(f"expected an array of {n_cols} columns, got shape {arr.shape}")
+    return arr
+
+
+def _records(struct, rows):
+    """튜플 목록 → ctypes 구조체 배열"""
+    arr = (struct * max(len(rows), 1))()
+    for i, row in enumerate(rows):
+        arr[i] = struct(*[v.encode() if isinstance(v, str) else v for v in row])
+    return arr
+
+
+def _task_columns(tasks):
+    """(n, 8) 배열 또는 열 이름 dict → TASK_FIELDS 순서의 연속 배열"""
+    if isinstance(tasks, dict):
+        cols = [tasks[name] for name in TASK_FIELDS]
+    else:
+        arr = np.asarray(tasks, dtype=np.float64)
+        if arr.ndim != 2 or arr.shape[1] != len(TASK_FIELDS):
+            raise ValueError(f"tasks should have {len(TASK_FIELDS)} columns: {', '.join(TASK_FIELDS)}")
+        cols = list(arr.T)
+    return [np.ascontiguousarray(col, dtype=np.float64 if name == "mem_active_ratio" else np.uint32)
+            for name, col in zip(TASK_FIELDS, cols)]
+
+
+def optimize(tasks, cpufreqs, mems, clouds, offloadingratios, networks, net_commanders, **params):
+    """
+    GA 실행 후 최적 할당 반환
+    - tasks: (n, 8) 배열 (*task 섹션 열 순서) 또는 TASK_FIELDS 키의 열 배열 dict
+    - cpufreqs: (n, 3) [wcet_scale, power_active, power_idle]
+    - mems: [(type, max_capacity, wcet_scale, power_active, power_idle), ...]
+    - clouds: [(type, computation_power, power_active, power_idle, max_capacity, offloading_limit), ...]
+    - offloadingratios: 1차원 배열, networks/net_commanders: (n, 2)
+    - params: PARAM_FIELDS 이름의 GA 파라미터 (없으면 gastask 기본값)
+    결과: power, util, cpu_power, mem_power, network_power, period_violation 및
+          태스크별 mem_types, cpufreqs, clouds, offloadingratios (uint8 배열)
+    """
+    lib = load_library()
+
+    c_params = _Params()
+    lib.gastask_init_params(ctypes.byref(c_params))
+    for name, value in params.items():
+        if name not in dict(PARAM_FIELDS):
+            raise TypeError(f"unknown parameter: {name}")
+        setattr(c_params, name, value)
+
+    cols = _task_columns(tasks)
+    n_tasks = len(cols[0])
+    cpufreqs = _array(cpufreqs, np.float64, 3)
+    ratios = np.ascontiguousarray(offloadingratios, dtype=np.float64).reshape(-1)
+    networks = _array(networks, np.uint32, 2)
+    net_commanders = _array(net_commanders, np.uint32, 2)
+
+    problem = _Problem()
+    problem.cpufreqs = _records(_CpuFreq, [tuple(row) for row in cpufreqs])
+    problem.n_cpufreqs = len(cpufreqs)
+    problem.mems = _records(_Mem, list(mems))
+    problem.n_mems = len(mems)
+    problem.clouds = _records(_Cloud, list(clouds))
+    problem.n_clouds = len(clouds)
+    problem.offloadingratios = ratios.ctypes.data_as(POINTER(c_double))
+    problem.n_offloadingratios = len(ratios)
+    problem.networks = networks.ctypes.data_as(POINTER(_Network))
+    problem.n_networks = len(networks)
+    problem.net_commanders = net_commanders.ctypes.data_as(POINTER(_NetCommander))
+    problem.n_net_commanders = len(net_commanders)
+    problem.tasks.n_tasks = n_tasks
+    for name, col in zip(TASK_FIELDS, cols):
+        ctype = c_double if name == "mem_active_ratio" else c_uint
+        setattr(problem.tasks, name, col.ctypes.data_as(POINTER(ctype)))
+
+    attrs = {name: np.zeros(n_tasks, dtype=np.uint8)
+             for name in ("mem_types", "cpufreqs", "clouds", "offloadingratios")}
+    result = _Result()
+    for name, arr in attrs.items():
+        setattr(result, name, arr.ctypes.data_as(POINTER(c_ubyte)))
+
+    # ctypes는 호출 동안 GIL을 해제하므로 스레드별 동시 실행 가능
+    code = lib.gastask_optimize(ctypes.byref(problem), ctypes.byref(c_params), ctypes.byref(result))
+    if code != 0:
+        raise GastaskError(code)
+
+    out = {name: getattr(result, name)
+           for name in ("power", "util", "cpu_power", "mem_power", "network_power", "period_violation")}
+    out.update(attrs)
+    return out
+
+
+def _parse_genetic_option(words, params):
+    name, args = words[0], words[1:]
+    if name == "migration":
+        params["migration_interval"], params["migration_size"] = int(args[0]), int(args[1])
+    elif name == "offspring":
+        params["n_offsprings"] = int(args[0])
+    elif name == "stagnation":
+        params["stagnation_gens"] = int(args[0])
+        if len(args) > 1:
+            params["min_improvement"] = float(args[1])
+    elif name == "localsearch":
+        for key, value in zip(("localsearch_interval", "localsearch_elites", "localsearch_moves"), args):
+            params[key] = int(value)
+    elif name == "init":
+        params["init_random"] = int(args[0] == "random")
+    elif name == "cache":
+        params["cache_size"] = int(args[0])
+    elif name == "report":
+        pass    # libgastask는 report 파일을 쓰지 않음
+    else:
+        raise ValueError(f"unknown genetic option: {name}")
+
+
+def read_conf(path):
+    """gastask .conf → optimize() 인자 dict (*gen* 섹션은 무시)"""
+    sections = {}
+    section = None
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            if line.startswith("*"):
+                section = line[1:].split()[0]
+                sections.setdefault(section, [])
+                continue
+            if not line.strip():
+                section = None
+                continue
+            if section is not None:
+                sections[section].append(line.split())
+
+    params = {}
+    genetic = sections.get("genetic", [])
+    if genetic:
+        max_gen, n_pops, cutoff, penalty = genetic[0][:4]
+        params.update(max_gen=int(max_gen), n_pops=int(n_pops), cutoff=float(cutoff), penalty=float(penalty))
+        for words in genetic[1:]:
+            _parse_genetic_option(words, params)
+    if sections.get("TEE"):
+        params["tee"] = int(sections["TEE"][0][0])
+
+    def rows(name, n_cols):
+        return np.array([[float(v) for v in words[:n_cols]] for words in sections.get(name, [])],
+                        dtype=np.float64).reshape(-1, n_cols)
+
+    return dict(
+        tasks=rows("task", len(TASK_FIELDS)),
+        cpufreqs=rows("cpufreq", 3),
+        mems=[(w[0], int(w[1]), float(w[2]), float(w[3]), float(w[4])) for w in sections.get("mem", [])],
+        clouds=[(w[0], float(w[1]), float(w[2]), float(w[3]), int(w[4]), float(w[5]))
+                for w in sections.get("cloud", [])],
+        offloadingratios=rows("offloadingratio", 1).reshape(-1),
+        networks=rows("network", 2).astype(np.uint32),
+        net_commanders=rows("netcommander", 2).astype(np.uint32),
+        **params,
+    )
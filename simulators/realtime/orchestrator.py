@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실험 오케스트레이터 (batch_experiment.py, batch_candy.py 공용)
+- 실험 점 (server_power, network, workload)마다 runs/<점 이름>/ 폴더에 불변 입력 gastask.conf를 만들고
+  gastask --variants를 그 폴더에서 실행 → candy_cycle.conf, task_gen.py 등 공유 파일을 수정하지 않고
+  "가장 최근 tmp/output_*"를 추측하지 않음
+- 여러 점을 동시에 실행 (기본: CPU 수 / 변형 수, gastask가 변형마다 프로세스를 하나씩 쓰므로)
+- 실패한 점은 재시도, 끝난 점은 result.json으로 기록 → 중단 후 다시 실행하면 남은 점만 실행
+- ResultStore (result_store.py)를 주면 스윕과 무관하게 이미 계산한 (설정, 시드, 변형)은 실행하지 않음
+- 점마다 시드와 입력이 고정되어 있으므로 결과는 실행 순서·동시 실행 수와 무관 (직렬 실행과 같음)
+
+사용 예:
+    runner = Orchestrator(lambda point: make_conf(point), runs_dir="runs", jobs=4)
+    results = runner.run(points)    # points 순서의 {point, status, sections}
+
+gastask 위치: GASTASK 환경 변수, 이 파일의 폴더, build/, simulators/ 순서로 찾음
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from result_store import binary_hash
+
+# gastask --variants의 변형 (출력 섹션 이름=기법)
+VARIANTS = (
+    ("CO-DMO-CT", "tee+off+dvs"),
+    ("CO-DMO", "off+dvs"),
+    ("Offloading", "off"),
+    ("DVS", "dvs"),
+    ("Baseline", "none"),
+)
+ALGORITHMS = [name for name, _ in VARIANTS]
+
+# 결과 CSV의 지표 열
+METRICS = [
+    "Power", "Util", "CPU_Power", "Memory_Power", "Network_Power", "Offloading_Ratio",
+    "CPU_Frequency_1", "CPU_Frequency_0.5", "CPU_Frequency_0.25", "CPU_Frequency_0.125",
+]
+
+RESULT_FILE = "result.json"
+
+Point = namedtuple("Point", ["server_power", "network", "workload"])
+
+
+def point_name(point):
+    """점 → 스크래치 폴더 이름"""
+    return f"sp{point.server_power}_net{point.network}_wl{point.workload:g}"
+
+
+def find_gastask():
+    path = os.environ.get("GASTASK")
+    if path is not None:
+        return Path(path).resolve()
+    here = Path(__file__).resolve().parent
+    for cand in (here, here.parent.parent / "build", here.parent):
+        if (cand / "gastask").exists():
+            return cand / "gastask"
+    raise FileNotFoundError("gastask not found: build it or set GASTASK")
+
+
+# --------------------
+# 결과 파싱
+# --------------------
+_RE_POWER = re.compile(r"power: ([\d.]+) util: ([\d.]+)")
+_RE_COMPONENTS = re.compile(r"cpu power: ([\d.]+) memory power: ([\d.]+) network power: ([\d.]+)")
+_RE_RATIO = re.compile(r"offloading ratio: ([\d.]+)")
+_RE_FREQS = re.compile(r"^\d+\s+\d+\s+\d+\s+\d+\s*$")
+
+
+def split_output(content):
+    """gastask --variants 출력 → {알고리즘: 섹션 텍스트}"""
+    sections = {}
+    for section in content.split("*")[1:]:
+        algo_name = section.split("\n", 1)[0].strip()
+        if algo_name in ALGORITHMS:
+            sections[algo_name] = "*" + section
+    return sections
+
+
+def parse_output(content):
+    """gastask --variants 출력 → {알고리즘: {지표: 값}}"""
+    results = {}
+    for algo_name, section in split_output(content).items():
+        lines = section.strip().split("\n")
+
+        data = {m: None for m in METRICS}
+        for line in lines[1:]:
+            line = line.strip()
+            if line.startswith("power:"):
+                match = _RE_POWER.search(line)
+                if match:
+                    data["Power"], data["Util"] = float(match.group(1)), float(match.group(2))
+            elif line.startswith("cpu power:"):
+                match = _RE_COMPONENTS.search(line)
+                if match:
+                    data["CPU_Power"], data["Memory_Power"], data["Network_Power"] = map(float, match.groups())
+            elif line.startswith("offloading ratio:"):
+                match = _RE_RATIO.search(line)
+                if match:
+                    data["Offloading_Ratio"] = float(match.group(1))
+            elif _RE_FREQS.match(line):
+                # CPU frequency 분포 라인
+                freqs = [int(v) for v in line.split()]
+                data["CPU_Frequency_1"], data["CPU_Frequency_0.5"], \
+                    data["CPU_Frequency_0.25"], data["CPU_Frequency_0.125"] = freqs
+        results[algo_name] = data
+    return results
+
+
+# --------------------
+# 점 하나 실행
+# --------------------
+def _digest(conf, seed, gastask):
+    """입력 요약: 설정, 시드, 변형, gastask 바이너리가 같으면 같은 결과"""
+    h = hashlib.sha256()
+    h.update(conf.encode())
+    h.update(f"\0{seed}\0{VARIANTS}\0{binary_hash(gastask)}".encode())
+    return h.hexdigest()
+
+
+def _load_done(run_dir, digest):
+    """같은 입력으로 끝난 점이면 그 결과"""
+    try:
+        with open(run_dir / RESULT_FILE, encoding="utf-8") as f:
+            done = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return done if done.get("digest") == digest else None
+
+
+def _write_json(path, obj):
+    # 중단되어도 반쯤 쓴 result.json이 남지 않도록 임시 파일 후 교체
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+
+def run_point(conf, run_dir, gastask, seed, retries=2, store=None):
+    """
+    run_dir에서 gastask --variants 실행 (store가 있으면 저장소에 없는 변형만)
+    결과: {"status": "done" | "cached" | "failed", "sections": {알고리즘: 지표}, "n_run": 실행한 변형 수, "error": ...}
+    """
+    run_dir = Path(run_dir)
+    digest = _digest(conf, seed, gastask)
+    done = _load_done(run_dir, digest)
+    if done is not None:
+        return {"status": "cached", "sections": done["sections"], "n_run": 0}
+
+    keys, cached = {}, {}
+    if store is not None:
+        for name, techs in VARIANTS:
+            keys[name] = store.key(conf, seed, f"{name}={techs}", gastask)
+            entry = store.get(keys[name])
+            if entry is not None:
+                cached[name] = entry["metrics"]
+    todo = [(name, techs) for name, techs in VARIANTS if name not in cached]
+    if not todo:
+        return {"status": "cached", "sections": cached, "n_run": 0}
+
+    variants = ",".join(f"{name}={techs}" for name, techs in todo)
+    error = None
+    for _ in range(retries + 1):
+        # 이전 시도의 흔적을 지우고 새 폴더에서 시작
+        shutil.rmtree(run_dir, ignore_errors=True)
+        run_dir.mkdir(parents=True)
+        (run_dir / "gastask.conf").write_text(conf, encoding="utf-8")
+
+        with open(run_dir / "output.txt", "w", encoding="utf-8") as out:
+            proc = subprocess.run([str(gastask), "-s", str(seed), "--variants", variants, "gastask.conf"],
+                                  cwd=run_dir, stdout=out, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            error = f"gastask exited with {proc.returncode}: {proc.stderr.strip()}"
+            continue
+        output = (run_dir / "output.txt").read_text(encoding="utf-8")
+        sections = parse_output(output)
+        missing = [name for name, _ in todo if name not in sections]
+        if missing:
+            error = f"missing sections: {', '.join(missing)}"
+            continue
+
+        if store is not None:
+            texts = split_output(output)
+            for name, _ in todo:
+                artifacts = {"output": texts[name].encode()}
+                for kind in ("task", "report"):
+                    path = run_dir / f"{kind}_{name}.txt"
+                    if path.exists():
+                        artifacts[kind] = path
+                store.put(keys[name], sections[name], artifacts)
+        sections.update(cached)
+        sections = {name: sections[name] for name in ALGORITHMS}
+        _write_json(run_dir / RESULT_FILE, {"digest": digest, "seed": seed, "sections": sections})
+        return {"status": "done", "sections": sections, "n_run": len(todo)}
+    return {"status": "failed", "sections": {}, "n_run": len(todo), "error": error}
+
+
+class Orchestrator:
+    """
+    make_conf(point) → 설정 문자열 (같은 점이면 항상 같은 문자열)
+    점 결과는 runs_dir/<point_name()>/에 남음
+    """
+
+    def __init__(self, make_conf, runs_dir="runs", jobs=None, seed=42, retries=2, gastask=None, store=None):
+        self.make_conf = make_conf
+        self.store = store
+        self.runs_dir = Path(runs_dir)
+        if jobs is None:
+            jobs = max(1, (os.cpu_count() or 1) // len(VARIANTS))
+        self.jobs = jobs
+        self.seed = seed
+        self.retries = retries
+        self.gastask = Path(gastask) if gastask is not None else find_gastask()
+
+    def run(self, points):
+        """모든 점 실행 → points 순서의 {"point", "run_dir", "status", "sections"[, "error"]}"""
+        points = list(points)
+        # 설정 생성은 가벼우므로 여기서 모두 만들고, gastask 실행만 동시에
+        confs = [self.make_conf(point) for point in points]
+        results = [None] * len(points)
+
+        print(f"총 {len(points)}개 실험, 동시 실행 {self.jobs}개")
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            # 스레드는 gastask 프로세스를 기다리기만 하므로 GIL 영향 없음
+            futures = {pool.submit(run_point, conf, self.runs_dir / point_name(point), self.gastask,
+                                   self.seed, self.retries, self.store): i
+                       for i, (point, conf) in enumerate(zip(points, confs))}
+            for n_done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                point = points[i]
+                result = future.result()
+                result.update(point=point, run_dir=self.runs_dir / point_name(point))
+                results[i] = result
+                msg = f"진행률: {n_done}/{len(points)} {point_name(point)} {result['status']}"
+                if result["status"] == "done" and result["n_run"] < len(VARIANTS):
+                    msg += f" ({result['n_run']}/{len(VARIANTS)} 변형 실행, 나머지는 저장소)"
+                if result["status"] == "failed":
+                    msg += f" ({result['error']})"
+                print(msg, flush=True)
+
+        if self.store is not None:
+            n_evicted = self.store.evict()
+            stats = self.store.stats()
+            print(f"결과 저장소: {stats['entries']}개 결과, {stats['objects']}개 산출물, "
+                  f"{stats['bytes'] / 1e6:.1f} MB (정리 {n_evicted}개)")
+        return results
+
+
+def to_rows(results):
+    """run() 결과 → CSV 행 (점 순서, 알고리즘 순서)"""
+    rows = []
+    for result in results:
+        point = result["point"]
+        for name in ALGORITHMS:
+            if name not in result["sections"]:
+                continue
+            row = {"Server_Power": point.server_power, "Network": point.network,
+                   "Workload": point.workload, "Section": name}
+            row.update(result["sections"][name])
+            rows.append(row)
+    return rows
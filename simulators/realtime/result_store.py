@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실험 결과 저장소 (내용 주소 캐시)
+- (정규화한 설정, 시드, 알고리즘 변형, gastask 바이너리) 해시를 키로 변형 하나의 결과를 저장
+  → 스윕을 다시 돌리거나 점을 추가해도 이미 계산한 (점, 변형)은 gastask를 실행하지 않음
+- 산출물(task, report, 출력 섹션)은 내용 해시로 한 번만 저장 (같은 파일은 여러 결과가 공유)
+- 크기 한도를 넘으면 오래 쓰지 않은 결과부터 지우고, 참조가 없어진 산출물을 정리
+
+구조:
+    <root>/entries/<키>.json      지표와 산출물 해시 (mtime = 마지막 사용 시각)
+    <root>/objects/<해시 2자>/<해시>  산출물 내용
+
+사용 예:
+    store = ResultStore("result_cache", max_bytes=1 << 30)
+    key = store.key(conf, seed, "DVS=dvs", gastask)
+    entry = store.get(key)              # 없으면 None
+    store.put(key, metrics, {"task": "task_DVS.txt", "report": "report_DVS.txt"})
+    store.evict()
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+# 설정에서 gastask 결과에 영향이 없는 섹션 (gasgen 전용)
+GEN_SECTIONS = ("gentask", "gennetwork", "gennetcommander")
+
+_binary_hashes = {}
+_lock = threading.Lock()
+
+
+def _canonical_token(tok):
+    """숫자는 같은 값이면 같은 표기로 ("1.0" == "1", "0.50" == "0.5")"""
+    try:
+        value = float(tok)
+    except ValueError:
+        return tok
+    return str(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+
+
+def normalize_conf(conf):
+    """주석, 빈 줄, 공백 차이, gen* 섹션을 없앤 설정 (같은 입력이면 같은 문자열)"""
+    lines = []
+    skip = False
+    for line in conf.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("*"):
+            skip = line[1:].split()[0] in GEN_SECTIONS
+        if not skip:
+            lines.append(" ".join(_canonical_token(tok) for tok in line.split()))
+    return "\n".join(lines)
+
+
+def binary_hash(path):
+    """gastask 바이너리 내용 해시 (경로, 크기, mtime이 같으면 다시 읽지 않음)"""
+    path = Path(path).resolve()
+    st = path.stat()
+    ident = (str(path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        if ident not in _binary_hashes:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            _binary_hashes[ident] = h.hexdigest()
+        return _binary_hashes[ident]
+
+
+class ResultStore:
+    def __init__(self, root, max_bytes=None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        (self.root / "entries").mkdir(parents=True, exist_ok=True)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+
+    def key(self, conf, seed, variant, gastask):
+        h = hashlib.sha256()
+        for part in (normalize_conf(conf), str(seed), variant, binary_hash(gastask)):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return self.root / "entries" / f"{key}.json"
+
+    def object_path(self, digest):
+        return self.root / "objects" / digest[:2] / digest
+
+    def _write_atomic(self, path, data):
+        # 여러 스레드/프로세스가 같은 파일을 써도 반쯤 쓴 파일이 보이지 않도록 임시 파일 후 교체
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        """저장된 결과 {"metrics", "artifacts": {이름: 해시}} 또는 None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not all(self.object_path(d).exists() for d in entry["artifacts"].values()):
+            return None
+        os.utime(path)      # 마지막 사용 시각 (evict() 순서)
+        return entry
+
+    def put_object(self, data):
+        """내용 → 해시 (이미 있으면 다시 쓰지 않음)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            self._write_atomic(path, data)
+        return digest
+
+    def put(self, key, metrics, artifacts):
+        """artifacts: {이름: 파일 경로 또는 bytes}"""
+        digests = {}
+        for name, src in artifacts.items():
+            data = src if isinstance(src, bytes) else Path(src).read_bytes()
+            digests[name] = self.put_object(data)
+        entry = {"metrics": metrics, "artifacts": digests}
+        self._write_atomic(self._entry_path(key), json.dumps(entry).encode())
+        return entry
+
+    def read_artifact(self, entry, name):
+        return self.object_path(entry["artifacts"][name]).read_bytes()
+
+    def copy_artifact(self, entry, name, dest):
+        shutil.copyfile(self.object_path(entry["artifacts"][name]), dest)
+
+    def evict(self):
+        """크기 한도까지 오래 쓰지 않은 결과 삭제 후 참조 없는 산출물 정리 → 지운 결과 수"""
+        entries = []
+        for path in (self.root / "entries").glob("*.json"):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entries.append((path.stat().st_mtime, path, json.load(f)["artifacts"]))
+            except (OSError, ValueError):
+                continue
+        entries.sort(key=lambda e: e[0])
+
+        sizes = {}
+        for _, _, artifacts in entries:
+            for digest in artifacts.values():
+                if digest not in sizes and self.object_path(digest).exists():
+                    sizes[digest] = self.object_path(digest).stat().st_size
+        refs = {}
+        for _, _, artifacts in entries:
+            for digest in artifacts.values():
+                refs[digest] = refs.get(digest, 0) + 1
+
+        total = sum(sizes.values())
+        n_evicted = 0
+        for _, path, artifacts in entries:
+            if self.max_bytes is None or total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            n_evicted += 1
+            for digest in artifacts.values():
+                refs[digest] -= 1
+                if refs[digest] == 0:
+                    total -= sizes.get(digest, 0)
+
+        # 어떤 결과도 참조하지 않는 산출물
+        live = {digest for digest, n in refs.items() if n > 0}
+        for path in (self.root / "objects").glob("*/*"):
+            if path.name not in live and not path.name.startswith("."):
+                path.unlink(missing_ok=True)
+        return n_evicted
+
+    def stats(self):
+        n_entries = sum(1 for _ in (self.root / "entries").glob("*.json"))
+        objects = list((self.root / "objects").glob("*/*"))
+        return {"entries": n_entries, "objects": len(objects), "bytes": sum(p.stat().st_size for p in objects)}
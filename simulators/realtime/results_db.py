@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+run_rsm.sh / run_iot.sh 결과 DB (SQLite)
+- tmp/output_*/output.txt를 한 번만 파싱해 tmp/results.db에 저장 (run, 알고리즘별 한 행)
+- 폴더마다 output.txt의 크기와 mtime을 기록 → 다시 ingest하면 새 폴더(또는 바뀐 파일)만 파싱,
+  사라진 폴더는 삭제
+- network, 알고리즘, seed, run id에 인덱스 → 평균/개수 보고는 SQL 한 번
+
+사용 예:
+    db = ResultsDB("tmp/results.db")
+    db.ingest("tmp")                        # (새로 파싱한 수, 그대로인 수)
+    db.write_csv("tmp/network_results.csv", kind="iot", unknown_network=-1)
+"""
+
+import csv
+import os
+import sqlite3
+from pathlib import Path
+
+from orchestrator import ALGORITHMS, METRICS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,            -- output_* 폴더 이름
+    kind TEXT,                          -- rsm, iot (run 스크립트가 남긴 kind 파일, 없으면 NULL)
+    network INTEGER,                    -- gen_network_generated.txt를 읽을 수 없으면 NULL
+    seed INTEGER,
+    output_size INTEGER, output_mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    algorithm TEXT NOT NULL,
+    {", ".join(f'"{m}" REAL' for m in METRICS)},
+    PRIMARY KEY (run_id, algorithm)
+);
+CREATE INDEX IF NOT EXISTS runs_network ON runs(network);
+CREATE INDEX IF NOT EXISTS runs_kind_network ON runs(kind, network);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs(seed);
+CREATE INDEX IF NOT EXISTS results_algorithm ON results(algorithm);
+"""
+
+
+def parse_section(lines):
+    data = {}
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("power:"):
+            parts = line.split()
+            if len(parts) >= 4:
+                data["Power"] = float(parts[1])
+                data["Util"] = float(parts[3])
+        elif line.startswith("cpu power:"):
+            parts = line.split()
+            if len(parts) >= 9:
+                data["CPU_Power"] = float(parts[2])
+                data["Memory_Power"] = float(parts[5])
+                data["Network_Power"] = float(parts[8])
+        elif line.startswith("offloading ratio:"):
+            parts = line.split()
+            if len(parts) >= 3:
+                data["Offloading_Ratio"] = float(parts[2])
+        elif line.startswith("cpu frequency:"):
+            freq_line = None
+            for j in range(i+2, len(lines)):
+                if lines[j].strip():
+                    freq_line = lines[j]
+                    break
+            if freq_line:
+                freq_values = freq_line.split()
+                if len(freq_values) >= 4:
+                    data["CPU_Frequency_1"] = int(freq_values[0])
+                    data["CPU_Frequency_0.5"] = int(freq_values[1])
+                    data["CPU_Frequency_0.25"] = int(freq_values[2])
+                    data["CPU_Frequency_0.125"] = int(freq_values[3])
+        i += 1
+    return data
+
+
+def split_sections(lines):
+    """출력 줄 목록 → {알고리즘: 섹션 줄 목록} (한 번 훑어서, 다음 알고리즘 섹션 전까지)"""
+    sections = {}
+    current = None
+    for line in lines:
+        if line.startswith("*") and line[1:] in ALGORITHMS:
+            current = sections.setdefault(line[1:], [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def read_network(run_dir):
+    """gen/gen_network_generated.txt 첫 줄의 uplink, 없거나 읽을 수 없으면 None"""
+    gen_net_file = run_dir / "gen" / "gen_network_generated.txt"
+    if not gen_net_file.is_file():
+        print(f"[경고] {gen_net_file} 없음")
+        return None
+    with open(gen_net_file) as f:
+        first_line = f.readline().strip()
+    try:
+        # float도 가능하게 처리 (예: "100.0 Mbps")
+        return int(float(first_line.split()[0]))
+    except (ValueError, IndexError):
+        print(f"[경고] {gen_net_file}에서 network 값 변환 실패: '{first_line}'")
+        return None
+
+
+def _read_small(path):
+    try:
+        return path.read_text().strip() or None
+    except OSError:
+        return None
+
+
+class ResultsDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, tmp_dir):
+        """tmp_dir/output_*/output.txt 반영 → (새로 파싱한 run 수, 그대로인 run 수)"""
+        tmp_dir = Path(tmp_dir)
+        stamps = {run_id: (size, mtime) for run_id, size, mtime in
+                  self.conn.execute("SELECT run_id, output_size, output_mtime_ns FROM runs")}
+        seen = set()
+        n_new = n_same = 0
+
+        with self.conn:
+            for entry in os.scandir(tmp_dir):
+                if not entry.name.startswith("output_") or not entry.is_dir():
+                    continue
+                run_dir = Path(entry.path)
+                try:
+                    st = (run_dir / "output.txt").stat()
+                except OSError:
+                    continue
+                run_id = entry.name
+                seen.add(run_id)
+                if stamps.get(run_id) == (st.st_size, st.st_mtime_ns):
+                    n_same += 1
+                    continue
+
+                # 새 run 또는 바뀐 output.txt
+                self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+                network = read_network(run_dir)
+                seed = _read_small(run_dir / "seed")
+                self.conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                                  (run_id, _read_small(run_dir / "kind"), network,
+                                   int(seed) if seed is not None else None, st.st_size, st.st_mtime_ns))
+
+                with open(run_dir / "output.txt", "r") as f:
+                    sections = split_sections(f.read().splitlines())
+                rows = []
+                for section in ALGORITHMS:
+                    if section not in sections:
+                        print(f"[경고] section {section} not found in {run_dir / 'output.txt'}")
+                        continue
+                    parsed = parse_section(sections[section])
+                    if not parsed:
+                        print(f"[경고] section {section} 파싱 실패 in {run_dir / 'output.txt'}")
+                    rows.append([run_id, section] + [parsed.get(m) for m in METRICS])
+                self.conn.executemany(f"INSERT INTO results VALUES ({', '.join('?' * (2 + len(METRICS)))})", rows)
+                n_new += 1
+
+            # 지워진 폴더
+            gone = [(run_id,) for run_id in stamps if run_id not in seen]
+            self.conn.executemany("DELETE FROM runs WHERE run_id = ?", gone)
+        return n_new, n_same
+
+    def averages(self, kind=None, unknown_network=None):
+        """
+        network × 알고리즘별 [network, algorithm, count, 지표 평균...]
+        (네트워크 오름차순, 알고리즘은 ALGORITHMS 순서; 파싱되지 않은 지표는 0으로 평균)
+        - kind가 주어지면 그 kind 또는 kind 기록이 없는 run만
+        - network를 알 수 없는 run: unknown_network가 None이면 제외, 아니면 그 값으로 집계
+        """
+        order = " ".join(f"WHEN '{name}' THEN {i}" for i, name in enumerate(ALGORITHMS))
+        where, args = [], [unknown_network]
+        if kind is not None:
+            where.append("(kind = ? OR kind IS NULL)")
+            args.append(kind)
+        if unknown_network is None:
+            where.append("network IS NOT NULL")
+        return self.conn.execute(f"""
+            SELECT COALESCE(network, ?) AS net, algorithm, COUNT(*),
+                   {", ".join(f'TOTAL("{m}") / COUNT(*)' for m in METRICS)}
+            FROM results JOIN runs USING (run_id)
+            {"WHERE " + " AND ".join(where) if where else ""}
+            GROUP BY net, algorithm
+            ORDER BY net, CASE algorithm {order} ELSE 999 END
+        """, args).fetchall()
+
+    def write_csv(self, path, kind=None, unknown_network=None):
+        with open(path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["Network", "Section", "Count"] + METRICS)
+            writer.writerows(self.averages(kind, unknown_network))
@@ -133,51 +133,19 @@ EOF
 # 출력 디렉토리 생성
 OUTPUT=./tmp/output_$$
 mkdir -p $OUTPUT $OUTPUT/conf $OUTPUT/gen $OUTPUT/report $OUTPUT/task
-touch $OUTPUT/output.txt
-
-# 1. CO-DMO-CT
-echo "*CO-DMO-CT" >> $OUTPUT/output.txt
-conf1=$OUTPUT/conf/gastask_co-dmo-ct.conf
-create_base_config $conf1 1 true true
-$GASTASK -s $seed $conf1 | tee -a $OUTPUT/output.txt
-mv task.txt $OUTPUT/task/task_co-dmo-ct.txt
-mv report.txt $OUTPUT/report/report_co-dmo-ct.txt 2>/dev/null || true
-
-# 2. CO-DMO
-echo "" >> $OUTPUT/output.txt
-echo "*CO-DMO" >> $OUTPUT/output.txt
-conf2=$OUTPUT/conf/gastask_co-dmo.conf
-create_base_config $conf2 0 true true
-$GASTASK -s $seed $conf2 | tee -a $OUTPUT/output.txt
-mv task.txt $OUTPUT/task/task_co-dmo.txt
-mv report.txt $OUTPUT/report/report_co-dmo.txt 2>/dev/null || true
-
-# 3. Offloading
-echo "" >> $OUTPUT/output.txt
-echo "*Offloading" >> $OUTPUT/output.txt
-conf3=$OUTPUT/conf/gastask_offloading.conf
-create_base_config $conf3 0 true false
-$GASTASK -s $seed $conf3 | tee -a $OUTPUT/output.txt
-mv task.txt $OUTPUT/task/task_offloading.txt
-mv report.txt $OUTPUT/report/report_offloading.txt 2>/dev/null || true
-
-# 4. DVS
-echo "" >> $OUTPUT/output.txt
-echo "*DVS" >> $OUTPUT/output.txt
-conf4=$OUTPUT/conf/gastask_dvs.conf
-create_base_config $conf4 0 false true
-$GASTASK -s $seed $conf4 | tee -a $OUTPUT/output.txt
-mv task.txt $OUTPUT/task/task_dvs.txt
-mv report.txt $OUTPUT/report/report_dvs.txt 2>/dev/null || true
-
-# 5. Baseline
-echo "" >> $OUTPUT/output.txt
-echo "*Baseline" >> $OUTPUT/output.txt
-conf5=$OUTPUT/conf/gastask_baseline.conf
-create_base_config $conf5 0 false false
-$GASTASK -s $seed $conf5 | tee -a $OUTPUT/output.txt
-mv task.txt $OUTPUT/task/task_baseline.txt
-mv report.txt $OUTPUT/report/report_baseline.txt 2>/dev/null || true
+# 결과 DB(results_db.py)가 읽는 실행 정보
+echo iot > $OUTPUT/kind
+echo $seed > $OUTPUT/seed
+
+# 모든 알고리즘을 하나의 설정으로 병렬 실행 (gastask --variants)
+conf=$OUTPUT/conf/gastask.conf
+create_base_config $conf 1 true true
+$GASTASK -s $seed --variants CO-DMO-CT=tee+off+dvs,CO-DMO=off+dvs,Offloading=off,DVS=dvs,Baseline=none $conf | tee $OUTPUT/output.txt
+for name in CO-DMO-CT CO-DMO Offloading DVS Baseline; do
+    lname=$(echo $name | tr A-Z a-z)
+    mv task_$name.txt $OUTPUT/task/task_$lname.txt
+    mv report_$name.txt $OUTPUT/report/report_$lname.txt 2>/dev/null || true
+done
 
 # 정리
 mv ./network_commander_generated.txt $OUTPUT/gen/gen_network_commander_generated.txt 2>/dev/null || true
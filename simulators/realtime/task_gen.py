@@ -3,18 +3,30 @@
 """
 Candy-Box 스타일 태스크 생성기
 - 4유형: NPP(센싱), PP(룰/시스템), NCED(비중요 이벤트), CED(중요 이벤트)
-- 코드 내부에서 비율/개수/목표 이용률 조정
+- 비율/개수/목표 이용률은 generate() 인자 또는 명령행으로 지정 (기본값은 아래 상수)
 - Σ(wcet/period) 타겟 범위로 자동 보정(Period 스케일)
-- 결과: task_gen.txt 저장 (gastask 포맷)
+- 여러 태스크 집합을 NumPy 배열로 한 번에 생성 → workload × seed 스윕에 파이썬 재실행/소스 수정 불필요
+- 결과: 배열 dict, 또는 task_gen.txt / *task 섹션을 교체한 설정 파일 (gastask 포맷)
+
+사용 예:
+    import task_gen
+    sets = task_gen.generate(n_sets=100, seed=1, target_util=0.7)
+    sets["period"][i]                       # i번째 집합의 period 배열
+    libgastask.optimize(tasks=task_gen.task_set(sets, i), ...)
+    task_gen.write_conf("run.conf", Path("candy_cycle.conf").read_text(), sets, i)
+
+    $ ./task_gen.py -n 10 -s 1 -u 0.7 --conf candy_cycle.conf -o candy.conf   # candy_0.conf ... candy_9.conf
 """
 
+import argparse
 from pathlib import Path
-import random
-import math
-from statistics import mean
+
+import numpy as np
+
+from conf_edit import set_tasks
 
 # --------------------
-# 설정 (여기만 바꿔 쓰면 됨)
+# 설정 (기본값)
 # --------------------
 SEED = 42
 TOTAL_TASKS = 80
@@ -31,6 +43,8 @@ RATIOS = {           # 유형 비율 합=1.0
 # 목표 이용률 구간 (Σ wcet/period)
 TARGET_UTIL_MIN = 0.6499999999999999
 TARGET_UTIL_MAX = 0.75
+# 목표 이용률 하나만 주면 ±UTIL_MARGIN 구간
+UTIL_MARGIN = 0.05
 
 # 오프로딩 여부 기본값(유형별). 필요하면 바꿔도 됨.
 OFFLOAD_FLAG = {
@@ -61,35 +75,14 @@ TEMPLATES = {
 
 OUT_FILE = Path("task_gen.txt")
 
-# --------------------
-# 유틸
-# --------------------
-def uni(a, b):  # 정수 균등
-    return random.randint(a, b)
-
-def uni_f(a, b):  # 실수 균등
-    return random.uniform(a, b)
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
+# *task 섹션의 열 순서 (libgastask.TASK_FIELDS와 같음)
+TASK_FIELDS = ("wcet", "period", "memreq", "mem_active_ratio",
+               "task_size", "input_size", "output_size", "offloading_bool")
+TASK_HEADER = "# wcet period memreq mem_active_ratio task_size input_size output_size offloading_bool"
 
 # --------------------
-# 태스크 샘플러
+# 유틸
 # --------------------
-def sample_task(t):
-    wc = uni(*TEMPLATES[t]["wcet"])
-    pr = uni(*TEMPLATES[t]["period"])
-    # period > wcet 보장(여유 15% 확보)
-    if pr <= wc:
-        pr = int(math.ceil(wc * 1.15))
-    memreq = uni(*MEMREQ_RANGE)
-    mem_act = round(uni_f(*MEM_ACTIVE_RATIO), 4)
-    tsize = uni(*TASK_SIZE)
-    isize = uni(*INPUT_SIZE)
-    osize = uni(*OUTPUT_SIZE)
-    off   = OFFLOAD_FLAG[t]
-    return [wc, pr, memreq, mem_act, tsize, isize, osize, off]
-
 def build_counts(total, ratios):
     # 비율→정수 개수, 합 보정
     base = {k: int(total * v) for k, v in ratios.items()}
@@ -104,78 +97,151 @@ def build_counts(total, ratios):
             i += 1
     return base
 
-def sum_util(tasks):
-    return sum(w/p for w, p, *_ in tasks)
+def util_range(target_util, n_sets):
+    """목표 이용률 (스칼라 또는 집합별 배열) → 집합별 (min, max) 배열"""
+    target = np.broadcast_to(np.asarray(target_util, dtype=np.float64), (n_sets,))
+    return np.maximum(0.1, target - UTIL_MARGIN), np.minimum(1.0, target + UTIL_MARGIN)
 
-def scale_periods(tasks, target_min, target_max):
+def sum_util(wcet, period):
+    """집합별 Σ(w/p)"""
+    return (wcet / period).sum(axis=-1)
+
+def scale_periods(wcet, period, target_min, target_max):
     """
-    Σ(w/p)를 target 범위에 들게 period 전체 스케일.
+    집합마다 Σ(w/p)를 target 범위에 들게 period 전체 스케일 (모든 집합을 한 번에).
     - 과도한 스케일로 period <= wcet 되는 일 없도록 안전마진 유지(1.1*wcet).
+    결과: (새 period, 집합별 스케일 계수)
     """
-    cur = sum_util(tasks)
-    if target_min <= cur <= target_max:
-        return tasks, 1.0
+    cur = sum_util(wcet, period)
+    in_range = (target_min <= cur) & (cur <= target_max)
 
     # 목표 중앙으로 수렴시키기
     target = (target_min + target_max) / 2
     # Σ(w/p_new) = target  =>  p_new = p * (cur/target)
-    factor = cur / target if cur > 0 else 1.0
-
-    new = []
-    for (w, p, mem, ma, ts, ins, outs, off) in tasks:
-        new_p = int(math.ceil(p * factor))
-        # 안전 마진: period >= ceil(1.10 * wcet)
-        min_safe = int(math.ceil(w * 1.10))
-        if new_p < min_safe:
-            new_p = min_safe
-        new.append([w, new_p, mem, ma, ts, ins, outs, off])
+    factor = np.where(in_range | (cur <= 0), 1.0, cur / target)
 
-    return new, factor
+    new_p = np.ceil(period * factor[:, None])
+    # 안전 마진: period >= ceil(1.10 * wcet)
+    new_p = np.maximum(new_p, np.ceil(wcet * 1.10))
+    new_p = np.where(in_range[:, None], period, new_p).astype(np.int64)
+    return new_p, factor
 
 # --------------------
-# 메인
+# 생성
 # --------------------
-def main():
-    random.seed(SEED)
-    counts = build_counts(TOTAL_TASKS, RATIOS)
-
-    tasks = []
-    by_type = {k: [] for k in RATIOS.keys()}
+def generate(n_sets=1, seed=SEED, ratios=RATIOS, templates=TEMPLATES, target_util=None,
+             target_range=(TARGET_UTIL_MIN, TARGET_UTIL_MAX), total_tasks=TOTAL_TASKS,
+             offload_flag=OFFLOAD_FLAG, memreq_range=MEMREQ_RANGE, mem_active_ratio=MEM_ACTIVE_RATIO,
+             task_size=TASK_SIZE, input_size=INPUT_SIZE, output_size=OUTPUT_SIZE):
+    """
+    태스크 집합 n_sets개 생성
+    - target_util: 목표 이용률 (스칼라 또는 집합별 (n_sets,) 배열), ±UTIL_MARGIN 구간으로 보정.
+                   없으면 target_range (min, max) 구간
+    - 모든 집합을 필드마다 한 번의 난수 호출로 생성 (같은 seed, n_sets면 같은 집합들)
+    결과: TASK_FIELDS 이름의 (n_sets, total_tasks) 배열, "type" (total_tasks,) 유형 이름,
+          "util" (n_sets,) 보정 후 Σ(w/p), "scale" (n_sets,) period 스케일 계수, "counts" 유형별 개수
+    """
+    counts = build_counts(total_tasks, ratios)
+    types = np.array([t for t, cnt in counts.items() for _ in range(cnt)], dtype=object)
+    shape = (n_sets, len(types))
+    rng = np.random.default_rng(seed)
 
-    for t, cnt in counts.items():
-        for _ in range(cnt):
-            row = sample_task(t)
-            tasks.append(row)
-            by_type[t].append(row)
+    def uni(lo, hi):
+        """[lo, hi] 정수 균등 (lo, hi는 스칼라 또는 태스크별 배열)"""
+        return rng.integers(lo, np.asarray(hi) + 1, size=shape)
 
-    # 이용률 보정
-    tasks, scale = scale_periods(tasks, TARGET_UTIL_MIN, TARGET_UTIL_MAX)
+    def by_type(field):
+        """유형별 템플릿 범위 → 태스크별 (lo, hi) 배열"""
+        return tuple(np.array([templates[t][field][k] for t in types], dtype=np.int64) for k in (0, 1))
 
-    # 저장
-    with OUT_FILE.open("w", encoding="utf-8") as f:
-        f.write("# wcet period memreq mem_active_ratio task_size input_size output_size offloading_bool\n")
-        for row in tasks:
-            wc, pr, mem, ma, ts, ins, outs, off = row
-            f.write(f"{wc}\t{pr}\t{mem}\t{ma}\t{ts}\t{ins}\t{outs}\t{off}\n")
+    wcet = uni(*by_type("wcet"))
+    period = uni(*by_type("period"))
+    # period > wcet 보장(여유 15% 확보)
+    period = np.where(period <= wcet, np.ceil(wcet * 1.15).astype(np.int64), period)
+    memreq = uni(*memreq_range)
+    mar = np.round(rng.uniform(*mem_active_ratio, size=shape), 4)
+    tsize = uni(*task_size)
+    isize = uni(*input_size)
+    osize = uni(*output_size)
+    off = np.tile(np.array([offload_flag[t] for t in types], dtype=np.int64), (n_sets, 1))
 
-    # 통계 출력
-    total_u = sum_util(tasks)
-    print(f"• 총 태스크: {len(tasks)}  (분포: {counts})")
-    print(f"• Σ(wcet/period) = {total_u:.6f}  (타겟 [{TARGET_UTIL_MIN}, {TARGET_UTIL_MAX}]), period 스케일 계수 ×{scale:.3f}")
+    # 이용률 보정
+    if target_util is not None:
+        target_min, target_max = util_range(target_util, n_sets)
+    else:
+        target_min, target_max = (np.broadcast_to(np.asarray(v, dtype=np.float64), (n_sets,)) for v in target_range)
+    period, scale = scale_periods(wcet, period, target_min, target_max)
+
+    sets = dict(zip(TASK_FIELDS, (wcet, period, memreq, mar, tsize, isize, osize, off)))
+    sets.update(type=types, util=sum_util(wcet, period), scale=scale, counts=counts)
+    return sets
+
+def task_set(sets, i):
+    """i번째 집합 → TASK_FIELDS 키의 열 배열 dict (libgastask.optimize(tasks=...) 형식)"""
+    return {name: sets[name][i] for name in TASK_FIELDS}
+
+def task_lines(sets, i):
+    """i번째 집합 → *task 섹션 줄 목록"""
+    cols = [sets[name][i].tolist() for name in TASK_FIELDS]
+    return ["\t".join(map(str, row)) for row in zip(*cols)]
+
+def write_tasks(path, sets, i):
+    """task_gen.txt 포맷으로 저장"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(TASK_HEADER + "\n")
+        f.writelines(line + "\n" for line in task_lines(sets, i))
+
+def write_conf(path, base_conf, sets, i):
+    """base_conf (설정 문자열)의 *task 섹션을 i번째 집합으로 교체해 저장"""
+    Path(path).write_text(set_tasks(base_conf, task_lines(sets, i)), encoding="utf-8")
 
-    for t, lst in by_type.items():
-        if not lst: 
+# --------------------
+# 메인
+# --------------------
+def print_stats(sets, i):
+    wcet, period = sets["wcet"][i], sets["period"][i]
+    print(f"• 총 태스크: {len(wcet)}  (분포: {sets['counts']})")
+    print(f"• Σ(wcet/period) = {sets['util'][i]:.6f}, period 스케일 계수 ×{sets['scale'][i]:.3f}")
+
+    for t in sets["counts"]:
+        mask = sets["type"] == t
+        if not mask.any():
             continue
-        u = sum(w/p for w, p, *_ in lst)
-        avg_w = mean(w for w, *_ in lst)
-        avg_p = mean(p for _, p, *_ in lst)
-        print(f"  - {t:5s}: {len(lst):2d}개, ΣU={u:.4f}, avg_wcet={avg_w:.1f} ms, avg_period={avg_p:.1f} ms")
+        u = (wcet[mask] / period[mask]).sum()
+        print(f"  - {t:5s}: {mask.sum():2d}개, ΣU={u:.4f}, avg_wcet={wcet[mask].mean():.1f} ms, "
+              f"avg_period={period[mask].mean():.1f} ms")
 
     # 추천: 추가 지표
-    avg_mem = mean(row[2] for row in tasks)
-    avg_mact = mean(row[3] for row in tasks)
-    off_rate = mean(row[7] for row in tasks)
-    print(f"• 평균 memreq={avg_mem:.1f}, 평균 mem_active_ratio={avg_mact:.3f}, 오프로딩 비율={off_rate*100:.1f}%")
+    print(f"• 평균 memreq={sets['memreq'][i].mean():.1f}, 평균 mem_active_ratio={sets['mem_active_ratio'][i].mean():.3f}, "
+          f"오프로딩 비율={sets['offloading_bool'][i].mean()*100:.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Candy-Box 스타일 태스크 생성기")
+    parser.add_argument("-n", "--sets", type=int, default=1, help="태스크 집합 수 (기본: 1)")
+    parser.add_argument("-s", "--seed", type=int, default=SEED)
+    parser.add_argument("-u", "--util", type=float, default=None, help=f"목표 이용률 (±{UTIL_MARGIN})")
+    parser.add_argument("--util-range", type=float, nargs=2, metavar=("MIN", "MAX"),
+                        default=(TARGET_UTIL_MIN, TARGET_UTIL_MAX))
+    parser.add_argument("--conf", type=Path, default=None, help="*task 섹션을 교체할 기본 설정 (없으면 태스크 목록만)")
+    parser.add_argument("-o", "--out", type=Path, default=OUT_FILE,
+                        help="출력 파일 (집합이 여럿이면 <이름>_<i><확장자>)")
+    args = parser.parse_args()
+
+    sets = generate(args.sets, args.seed, target_util=args.util, target_range=args.util_range)
+    base_conf = args.conf.read_text(encoding="utf-8") if args.conf else None
+
+    for i in range(args.sets):
+        path = args.out if args.sets == 1 else args.out.with_name(f"{args.out.stem}_{i}{args.out.suffix}")
+        if base_conf is not None:
+            write_conf(path, base_conf, sets, i)
+        else:
+            write_tasks(path, sets, i)
+
+    # 통계 출력
+    if args.sets == 1:
+        print_stats(sets, 0)
+    else:
+        print(f"• {args.sets}개 집합, Σ(wcet/period) {sets['util'].min():.4f} ~ {sets['util'].max():.4f}")
 
 if __name__ == "__main__":
     main()